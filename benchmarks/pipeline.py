@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.replay import BenchmarkPrompts, ReplayLLM, ReplayThumbnailGenerator, ReplayTranscriber, ReplayTranscriptionBackend, benchmark_fonts, load_fixtures, FIXTURES
+from benchmarks.zoom_tree import make_zoom_tree
+from blog_editor import BlogEditor
+from helpers.notion_fakes import FakeNotionClient, LocalBlobStore
+from helpers.notion_service import NotionService, LOCAL_UPLOADS
+from helpers.text_metrics import TextMetrics
+from helpers.transcriber import TranscriptBuilder
+from helpers.upload_cache import UploadCache
+from llms.llm_service import LLMService, PROVIDERS
+from llms.metrics import LLMMetrics, percentile
+from schemas.file import ThumbnailEncoder
+from transcription.cache import TranscriptionCache
+
+STAGES = ["generate_all", "get", "save", "transcript", "thumbnails", "publish", "republish"]
+
+def discard(*args, **kwargs):
+    pass
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process so far (ru_maxrss is in KB on Linux, bytes on macOS)
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if platform.system() == "Darwin" else peak / (1 << 10)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def make_editor(directory: str, fixtures: dict, args) -> BlogEditor:
+    """
+    Make a BlogEditor on the Zoom folder, with the providers (LLMs, AssemblyAI, BiRefNet, Notion + Firebase) replayed from the fixtures
+    """
+    editor = BlogEditor(directory)
+    repository = editor.file_helper.file_repository
+    editor.config["SITE_URL"] = "https://example.com"
+
+    editor.prompts = BenchmarkPrompts(args.model)
+    editor.llm = LLMService(editor.config, LLMMetrics(repository))
+    for provider in PROVIDERS:
+        editor.llm.clients[provider] = ReplayLLM(provider, editor.llm.models, fixtures["llm"], args.speed)
+
+    backend = ReplayTranscriptionBackend(fixtures["transcription"], args.repeat, args.speed)
+    editor.transcriber = ReplayTranscriber(backend, editor.llm, editor.prompts, TranscriptionCache(repository))
+    editor.thumbnail_generator = ReplayThumbnailGenerator(fixtures["birefnet"]["latency"], args.speed, encoder=ThumbnailEncoder(), metrics=TextMetrics(benchmark_fonts(args.font)))
+
+    notion = fixtures["notion"]
+    client = FakeNotionClient(latency=notion["latency"] * args.speed, rate_limit=notion["rate_limit"] if args.speed else None)
+    bucket = LocalBlobStore(os.path.join(directory, ".cache", "blobs"), latency=notion["upload_latency"] * args.speed)
+    editor.notion_service = NotionService({"NOTION_TOKEN": None, "NOTION_DATABASE_ID": "benchmark"}, UploadCache(repository, LOCAL_UPLOADS), client=client, bucket=bucket)
+    return editor
+
+def run_stage(names: list, fn, concurrency: int = 1) -> dict:
+    """
+    Run fn on every blog (concurrently if asked), returns the wall time and the duration of each call
+    """
+    def timed(name):
+        start = time.perf_counter()
+        fn(name)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        durations = list(executor.map(timed, names))
+    return {"wall": time.perf_counter() - start, "durations": durations, "peak_rss_mb": peak_rss_mb()}
+
+def run_pipeline(directory: str, fixtures: dict, args) -> tuple:
+    """
+    Run every stage of the pipeline on a fresh Zoom folder, returns the stages and the editor
+    """
+    names = make_zoom_tree(directory, args.blogs)
+    editor = make_editor(directory, fixtures, args)
+    targets = args.targets.replace(" ", "").split(",")
+    blogs = {}
+
+    def transcript(name):
+        utterances = blogs.setdefault(name, editor.get(name)).metadata.utterances
+        TranscriptBuilder(utterances).build("B")
+
+    stages = {
+        "generate_all": (lambda name: editor.generate_all(name, model=args.model, llm_stream=discard, callback=discard), args.concurrency),
+        "get": (editor.file_helper.get, 1),
+        "save": (lambda name: editor.file_helper.save(editor.file_helper.get(name)), 1),
+        "transcript": (transcript, 1),
+        "thumbnails": (lambda name: editor.generate_thumbnails(name, force=True), args.concurrency),
+        "publish": (lambda name: editor.publish(name, targets), args.concurrency),
+        "republish": (lambda name: editor.publish(name, targets), args.concurrency),
+    }
+
+    results = {}
+    for stage, (fn, concurrency) in stages.items():
+        # The pipeline prints its progress, only shown with --verbose
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            results[stage] = run_stage(names, fn, concurrency)
+    return results, editor
+
+def summarize(runs: list) -> dict:
+    """
+    Summarize the stages over the runs: calls, throughput (blogs/s), p50/p95/max latency and peak RSS
+    """
+    summary = {}
+    for stage in STAGES:
+        durations = [duration for run in runs for duration in run[stage]["durations"]]
+        wall = sum(run[stage]["wall"] for run in runs)
+        summary[stage] = {
+            "calls": len(durations),
+            "throughput": len(durations) / wall if wall else None,
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "max": max(durations),
+            "peak_rss_mb": max(run[stage]["peak_rss_mb"] for run in runs),
+        }
+    return summary
+
+def main():
+    """
+    Benchmark the whole pipeline end to end, with the providers replayed from recorded responses (run from the repository root)
+
+    A synthetic Zoom folder of N blogs goes through generate all (resume, transcription, guest, thumbnails, blog assets),
+    getting and saving the blogs, transcript assembly, forced thumbnail renders, publishing and republishing.
+    The recorded latencies are replayed (scaled by --speed, 0 to only measure our own code), and the results
+    can be saved and compared against a previous run, to track the pipeline across changes.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the BlogEditor pipeline against recorded provider responses")
+    parser.add_argument("--blogs", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=1.0, help="Scale of the recorded latencies (0 replays instantly, without Notion rate limits)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Blogs processed concurrently (generate all, thumbnails, publish)")
+    parser.add_argument("--iterations", type=int, default=1, help="Runs of the pipeline, each on a fresh Zoom folder")
+    parser.add_argument("--repeat", type=int, default=10, help="Repetitions of the recorded utterances per transcript (its length)")
+    parser.add_argument("--model", default="sonnet", help="Model alias of the prompts")
+    parser.add_argument("--targets", default="notion,markdown,site,feed", help="Publishing targets")
+    parser.add_argument("--fixtures", default=FIXTURES, help="Recorded provider responses")
+    parser.add_argument("--font", help="TrueType font replacing the thumbnail fonts that aren't installed (a system font by default)")
+    parser.add_argument("--directory", help="Create the Zoom folders here (kept) instead of a temporary directory")
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--compare", help="Compare with the results saved in this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the pipeline")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    runs = []
+    for i in range(args.iterations):
+        if args.directory:
+            stages, editor = run_pipeline(os.path.join(args.directory, f"run-{i}"), fixtures, args)
+        else:
+            with tempfile.TemporaryDirectory() as directory:
+                stages, editor = run_pipeline(directory, fixtures, args)
+        runs.append(stages)
+
+    results = {
+        "commit": git_commit(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "verbose")},
+        "stages": summarize(runs),
+        "peak_rss_mb": peak_rss_mb(),
+        "llm": editor.get_llm_stats("attr"),
+        "notion_requests": dict(editor.notion_service.client.requests),
+    }
+
+    print(f"{args.blogs} blogs x {args.iterations} runs, speed {args.speed}, concurrency {args.concurrency} (commit {results['commit']})\n")
+    print(f"{'stage':<14} {'calls':>6} {'blogs/s':>9} {'p50':>9} {'p95':>9} {'max':>9} {'peak rss':>10}")
+    for stage, row in results["stages"].items():
+        print(
+            f"{stage:<14} {row['calls']:>6} {row['throughput']:>9.2f} {row['p50'] * 1000:>7.1f}ms {row['p95'] * 1000:>7.1f}ms "
+            f"{row['max'] * 1000:>7.1f}ms {row['peak_rss_mb']:>8.1f}MB"
+        )
+    print(f"\nLast run: LLM calls: {sum(row['calls'] for row in results['llm'])}  Notion requests: {sum(results['notion_requests'].values())}")
+
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {args.compare} (commit {baseline.get('commit')}):")
+        for stage, row in results["stages"].items():
+            before = baseline["stages"].get(stage)
+            if before and before["p50"]:
+                print(f"  {stage:<14} p50 {before['p50'] * 1000:8.1f}ms -> {row['p50'] * 1000:8.1f}ms ({row['p50'] / before['p50']:.2f}x)")
+        print(f"  {'peak rss':<14}     {baseline['peak_rss_mb']:8.1f}MB -> {results['peak_rss_mb']:8.1f}MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
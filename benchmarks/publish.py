@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from PIL import Image
+from helpers.notion_fakes import FakeNotionClient, LocalBlobStore
+from helpers.notion_service import NotionService, LOCAL_UPLOADS
+from helpers.upload_cache import UploadCache
+from file_system.file_repository import FileRepository
+from schemas.file import File, Files, Blog
+
+WORDS = "the guest talks about research startups teaching failure curiosity engineering product growth".split()
+
+def make_content(paragraphs: int) -> list:
+    """
+    Make the paragraphs of a synthetic blog (with a heading every 10 paragraphs and some inline formatting)
+    """
+    sections = []
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            sections.append(f"## Section {i // 10 + 1}")
+        words = random.choices(WORDS, k=random.randint(30, 120))
+        words[0] = f"**{words[0]}**"
+        sections.append(" ".join(words))
+    return sections
+
+def make_blog(directory: str, paragraphs: int) -> File:
+    """
+    Make a synthetic blog, with the portrait and banner images it publishes
+    """
+    os.makedirs(os.path.join(directory, "content"), exist_ok=True)
+    Image.new("RGB", (800, 800), (200, 100, 50)).save(os.path.join(directory, "portrait.jpeg"))
+    Image.new("RGB", (1080, 1080), (50, 100, 200)).save(os.path.join(directory, "content", "square.png"))
+
+    path = lambda name: os.path.join(directory, name)
+    return File(
+        name="benchmark",
+        files=Files(audio_file=path("audio.m4a"), video_file=path("video.mp4"), resume_file=path("resume.pdf"), portrait=path("portrait.jpeg"), photo=path("photo.png")),
+        metadata=None,
+        thumbnails=None,
+        blog=Blog(title="Benchmark", description="A synthetic blog to benchmark publishing", content="\n\n".join(make_content(paragraphs))),
+    )
+
+def measure(client: FakeNotionClient, fn):
+    """
+    Run fn and return its result, duration and the Notion requests it made
+    """
+    requests_before, rate_limited_before = client.requests.copy(), client.rate_limited
+    start = time.perf_counter()
+    result = fn()
+    duration = time.perf_counter() - start
+    return result, duration, client.requests - requests_before, client.rate_limited - rate_limited_before
+
+def report(name: str, duration: float, requests, rate_limited: int):
+    calls = ", ".join(f"{endpoint}: {count}" for endpoint, count in sorted(requests.items()))
+    print(f"{name:<20} {duration * 1000:8.1f}ms  requests: {sum(requests.values()):4}  rate limited: {rate_limited:3}  ({calls})")
+
+def main():
+    """
+    Benchmark publishing a blog to Notion against the local stand-ins (no network or credentials needed)
+
+    Measures the first publish (page creation, batched appends), republishing unchanged and republishing after edits.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark publishing to Notion offline")
+    parser.add_argument("--paragraphs", type=int, default=500)
+    parser.add_argument("--edits", type=int, default=5, help="Paragraphs edited before republishing")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latency of each Notion request (seconds)")
+    parser.add_argument("--upload-latency", type=float, default=0.2, help="Latency of each image upload (seconds)")
+    parser.add_argument("--rate-limit", type=float, default=3, help="Notion requests per second before a 429 (0 to disable)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        blog = make_blog(directory, args.paragraphs)
+        client = FakeNotionClient(latency=args.latency, rate_limit=args.rate_limit or None)
+        bucket = LocalBlobStore(os.path.join(directory, "blobs"), latency=args.upload_latency)
+        config = {"NOTION_TOKEN": None, "NOTION_DATABASE_ID": "benchmark"}
+        notion_service = NotionService(config, UploadCache(FileRepository(directory), LOCAL_UPLOADS), client=client, bucket=bucket)
+
+        state, duration, requests, rate_limited = measure(client, lambda: notion_service.publish(blog))
+        blocks = len(state["blocks"])
+        report("publish", duration, requests, rate_limited)
+        print(f"{'':<20} {blocks} blocks, {blocks / duration:.0f} blocks/s, {bucket.uploads} image uploads")
+
+        state, duration, requests, rate_limited = measure(client, lambda: notion_service.publish(blog, state))
+        report("republish unchanged", duration, requests, rate_limited)
+
+        sections = blog.blog.content.split("\n\n")
+        for i in random.sample(range(len(sections)), min(args.edits, len(sections))):
+            sections[i] += " (edited)"
+        blog.blog.content = "\n\n".join(sections)
+        state, duration, requests, rate_limited = measure(client, lambda: notion_service.publish(blog, state))
+        report("republish edited", duration, requests, rate_limited)
+
+        # The page must match what was published
+        published = client.page_blocks(state["page_id"])
+        assert [block["id"] for block in published] == [block["id"] for block in state["blocks"]], "Published page is out of sync"
+
+if __name__ == "__main__":
+    main()
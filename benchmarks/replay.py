@@ -0,0 +1,203 @@
+import glob
+import json
+import os
+import re
+import time
+from PIL import Image, ImageChops
+from llms.llm import LLM
+from llms.stream_sink import StreamSink
+from helpers.text_metrics import FONTS
+from helpers.thumbnail_generator import ThumbnailGenerator
+from helpers.transcriber import Transcriber
+from schemas.file import File, Utterances, Utterance, Word
+from schemas.prompt import Prompt
+from transcription.backend import TranscriptionBackend
+from tracing import tracer
+
+FIXTURES = "benchmarks/fixtures/recorded.json"
+
+# Words streamed per chunk by the replayed streams
+STREAM_CHUNK_WORDS = 8
+
+# Where to look for a substitute font when the thumbnail fonts aren't installed
+FONT_DIRECTORIES = ["/usr/share/fonts", "/usr/local/share/fonts", "/Library/Fonts", "/System/Library/Fonts", "~/Library/Fonts", "~/.fonts", "C:/Windows/Fonts"]
+
+def benchmark_fonts(font: str = None) -> dict:
+    """
+    Get the thumbnail fonts, with the given (or the first system) TrueType font standing in for the ones that aren't installed
+    """
+    missing = [name for name, (path, _) in FONTS.items() if not os.path.exists(path)]
+    if not missing:
+        return FONTS
+
+    if not font:
+        candidates = (path for directory in FONT_DIRECTORIES for path in sorted(glob.glob(os.path.join(os.path.expanduser(directory), "**", "*.ttf"), recursive=True)))
+        font = next(candidates, None)
+    if not font:
+        raise SystemExit(f"Fonts {missing} not found and no system font to replace them, pass one with --font")
+
+    # Substitutes aren't variable fonts, so they're rendered without a variation
+    return {name: (font, None) if name in missing else value for name, value in FONTS.items()}
+
+def load_fixtures(path: str = FIXTURES) -> dict:
+    """
+    Load the recorded provider responses
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+class BenchmarkPrompts:
+    """
+    Stand-in for the Prompts, tagging every prompt with its kind so the replayed LLM knows which response to give
+
+    The prompts carry the same context as the real ones (resume, transcript), so the prompt sizes are realistic.
+    """
+
+    def __init__(self, model: str = "sonnet"):
+        """
+        Initialize the BenchmarkPrompts
+        """
+        self.model = model
+
+    def _prompt(self, kind: str, context: str = "") -> Prompt:
+        return Prompt(text=f"[{kind}]\n{context}", model=self.model)
+
+    def get_prompt(self, file: File, attr: str) -> Prompt:
+        transcript = file.metadata.transcript.text if file.metadata.transcript else ""
+        return self._prompt(attr, transcript)
+
+    def extract_resume_prompt(self, text: str) -> Prompt:
+        return self._prompt("resume", text)
+
+    def first_name_prompt(self, file: File) -> Prompt:
+        return self._prompt("first_name", str(file.metadata.resume))
+
+    def top_companies_prompt(self, file: File) -> Prompt:
+        return self._prompt("top_companies", str(file.metadata.resume))
+
+    def top_universities_prompt(self, file: File) -> Prompt:
+        return self._prompt("top_universities", str(file.metadata.resume))
+
+    def origin_prompt(self, file: File) -> Prompt:
+        return self._prompt("origin", str(file.metadata.resume))
+
+    def identify_speaker_prompt(self, context: str) -> Prompt:
+        return self._prompt("speaker", context)
+
+class ReplayLLM(LLM):
+    """
+    LLM client replaying the recorded responses, with their latency (or time to first token and tokens/sec for streams)
+    """
+
+    def __init__(self, provider: str, models: dict, responses: dict, speed: float = 1.0):
+        """
+        Initialize the ReplayLLM (speed scales the recorded latencies, 0 replays instantly)
+        """
+        super().__init__(provider=provider, config={}, models=models)
+        self.responses = responses
+        self.speed = speed
+
+    def _response(self, prompt: str) -> dict:
+        kind = re.match(r"\[(\w+)\]", prompt).group(1)
+        return self.responses[kind]
+
+    def prompt(self, prompt: str, model: str = "sonnet", schema=None):
+        response = self._response(prompt)
+        time.sleep(response.get("latency", 0) * self.speed)
+        tracer.annotate(input_tokens=response["input_tokens"], output_tokens=response["output_tokens"])
+
+        if schema:
+            return schema.model_validate(response["response"])
+        return response["response"] if isinstance(response["response"], str) else json.dumps(response["response"])
+
+    def stream_prompt(self, prompt: str, model: str = "sonnet", llm_stream=None):
+        response = self._response(prompt)
+        words = re.findall(r"\S+\s*", response["response"])
+        seconds_per_word = self.speed * response["output_tokens"] / response["tokens_per_sec"] / max(len(words), 1)
+
+        time.sleep(response["ttft"] * self.speed)
+        with StreamSink(llm_stream) as sink:
+            for i in range(0, len(words), STREAM_CHUNK_WORDS):
+                chunk = words[i:i + STREAM_CHUNK_WORDS]
+                sink.write("".join(chunk))
+                time.sleep(seconds_per_word * len(chunk))
+
+        tracer.annotate(input_tokens=response["input_tokens"], output_tokens=response["output_tokens"])
+        return self.parse_response(sink.text())
+
+class ReplayTranscriptionBackend(TranscriptionBackend):
+    """
+    Transcription backend replaying the recorded AssemblyAI utterances (repeated to the length of the recording)
+    """
+
+    def __init__(self, recording: dict, repeat: int = 1, speed: float = 1.0):
+        """
+        Initialize the ReplayTranscriptionBackend
+        """
+        super().__init__(name="replay", config={})
+        self.recording = recording
+        self.repeat = repeat
+        self.speed = speed
+
+    def transcribe(self, audio_file_path: str, speakers_expected: int = 2) -> Utterances:
+        time.sleep(self.recording["latency"] * self.speed)
+
+        utterances = []
+        duration = self.recording["utterances"][-1]["end"] + 1000
+        for i in range(self.repeat):
+            for recorded in self.recording["utterances"]:
+                start = recorded["start"] + i * duration
+                end = recorded["end"] + i * duration
+
+                # Word timestamps spread evenly over the utterance, like AssemblyAI's
+                texts = recorded["text"].split()
+                step = (end - start) // len(texts)
+                words = [
+                    Word(text=text, start=start + j * step, end=start + (j + 1) * step, confidence=recorded["confidence"], speaker=recorded["speaker"])
+                    for j, text in enumerate(texts)
+                ]
+                utterances.append(Utterance(confidence=recorded["confidence"], start=start, end=end, speaker=recorded["speaker"], text=recorded["text"], words=words))
+
+        return Utterances(utterances=utterances)
+
+class ReplayTranscriber(Transcriber):
+    """
+    Transcriber using the replayed backend
+    """
+
+    def __init__(self, backend: TranscriptionBackend, llm, prompts, cache=None):
+        """
+        Initialize the ReplayTranscriber (recordings are transcribed in one piece)
+        """
+        self.replay_backend = backend
+        super().__init__({"TRANSCRIPTION_CHUNK_SECONDS": "0"}, llm, prompts, cache)
+
+    def get_backend(self, config) -> TranscriptionBackend:
+        return self.replay_backend
+
+class ReplayThumbnailGenerator(ThumbnailGenerator):
+    """
+    Thumbnail generator replaying the BiRefNet background removal (the synthetic photos have a plain background)
+    """
+
+    def __init__(self, latency: float, speed: float = 1.0, **kwargs):
+        """
+        Initialize the ReplayThumbnailGenerator
+        """
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.speed = speed
+
+    def remove_bg(self, file: File, debug=False):
+        if debug or self.has_photo_no_bg(file):
+            return super().remove_bg(file, debug)
+
+        with tracer.span("thumbnails.remove_bg", replayed=True):
+            time.sleep(self.latency * self.speed)
+            photo = Image.open(file.files.photo).convert("RGBA")
+
+            # Everything but the background colour (top left pixel) is kept
+            background = Image.new("RGBA", photo.size, photo.getpixel((0, 0)))
+            mask = ImageChops.difference(photo, background).convert("L").point(lambda value: 255 if value > 8 else 0)
+            photo.putalpha(mask)
+            return photo
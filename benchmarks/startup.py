@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from statistics import median
+
+# What the CLI does before showing the first screen
+STARTUP = "from blog_editor import BlogEditor; BlogEditor()"
+
+def run(statement: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    """
+    Run the statement in a fresh interpreter (from the repository root), optionally with -X importtime
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", statement]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise SystemExit(f"'{statement}' failed: {error[-1] if error else result.returncode}")
+    return result
+
+def parse_importtime(output: str) -> list:
+    """
+    Parse the -X importtime output into (module, self, cumulative, depth) entries, times in seconds
+    """
+    imports = []
+    for line in output.splitlines():
+        # e.g. "import time:       183 |       4529 |   notion_client"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return imports
+
+def summarize(imports: list, top: int) -> dict:
+    """
+    Summarize the imports: total time, time per top-level package (self time of all its modules) and the slowest direct imports
+    """
+    packages = defaultdict(float)
+    for name, self_time, _, _ in imports:
+        packages[name.split(".")[0]] += self_time
+
+    # The shallowest imports are the ones made by the statement itself
+    depth = min((entry[3] for entry in imports), default=0)
+    direct = [entry for entry in imports if entry[3] == depth]
+
+    return {
+        "total": sum(packages.values()),
+        "modules": len(imports),
+        "packages": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+        "direct": {name: cumulative for name, _, cumulative, _ in sorted(direct, key=lambda entry: -entry[2])[:top]},
+    }
+
+def main():
+    """
+    Benchmark the startup of the CLI (run from the repository root)
+
+    Times the BlogEditor construction in fresh interpreters and summarises its -X importtime profile.
+    The results can be saved and compared against a previous run, to track the startup time across changes.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the startup time and imports of BlogEditor")
+    parser.add_argument("--statement", default=STARTUP, help="Statement to time")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of packages and imports listed")
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--compare", help="Compare with the results saved in this JSON file")
+    args = parser.parse_args()
+
+    # Wall time, the first run warms the bytecode cache
+    run(args.statement)
+    times = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        run(args.statement)
+        times.append(time.perf_counter() - start)
+
+    summary = summarize(parse_importtime(run(args.statement, importtime=True).stderr), args.top)
+    results = {"statement": args.statement, "wall": median(times), **summary}
+
+    print(f"wall: {results['wall'] * 1000:.1f}ms  imports: {results['total'] * 1000:.1f}ms ({results['modules']} modules)")
+    print("\nSlowest packages (self time of all their modules):")
+    for package, duration in results["packages"].items():
+        print(f"  {package:<30} {duration * 1000:8.1f}ms")
+    print("\nSlowest direct imports (cumulative):")
+    for name, duration in results["direct"].items():
+        print(f"  {name:<30} {duration * 1000:8.1f}ms")
+
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {args.compare}:")
+        for key in ("wall", "total"):
+            print(f"  {key:<30} {baseline[key] * 1000:8.1f}ms -> {results[key] * 1000:8.1f}ms ({results[key] / baseline[key]:.2f}x)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import time
+from statistics import median
+from concurrent.futures import ThreadPoolExecutor
+from file_system.file_helper import FileHelper
+from helpers.thumbnail_generator import ThumbnailGenerator
+from schemas.file import ThumbnailEncoder
+
+def benchmark_variant(generator: ThumbnailGenerator, file, photo_no_bg, params, iterations: int):
+    """
+    Time the render and encode steps of a single thumbnail variant
+    """
+    render_times, encode_times, preview_times = [], [], []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        thumbnail = generator.generate_thumbnail(file, photo_no_bg, params)
+        render_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        generator.image_to_bytes(thumbnail)
+        encode_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        generator.image_to_preview_bytes(thumbnail)
+        preview_times.append(time.perf_counter() - start)
+
+    return {
+        "render": median(render_times),
+        "encode": median(encode_times),
+        "preview": median(preview_times),
+    }
+
+def main():
+    """
+    Benchmark the thumbnail rendering + encoding for an existing blog (run from the repository root)
+
+    The blog must already have generated thumbnails, so the cached background removal is reused.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark thumbnail rendering and encoding")
+    parser.add_argument("--directory", required=True, help="Zoom folder containing the blogs")
+    parser.add_argument("--blog", required=True, help="Name of the blog to render")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--compress-level", type=int, default=ThumbnailEncoder().compress_level)
+    parser.add_argument("--optimize", action="store_true")
+    parser.add_argument("--preview-format", choices=["WEBP", "JPEG"], default=None)
+    args = parser.parse_args()
+
+    file = FileHelper(args.directory).get(args.blog)
+    encoder = ThumbnailEncoder(compress_level=args.compress_level, optimize=args.optimize, preview_format=args.preview_format)
+    generator = ThumbnailGenerator(encoder)
+    if not generator.has_photo_no_bg(file):
+        raise SystemExit(f"No background-removed photo of the current photo for {args.blog}, generate the thumbnails first!")
+
+    photo_no_bg = generator.remove_bg(file)
+    photo_no_bg.load()
+
+    variants = {
+        "landscape": file.thumbnails.landscape_params,
+        "square": file.thumbnails.square_params,
+    }
+
+    # Per-variant render and encode time
+    print(f"Encoder: {encoder}")
+    for name, params in variants.items():
+        timings = benchmark_variant(generator, file, photo_no_bg, params, args.iterations)
+        print(f"{name:<10} render: {timings['render'] * 1000:8.1f}ms  encode: {timings['encode'] * 1000:8.1f}ms  preview: {timings['preview'] * 1000:8.1f}ms")
+
+    # Serial vs concurrent end-to-end time for both variants
+    start = time.perf_counter()
+    for params in variants.values():
+        generator.render_variant(file, photo_no_bg, params)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(variants)) as executor:
+        list(executor.map(lambda params: generator.render_variant(file, photo_no_bg, params), variants.values()))
+    concurrent = time.perf_counter() - start
+
+    print(f"serial: {serial * 1000:.1f}ms  concurrent: {concurrent * 1000:.1f}ms  speedup: {serial / concurrent:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import random
+from PIL import Image, ImageDraw
+
+# Plain background of the photos, so the replayed background removal can cut the guest out
+BACKGROUND = (236, 232, 225)
+
+def make_pdf(lines: list) -> bytes:
+    """
+    Make a single-page PDF with the given lines of text (enough for PyPDF2 to extract them)
+    """
+    text = "\n".join(f"({line.replace('(', '').replace(')', '')}) Tj 0 -16 Td" for line in lines)
+    stream = f"BT /F1 11 Tf 72 760 Td\n{text}\nET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+def make_photo(size: int, seed: int) -> Image.Image:
+    """
+    Make a photo of a (very abstract) guest on a plain background
+    """
+    rng = random.Random(seed)
+    photo = Image.new("RGB", (size, size), BACKGROUND)
+    draw = ImageDraw.Draw(photo)
+    colour = tuple(rng.randint(40, 180) for _ in range(3))
+
+    # Shoulders, then the head
+    draw.ellipse((size * 0.15, size * 0.6, size * 0.85, size * 1.3), fill=colour)
+    draw.ellipse((size * 0.32, size * 0.18, size * 0.68, size * 0.62), fill=(224, 172, 105))
+    return photo
+
+def make_zoom_tree(directory: str, blogs: int, photo_size: int = 1024, audio_bytes: int = 1 << 20) -> list:
+    """
+    Make a Zoom folder with the given number of blogs, each with the files uploaded by the user (audio, video, resume, photo, portrait)
+
+    Every blog has different audio bytes, so the transcription cache doesn't serve one blog's transcript to another.
+    """
+    names = []
+    for i in range(blogs):
+        name = f"Guest {i:03d}"
+        folder = os.path.join(directory, name)
+        os.makedirs(folder, exist_ok=True)
+
+        with open(os.path.join(folder, "audio.m4a"), "wb") as f:
+            f.write(os.urandom(audio_bytes))
+        with open(os.path.join(folder, "video.mp4"), "wb") as f:
+            f.write(os.urandom(1024))
+        with open(os.path.join(folder, "resume.pdf"), "wb") as f:
+            f.write(make_pdf([f"Guest {i:03d}", "MSc Mechanical Engineering, ETH Zurich", "Robotics Engineer, San Francisco"]))
+
+        photo = make_photo(photo_size, seed=i)
+        photo.save(os.path.join(folder, "photo.png"))
+        photo.resize((photo_size // 2, photo_size // 2)).save(os.path.join(folder, "portrait.jpeg"))
+        names.append(name)
+
+    return names
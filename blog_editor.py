@@ -1,41 +1,131 @@
 import time
 import os
+from functools import cached_property
+from threading import Lock
 from typing import List
 from file_system.file_helper import FileHelper
-from llms.llm_service import LLMService
-from helpers.transcriber import Transcriber
-from helpers.resume_extractor import ResumeExtractor
-from helpers.thumbnail_generator import ThumbnailGenerator
-from prompts.prompts import Prompts
-from helpers.notion_service import NotionService
-from helpers.podcast_generator import PodcastGenerator
+from helpers.utterance_index import UtteranceIndex
 from dotenv import load_dotenv
-from schemas.file import Blog, Thumbnails
+from tracing import tracer, traced
+from schemas.file import Blog, Thumbnails, ThumbnailEncoder
 from schemas.prompt import SimpleResponse, Prompt
 from errors import GuestNotFoundError
 
+class service(cached_property):
+    """
+    cached_property creating the service once, even when first used by concurrent background jobs
+
+    cached_property has no lock since Python 3.12, so two jobs could each build (and keep using) their own instance.
+    Once created, the service is read from the instance dict and the lock is no longer taken.
+    """
+
+    def __init__(self, func):
+        super().__init__(func)
+        self.creation_lock = Lock()
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with self.creation_lock:
+            # cached_property checks the instance dict first, so a service created while waiting is reused
+            return super().__get__(instance, owner)
+
 class BlogEditor():
     """
     Class to handle the blog editing process
     """
 
-    def __init__(self):
+    def __init__(self, directory: str = '/Users/anirudhh/Documents/Zoom_v2'):
         """
-        Initialize the BlogEditor
+        Initialize the BlogEditor on the given Zoom folder
         """
         # Load env variables
         load_dotenv()
-        config = self.get_env_vars()
-
-        # Initialize services
-        self.file_helper = FileHelper('/Users/anirudhh/Documents/Zoom_v2')
-        self.llm = LLMService(config)
-        self.prompts = Prompts(self.file_helper)
-        self.resume_extractor = ResumeExtractor(self.llm, self.prompts)
-        self.thumbnail_generator = ThumbnailGenerator()
-        self.transcriber = Transcriber(config, self.llm, self.prompts)
-        self.podcast_generator = PodcastGenerator(config, self.llm, self.prompts)
-        self.notion_service = NotionService(config)
+        self.config = self.get_env_vars()
+
+        # Initialize services (the ones calling external APIs are created on first use, see below)
+        self.file_helper = FileHelper(directory)
+        tracer.configure(os.path.join(self.file_helper.file_repository.directory, ".cache", "traces.jsonl"))
+        self.publish_targets = (self.config["PUBLISH_TARGETS"] or "notion").replace(" ", "").split(",")
+        self.thumbnail_variants = [name for name in (self.config["THUMBNAIL_VARIANTS"] or "").replace(" ", "").split(",") if name]
+
+    # Lazy services: their modules (and SDKs) are only imported when first used, so the CLI starts fast
+
+    @service
+    def prompts(self):
+        """
+        Prompts of the blog assets (from your own prompts.py, see the README)
+        """
+        from prompts.prompts import Prompts
+        return Prompts(self.file_helper)
+
+    @service
+    def llm(self):
+        """
+        LLM service routing the prompts to Anthropic, OpenAI or Ollama (the metrics of every call are saved to .cache/)
+        """
+        from llms.llm_service import LLMService
+        from llms.metrics import LLMMetrics
+        return LLMService(self.config, LLMMetrics(self.file_helper.file_repository))
+
+    @service
+    def resume_extractor(self):
+        """
+        Resume extractor (PDF parsing + LLM)
+        """
+        from helpers.resume_extractor import ResumeExtractor
+        return ResumeExtractor(self.llm, self.prompts)
+
+    @service
+    def thumbnail_generator(self):
+        """
+        Thumbnail generator
+        """
+        from helpers.thumbnail_generator import ThumbnailGenerator
+        from helpers.thumbnail_templates import ThumbnailTemplates
+        return ThumbnailGenerator(ThumbnailEncoder(preview_format=self.config["THUMBNAIL_PREVIEW_FORMAT"]), ThumbnailTemplates(extra=self.thumbnail_variants))
+
+    @service
+    def transcriber(self):
+        """
+        Transcriber (AssemblyAI or local Whisper, with the transcription cache)
+        """
+        from helpers.transcriber import Transcriber
+        from transcription.cache import TranscriptionCache
+        return Transcriber(self.config, self.llm, self.prompts, TranscriptionCache(self.file_helper.file_repository))
+
+    @service
+    def podcast_generator(self):
+        """
+        Podcast generator (ElevenLabs + moviepy)
+        """
+        from helpers.podcast_generator import PodcastGenerator
+        return PodcastGenerator(self.config, self.llm, self.prompts)
+
+    @service
+    def notion_service(self):
+        """
+        Notion service (Notion API + Firebase Storage, or the local stand-ins)
+        """
+        from helpers.notion_service import create_notion_service
+        return create_notion_service(self.config, self.file_helper.file_repository)
+
+    @service
+    def publisher(self):
+        """
+        Publisher to the notion, markdown, site and feed targets
+        """
+        from publishing.publisher import Publisher
+        from publishing.notion_exporter import NotionExporter
+        from publishing.markdown_exporter import MarkdownExporter
+        from publishing.site_exporter import SiteExporter
+        from publishing.feed_exporter import FeedExporter
+        return Publisher([
+            NotionExporter(self.notion_service, self.file_helper),
+            MarkdownExporter(self.file_helper.file_repository),
+            SiteExporter(self.file_helper.file_repository, self.config["SITE_URL"]),
+            FeedExporter(self.file_helper.file_repository, self.config["SITE_URL"]),
+        ], self.notion_service)
 
     def get_env_vars(self):
         """
@@ -50,6 +140,17 @@ class BlogEditor():
             "FIREBASE_CREDENTIALS_PATH": os.getenv("FIREBASE_CREDENTIALS_PATH"),
             "FIREBASE_STORAGE_BUCKET": os.getenv("FIREBASE_STORAGE_BUCKET"),
             "ELEVENLABS_API_KEY": os.getenv("ELEVENLABS_API_KEY"),
+            "THUMBNAIL_PREVIEW_FORMAT": os.getenv("THUMBNAIL_PREVIEW_FORMAT"),
+            "THUMBNAIL_VARIANTS": os.getenv("THUMBNAIL_VARIANTS"),
+            "TRANSCRIPTION_BACKEND": os.getenv("TRANSCRIPTION_BACKEND"),
+            "TRANSCRIPTION_CHUNK_SECONDS": os.getenv("TRANSCRIPTION_CHUNK_SECONDS"),
+            "WHISPER_MODEL": os.getenv("WHISPER_MODEL"),
+            "WHISPER_THREADS": os.getenv("WHISPER_THREADS"),
+            "DIARIZATION_MODEL": os.getenv("DIARIZATION_MODEL"),
+            "HUGGINGFACE_TOKEN": os.getenv("HUGGINGFACE_TOKEN"),
+            "PUBLISH_TARGETS": os.getenv("PUBLISH_TARGETS"),
+            "SITE_URL": os.getenv("SITE_URL"),
+            "NOTION_BACKEND": os.getenv("NOTION_BACKEND"),
         }
 
     # List & get files
@@ -66,9 +167,17 @@ class BlogEditor():
         """
         return self.file_helper.get(file_name)
 
+    def get_partial_utterances(self, file_name: str):
+        """
+        Get the utterances committed so far by an ongoing (or interrupted) transcription
+        """
+        utterances, _ = self.file_helper.get_partial_utterances(file_name)
+        return utterances
+
 
     # Extract metadata from the existing documents
 
+    @traced("blog.extract_resume", blog="file_name")
     def extract_resume(self, file_name: str, callback=None) -> None:
         """
         Extract the resume from the given file name
@@ -85,9 +194,13 @@ class BlogEditor():
             blog.metadata.resume = self.resume_extractor.extract(blog)
             self.file_helper.save(blog)
 
-    def transcribe(self, file_name: str, callback=None) -> None:
+    @traced("blog.transcribe", blog="file_name")
+    def transcribe(self, file_name: str, transcript_stream=None, callback=None) -> None:
         """
         Transcribe the given file name
+
+        Utterances are committed to a log as they are transcribed (and streamed to transcript_stream),
+        so an interrupted transcription resumes where it left off.
         """
         blog = self.file_helper.get(file_name)
 
@@ -96,10 +209,24 @@ class BlogEditor():
             return
 
         if not blog.metadata.utterances:
+            committed, offset = self.file_helper.get_partial_utterances(file_name)
             if callback:
-                callback("Utterances not found, generating for " + file_name)
-            blog.metadata.utterances = self.transcriber.transcribe(blog.files.audio_file)
+                if committed:
+                    callback(f"Resuming transcription of {file_name} from {offset // 1000}s")
+                else:
+                    callback("Utterances not found, generating for " + file_name)
+
+            def on_commit(utterances, offset):
+                self.file_helper.append_utterances(file_name, utterances, offset)
+                if transcript_stream:
+                    transcript_stream("".join(f"Speaker {utterance.speaker}: {utterance.text}\n" for utterance in utterances.utterances))
+
+            blog.metadata.utterances = self.transcriber.transcribe(blog.files.audio_file, committed=committed, offset=offset, on_commit=on_commit)
             self.file_helper.save(blog)
+            self.file_helper.clear_partial_utterances(file_name)
+
+            # Index the utterances for timestamp and keyword lookups
+            self.file_helper.save_utterance_index(file_name, UtteranceIndex.build(blog.metadata.utterances).to_dict())
 
         if not blog.metadata.transcript:
             if callback:
@@ -107,7 +234,30 @@ class BlogEditor():
             blog.metadata.transcript = self.transcriber.generate_transcript(blog.metadata.utterances)
             self.file_helper.save(blog)
 
+    def get_llm_stats(self, by: str = "model") -> List[dict]:
+        """
+        Get the latency, throughput, token and cache stats of the LLM calls, per model alias (or per attr, or provider)
+        """
+        return self.llm.metrics.summary(by)
+
+    def get_utterance_index(self, file_name: str) -> UtteranceIndex:
+        """
+        Get the utterance index of the given file name (built and saved on first use, or when the utterances changed)
+        """
+        index = self.file_helper.get_utterance_index(file_name)
+        if index:
+            return UtteranceIndex.from_dict(index)
+
+        blog = self.file_helper.get(file_name)
+        if not blog.metadata.utterances:
+            return None
+
+        index = UtteranceIndex.build(blog.metadata.utterances)
+        self.file_helper.save_utterance_index(file_name, index.to_dict())
+        return index
+
     # Enrich guest
+    @traced("blog.enrich_guest", blog="file_name")
     def enrich_guest(self, file_name: str, callback=None):
         """
         Enrich the guest data with first_name, origin, top companies & universities
@@ -119,9 +269,12 @@ class BlogEditor():
             self.file_helper.save(blog)
     
     # Generate thumbnails
-    def generate_thumbnails(self, file_name, callback=None):
+    @traced("blog.generate_thumbnails", blog="file_name")
+    def generate_thumbnails(self, file_name, force=False, callback=None, variants=None):
         """
-        Generate the thumbnails for the given file name
+        Generate the thumbnails for the given file name (skipped if the render inputs are unchanged, unless forced)
+
+        Landscape and square (plus the THUMBNAIL_VARIANTS) are rendered, variants renders extra templates (e.g. youtube) along them.
         """
         blog = self.file_helper.get(file_name)
 
@@ -132,14 +285,34 @@ class BlogEditor():
             print(f"Resume not found for {file_name}, upload & generate it!")
             return
 
-        # Always generate thumbnails
+        # Skip the render if none of its inputs changed since the last one
+        if not force and not variants and blog.thumbnails.landscape and blog.thumbnails.square:
+            if blog.thumbnails.fingerprint == self.thumbnail_generator.fingerprint(blog):
+                if callback:
+                    callback(f"Thumbnails up to date for {file_name}, skipping.")
+                return
+
         if callback:
             callback(f"Generating thumbnails for {file_name}")
-        blog.thumbnails = self.thumbnail_generator.generate_thumbnails(blog)
+        templates = self.thumbnail_generator.templates
+        blog.thumbnails = self.thumbnail_generator.generate_thumbnails(blog, templates.defaults + [name for name in variants or [] if name not in templates.defaults])
         self.file_helper.save(blog)
 
+    @traced("blog.generate_all_thumbnails")
+    def generate_all_thumbnails(self, force=False, callback=None) -> dict:
+        """
+        Regenerate the thumbnails of every blog (e.g. after a rebranding of the assets or fonts)
+        """
+        from helpers.batch_thumbnails import BatchThumbnailRenderer
+
+        if callback:
+            callback("Generating thumbnails for all blogs")
+        renderer = BatchThumbnailRenderer(self.file_helper, self.thumbnail_generator.encoder, variants=self.thumbnail_variants)
+        return renderer.render(force=force, callback=callback)
+
     # Generate blog assets (title, description, linkedin, blog)
 
+    @traced("blog.generate", blog="file_name", attr="attr", model="model")
     def generate(self, file_name: str, attr: str, model="opus", llm_stream=None, callback=None):
         """
         Handle the generation of an attribute for a blog
@@ -161,6 +334,7 @@ class BlogEditor():
             llm_stream(message)
             callback(message)
 
+    @traced("blog.edit", blog="file_name", attr="attr", model="model")
     def edit(self, file_name: str, attr: str, instructions: str,model="opus", llm_stream=None, callback=None):
         """
         Edit the given attribute for the given file name
@@ -212,56 +386,28 @@ class BlogEditor():
 
         if llm_stream:
             print(f"Streaming {attr} for {file.name}")
-            response = self.llm.stream_prompt(prompt.text, model=prompt.model, llm_stream=llm_stream)
+            response = self.llm.stream_prompt(prompt.text, model=prompt.model, llm_stream=llm_stream, attr=attr)
             setattr(file.blog, attr, response)
             self.file_helper.save(file)
         else:
             if attr in ["title", "description", "linkedin"]:
-                response = self.llm.prompt(prompt.text, model=prompt.model, schema=SimpleResponse)
+                response = self.llm.prompt(prompt.text, model=prompt.model, schema=SimpleResponse, attr=attr)
             else:
-                response = self.llm.prompt(prompt.text, model=prompt.model)
+                response = self.llm.prompt(prompt.text, model=prompt.model, attr=attr)
             setattr(file.blog, attr, response)
             self.file_helper.save(file)
 
     # Publish the blog
-    # TODO: Move these into a dedicated helper class
-    def publish_markdown_draft(self, file_name, callback=None):
+    @traced("blog.publish", blog="file_name")
+    def publish(self, file_name, targets=None, callback=None):
         """
-        Publish the blog as a markdown draft
-        """
-        file = self.file_helper.get(file_name)
-
-        if not file.blog:
-            file.blog = Blog()
-
-        if callback:
-            callback(f"Publishing markdown draft for {file_name}")
-
-        # TODO: Old code, this must be fixed
-        with open(f"/temp/{file_name}.md", "w") as f:
-            blog_content = f"""
-            # Title: {file.blog.title}
-            Description: {file.blog.description}
-            ---
-            # Overview
-            {file.metadata.resume}
-            ---
-            # Blog
-            {file.blog.content}
-            ---
-            # LinkedIn
-            {file.blog.linkedin}
-            """
-            f.write(blog_content)
-
-    def publish_notion_draft(self, file_name, callback=None):
-        """
-        Publish the blog to notion
+        Publish the blog to the given targets (notion, markdown, site, feed), by default the ones in PUBLISH_TARGETS
         """
         file = self.file_helper.get(file_name)
+        targets = targets or self.publish_targets
 
         if callback:
-            callback(f"Publishing {file_name} to notion")
+            callback(f"Publishing {file_name} to {', '.join(targets)}")
 
         if not file.files.photo:
             print(f"Photo not found for {file_name}, upload it!")
@@ -295,10 +441,20 @@ class BlogEditor():
             print(f"LinkedIn not found for {file_name}, generate it!")
             return
 
-        self.notion_service.create_page(file)
+        # The targets are published concurrently
+        return self.publisher.publish(file, targets, callback=callback)
 
-        if callback:
-            callback(f"Published {file_name} to notion")
+    def publish_markdown_draft(self, file_name, callback=None):
+        """
+        Publish the blog as a markdown draft (markdown + HTML bundle in the blog folder)
+        """
+        return self.publish(file_name, ["markdown"], callback=callback)
+
+    def publish_notion_draft(self, file_name, callback=None):
+        """
+        Publish the blog to notion
+        """
+        return self.publish(file_name, ["notion"], callback=callback)
 
     def reset(self, file_name, callback=None):
         """
@@ -309,6 +465,7 @@ class BlogEditor():
             callback(f"Resetting {file_name}. NOT YET IMPLEMENTED")
         self.file_helper.reset(file_name)
 
+    @traced("blog.generate_all", blog="file_name")
     def generate_all(self, file_name, model="opus", llm_stream=None, callback=None):
         """
         Generate all the attributes for the given file name
@@ -317,7 +474,7 @@ class BlogEditor():
             callback(f"Generating all for {file_name}")
 
         self.extract_resume(file_name, callback=callback)
-        self.transcribe(file_name, callback=callback)
+        self.transcribe(file_name, transcript_stream=llm_stream, callback=callback)
 
         # Enrich the guest
         self.enrich_guest(file_name, callback=callback)
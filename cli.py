@@ -1,9 +1,13 @@
 import argparse
 import cmd
 from blog_editor import BlogEditor
+from cli_screen import Screen
 import curses
 import time
-from errors import GuestNotFoundError
+from errors import GuestNotFoundError, JobConflictError
+from jobs import JobRunner, progress_header
+from tracing import tracer, format_summary
+from llms.metrics import format_stats
 import itertools
 import sys
 import os
@@ -14,148 +18,98 @@ def main(stdscr):
     """
     CLI for the blog editor to easily generate blogs
     """
-    # Clear screen and hide cursor
+    # Hide cursor
     curses.curs_set(0)
-    stdscr.clear()
-    
-    # Get terminal dimensions
-    height, width = stdscr.getmaxyx()
+
     current_file = None
     current_file_name = "No file set!"
     
     # Initialize input variables
     input_buffer = ""
-    input_y = height - 2  # Position at bottom of screen
-    
-    # Add preview scroll position
-    preview_scroll = 0
-    visible_preview_lines = height - 4
     
     welcome_text = "Welcome to Blog Generator CLI!"
-    commands = ["list", "get", "set_model", "generate_all", "quit"]
+    commands = ["list", "get", "set_model", "generate_all", "batch thumbnails", "find", "search", "jobs", "job <id>", "trace [run]", "stats [model|attr|provider]", "quit"]
 
-    content_text = "Here are the available commands: \n - " + "\n - ".join(commands) + "\n \nTo start, use 'get <file>'\n"
-    preview_lines = ["Preview screen"]
+    screen = Screen(stdscr, welcome_text)
+    screen.set_file_name(current_file_name)
+    screen.set_content("Here are the available commands: \n - " + "\n - ".join(commands) + "\n \nTo start, use 'get <file>'\n")
+    screen.set_preview("Preview screen")
 
     # Initialize blog editor
     blog_editor = BlogEditor()
 
-    def refresh_screen():
-        nonlocal stdscr, height, width, welcome_text, current_file_name, content_text, preview_lines, visible_preview_lines, input_buffer, preview_scroll, input_y
-        stdscr.clear()
+    # Long commands run as background jobs, the preview follows the last started one
+    jobs = JobRunner()
+    followed_job = None
+    status_message = ""
+
+    def refresh_content():
+        # Redraw content with up-to-date info (only re-wrapped if the file changed)
+        if current_file_name != "No file set!":
+            screen.set_content(f"{blog_editor.get(current_file_name).__str__()}")
+
+    def start_job(name, fn, key=None, on_done=None):
+        # fn(llm_stream, callback) runs in a worker thread, it must not touch the screen
+        nonlocal followed_job
         try:
-            # Redraw header
-            stdscr.addstr(0, 0, welcome_text[:width-1])
-            header_text = "Currently editing file: "
-            stdscr.addstr(1, 0, header_text)
-            stdscr.addstr(1, len(header_text), current_file_name[:width-len(header_text)-1], curses.A_REVERSE)
-            
-            # Redraw content with up-to-date info
-            if current_file_name != "No file set!":
-                current_file = blog_editor.get(current_file_name)
-                content_text = f"{current_file.__str__()}"
-
-            content_y_pos = 3
-            for paragraph in content_text.split('\n'):
-                # Skip empty paragraphs but still add the spacing
-                if not paragraph.strip():
-                    content_y_pos += 1
-                    continue
-
-                was_wrapped = False
-                line = paragraph
-                while line and content_y_pos < height - 2:
-                    if len(line) > width - 1:
-                        wrap_point = line[:width-1].rfind(' ')
-                        if wrap_point == -1:  # No space found, force wrap at width
-                            wrap_point = width - 1
-                        
-                        stdscr.addstr(content_y_pos, 0, line[:wrap_point])
-                        line = line[wrap_point:].lstrip()
-                        was_wrapped = True
-                    else:
-                        stdscr.addstr(content_y_pos, 0, line)
-                        line = ''
-                    content_y_pos += 1
-                
-                # Add extra line break after wrapped paragraphs
-                if was_wrapped and content_y_pos < height - 2:
-                    content_y_pos += 1
-            
-            # Divider
-            if content_y_pos < height - 2:
-                stdscr.addstr(content_y_pos, 0, "-" * (width - 1))
-                content_y_pos += 1
-
-            # Redraw preview with text wrapping and paragraph spacing
-            preview_y_pos = content_y_pos + 1
-            preview_text = preview_lines[0].split('\n')
-            
-            wrapped_preview_lines = []
-            for paragraph in preview_text:
-                if not paragraph.strip():
-                    wrapped_preview_lines.append('')
-                    continue
-
-                line = paragraph
-                paragraph_lines = []
-                while line:
-                    if len(line) > width - 1:
-                        wrap_point = line[:width-1].rfind(' ')
-                        if wrap_point == -1:
-                            wrap_point = width - 1
-                        paragraph_lines.append(line[:wrap_point])
-                        line = line[wrap_point:].lstrip()
-                    else:
-                        paragraph_lines.append(line)
-                        line = ''
-                
-                # Add the paragraph lines
-                wrapped_preview_lines.extend(paragraph_lines)
-                # Add extra line break if the paragraph was wrapped
-                if len(paragraph_lines) > 1:
-                    wrapped_preview_lines.append('')
-
-            for i in range(visible_preview_lines):
-                line_idx = i + preview_scroll
-                if line_idx < len(wrapped_preview_lines):
-                    if preview_y_pos + i < height - 2:
-                        stdscr.addstr(preview_y_pos + i, 0, wrapped_preview_lines[line_idx])
-            
-            # Redraw input line
-            stdscr.addstr(input_y, 0, "> " + input_buffer[:width-3])  # Leave room for "> "
-        except curses.error:
-            pass
-        stdscr.refresh()
-
-    def llm_stream(text):
-        nonlocal preview_lines
-        preview_lines[0] += text
-        refresh_screen()
-
-    def cli_callback(text):
-        nonlocal preview_lines
-        preview_lines[0] = f"Generating...\nCurrent status: {text}\n\n"
-        refresh_screen()# Generate content
+            followed_job = jobs.submit(name, fn, key=key, on_done=on_done)
+            screen.set_preview(f"Started {followed_job}")
+        except JobConflictError as e:
+            screen.set_preview(str(e))
+
+    def handle_job_event(kind, job, payload):
+        # Job events are applied from the UI thread
+        if job is followed_job:
+            if kind == "progress":
+                # The output restarts with the header, the output events that follow append to it
+                # (job.output already holds them, as the events are applied to the jobs before they're handled here)
+                screen.set_preview(progress_header(payload))
+            elif kind == "output":
+                screen.append_preview(payload)
+            elif kind == "failed":
+                screen.append_preview(f"\n\n{job.name} failed: {payload}")
+
+        if kind == "done" and job.on_done:
+            message = job.on_done(payload)
+            if message and job is followed_job:
+                screen.set_preview(message)
+
+        if kind in ("progress", "done") and job.key == current_file_name:
+            refresh_content()
+
+    # Wake up regularly to drain the job events, even without keypresses
+    stdscr.timeout(100)
 
     while True:
-        refresh_screen()
+        for kind, job, payload in jobs.poll():
+            handle_job_event(kind, job, payload)
+
+        screen.set_status(" | ".join(str(job) for job in jobs.running()) or status_message)
+        screen.set_input(input_buffer)
+        screen.render()
         
         # Get user input
         key = stdscr.getch()
         # if key == ord('q'):
         #     break
-        if key == curses.KEY_UP:
-            if preview_scroll > 0:
-                preview_scroll -= 1
+        if key == -1:
+            continue  # No keypress before the timeout
+        elif key == curses.KEY_RESIZE:
+            screen.resize()
+        elif key == curses.KEY_UP:
+            screen.scroll_preview(-1)
         elif key == curses.KEY_DOWN:
-            if preview_scroll < len(preview_lines[0].split('\n')) - visible_preview_lines:
-                preview_scroll += 1
+            screen.scroll_preview(1)
+        elif key == curses.KEY_PPAGE:
+            screen.page_preview(-1)
+        elif key == curses.KEY_NPAGE:
+            screen.page_preview(1)
         elif key == curses.KEY_BACKSPACE or key == 127:
             input_buffer = input_buffer[:-1]
         elif key == ord('\n'):
             # Parse and handle commands
             cmd_parts = input_buffer.strip().split()
+            status_message = ""
             if not cmd_parts:
                 pass  # Empty line
             else:
@@ -166,7 +120,7 @@ def main(stdscr):
                 # List files
                 if cmd == 'list':
                     files = blog_editor.list_files()
-                    content_text = "Files: \n - " + "\n - ".join(files)
+                    screen.set_content("Files: \n - " + "\n - ".join(files))
 
                 # Choose the working file
                 elif cmd == 'get':
@@ -174,57 +128,136 @@ def main(stdscr):
                         try:
                             file_name = " ".join(cmd_parts[1:])
                             current_file_name = file_name
+                            screen.set_file_name(current_file_name)
                             current_file = blog_editor.get(file_name)
-                            content_text = f"{current_file.__str__()}"
+                            screen.set_content(f"{current_file.__str__()}")
 
-                            preview_lines[0] = f"File {file_name} loaded!"
+                            screen.set_preview(f"File {file_name} loaded!")
                         except GuestNotFoundError:
-                            content_text = f"File '{file_name}' not found! \n \n Here are the list of available files: \n - " + "\n - ".join(blog_editor.list_files())
+                            screen.set_content(f"File '{file_name}' not found! \n \n Here are the list of available files: \n - " + "\n - ".join(blog_editor.list_files()))
                 
                 # Help
                 elif cmd == 'help':
-                    content_text = "Here are the available commands: \n - " + "\n - ".join(commands)
+                    screen.set_content("Here are the available commands: \n - " + "\n - ".join(commands))
 
-                # Quit
+                # Quit (running jobs finish before the process exits, queued ones are cancelled)
                 elif cmd in ('quit', 'exit'):
+                    jobs.shutdown()
                     break
 
+                # Search the preview (repeat 'search' for the next match)
+                elif cmd == 'search':
+                    query = " ".join(cmd_parts[1:]) or None
+                    if not screen.search_preview(query):
+                        status_message = f"'{query or screen.query or ''}' not found in the preview"
+
+                # Background jobs
+                elif cmd == 'jobs':
+                    screen.set_preview("Jobs: \n - " + "\n - ".join(str(job) for job in jobs.jobs.values()) if jobs.jobs else "No jobs yet!")
+
+                elif cmd == 'job':
+                    if param is None or not param.isdigit() or int(param) not in jobs.jobs:
+                        screen.set_preview("Unknown job! Use 'jobs' to list them and 'job <id>' to follow one")
+                    else:
+                        followed_job = jobs.jobs[int(param)]
+                        screen.set_preview("".join(followed_job.output) or str(followed_job))
+
+                # Where the time went in this run (or a previous one, 'trace runs' lists them)
+                elif cmd == 'trace':
+                    if param == 'runs':
+                        screen.set_preview("Runs: \n - " + "\n - ".join(tracer.runs()))
+                    else:
+                        run = param or tracer.run
+                        screen.set_preview(f"Trace of run {run}:\n\n{format_summary(tracer.load(run))}")
+
+                # Latency, throughput, tokens and cache hits of the LLM calls
+                elif cmd == 'stats':
+                    by = param or 'model'
+                    if by not in ['model', 'attr', 'provider']:
+                        screen.set_preview(f"Unknown stats grouping '{by}', use 'stats model', 'stats attr' or 'stats provider'")
+                    else:
+                        screen.set_preview(f"LLM calls per {by}:\n\n{format_stats(blog_editor.get_llm_stats(by), by)}")
+
+                elif cmd == 'batch':
+                    if param in ['thumbnail', 'thumbnails']:
+                        start_job(
+                            "batch thumbnails",
+                            lambda llm_stream, callback, force=extra == ['force']: blog_editor.generate_all_thumbnails(force=force, callback=callback),
+                            on_done=lambda stats: f"Rendered {stats['images']} thumbnails for {stats['blogs']} blogs in {stats['seconds']:.1f}s ({stats['images_per_sec']:.1f} images/sec), {stats['skipped']} blogs unchanged"
+                                + "".join(f"\n - {name} failed: {error}" for name, error in stats["failed"].items())
+                        )
+                    else:
+                        screen.set_preview(f"Unknown batch command '{param}', use 'batch thumbnails'")
+
+                # Publish to the given targets (e.g. 'publish notion site'), or the default ones
                 elif cmd == 'publish':
-                    preview_lines[0] = f"Publishing {current_file_name} to notion"
-                    blog_editor.publish_notion_draft(current_file_name)
+                    start_job(
+                        f"publish {current_file_name}",
+                        lambda llm_stream, callback, name=current_file_name, targets=cmd_parts[1:]: blog_editor.publish(name, targets or None, callback=callback),
+                        key=current_file_name,
+                        on_done=lambda results, name=current_file_name: f"Published {name}:\n" + "\n".join(f" - {target}: {location}" for target, location in results.items()) if results else f"{name} is not ready to publish yet"
+                    )
                 
+                # Find where a phrase was said in the recording
+                elif cmd == 'find' and current_file is not None:
+                    if param is None:
+                        screen.set_preview("Phrase is required for this command! Use 'find <phrase>'")
+                    else:
+                        phrase = " ".join(cmd_parts[1:])
+                        index = blog_editor.get_utterance_index(current_file_name)
+                        if index is None:
+                            screen.set_preview(f"'utterances' is not present in {current_file_name}")
+                        else:
+                            times = index.find_times(phrase)
+                            screen.set_preview(f"'{phrase}' found {len(times)} times:\n" + "\n".join(f" - {start // 60000:02d}:{start // 1000 % 60:02d} ({start}ms - {end}ms)" for start, end in times))
+
                 elif cmd in ['generate', 'edit', 'reset'] and current_file is None:
-                    content_text = "Set a file first using 'get <file>!'"
+                    screen.set_content("Set a file first using 'get <file>!'")
 
                 elif cmd in ['generate', 'view', 'edit', 'overwrite', 'reset'] and current_file is not None:
                     # Assert param is not None
                     if param is None:
-                        preview_lines[0] = f"Parameter is required for this command! Use '{cmd} <param>'"
+                        screen.set_preview(f"Parameter is required for this command! Use '{cmd} <param>'")
 
                     # Generating content for the first time
                     if cmd == 'generate':
-                        preview_scroll = 0
 
                         if param == 'all':
                             # Generate all content
-                            blog_editor.generate_all(current_file_name, llm_stream=llm_stream, callback=cli_callback)
+                            start_job(
+                                f"generate all {current_file_name}",
+                                lambda llm_stream, callback, name=current_file_name: blog_editor.generate_all(name, llm_stream=llm_stream, callback=callback),
+                                key=current_file_name
+                            )
                         
-                        elif param in ['thumbnail', 'thumbnails']:                            
-                            # Maybe need a task scheduler here?
-                            blog_editor.generate_thumbnails(current_file_name)
+                        elif param in ['thumbnail', 'thumbnails']:
+                            start_job(
+                                f"generate thumbnails {current_file_name}",
+                                lambda llm_stream, callback, name=current_file_name, force='force' in (extra or []), variants=[variant for variant in extra or [] if variant != 'force']: blog_editor.generate_thumbnails(name, force=force, callback=callback, variants=variants),
+                                key=current_file_name,
+                                on_done=lambda _, name=current_file_name: f"Thumbnails generated for {name}"
+                            )
 
                         else:
                             if param not in Blog.__annotations__.keys():
-                                preview_lines[0] = f"Parameter '{param}' is not present in {current_file_name}"
+                                screen.set_preview(f"Parameter '{param}' is not present in {current_file_name}")
                             else:
-                                blog_editor.generate(current_file_name, param, llm_stream=llm_stream, callback=cli_callback)
+                                start_job(
+                                    f"generate {param} {current_file_name}",
+                                    lambda llm_stream, callback, name=current_file_name, attr=param: blog_editor.generate(name, attr, llm_stream=llm_stream, callback=callback),
+                                    key=current_file_name
+                                )
 
                     # Editing content
                     elif cmd == 'edit':
                         if param not in Blog.__annotations__.keys():
-                            preview_lines[0] = f"Parameter '{param}' is not present in {current_file_name}"
+                            screen.set_preview(f"Parameter '{param}' is not present in {current_file_name}")
                         else:
-                            blog_editor.edit(current_file_name, param, extra, llm_stream=llm_stream, callback=cli_callback)
+                            start_job(
+                                f"edit {param} {current_file_name}",
+                                lambda llm_stream, callback, name=current_file_name, attr=param, instructions=extra: blog_editor.edit(name, attr, instructions, llm_stream=llm_stream, callback=callback),
+                                key=current_file_name
+                            )
 
                     elif cmd == 'view':
                         # Get the latest version of the file
@@ -232,27 +265,30 @@ def main(stdscr):
                         
                         # Metadata params
                         if param in Metadata.__annotations__.keys():
-                            preview_scroll = 0
                             param_value = getattr(current_file.metadata, param, f"Attribute '{param}' not found")
+
+                            # Show the partial transcript while it's still being transcribed
+                            if param == 'utterances' and not param_value:
+                                param_value = blog_editor.get_partial_utterances(current_file_name)
+
                             if param_value:
-                                preview_lines[0] = param_value.__str__()
+                                screen.set_preview(param_value.__str__())
                             else:
-                                preview_lines[0] = f"'{param}' is not present in {current_file_name}"
+                                screen.set_preview(f"'{param}' is not present in {current_file_name}")
 
                         elif param in Blog.__annotations__.keys():
-                            preview_scroll = 0
                             param_value = getattr(current_file.blog, param, f"Attribute '{param}' not found")
                             if param_value:
-                                preview_lines[0] = param_value
+                                screen.set_preview(param_value)
                             else:
-                                preview_lines[0] = f"'{param}' is not present in {current_file_name}"
+                                screen.set_preview(f"'{param}' is not present in {current_file_name}")
 
                     elif cmd == 'overwrite':
                         # E.g. overwrite title <extra> will set title = <extra>
-                        preview_lines[0] = f"Not yet implemented: \ncmd: {cmd}, param: {param}, extra: {extra}"
+                        screen.set_preview(f"Not yet implemented: \ncmd: {cmd}, param: {param}, extra: {extra}")
 
                     elif cmd == 'reset':
-                        preview_lines[0] = f"Not yet implemented: \ncmd: {cmd}, param: {param}, extra: {extra}"
+                        screen.set_preview(f"Not yet implemented: \ncmd: {cmd}, param: {param}, extra: {extra}")
                         
                         if param == 'all':
                             # blog_editor.reset_all(current_file)
@@ -261,6 +297,9 @@ def main(stdscr):
                             # blog_editor.reset("param")
                             pass
 
+                # Commands can change the file, the content is reloaded once per command instead of on every keypress
+                refresh_content()
+
             input_buffer = ""
         elif 32 <= key <= 126:
             try:
@@ -0,0 +1,435 @@
+import curses
+from typing import Dict, List, Tuple
+
+class Layout:
+    """
+    Line breaks of a text for one terminal width, wrapped up to a position in its chunks
+    """
+
+    def __init__(self, width: int):
+        """
+        Initialize the Layout
+        """
+        self.width = width
+        self.lines: List[str] = ['']
+        self.first = 0   # First line of the last paragraph
+        self.start = 0   # Last line of the last paragraph, re-wrapped when text is appended
+        self.tail = ""   # Raw text the last line was wrapped from
+        self.chunk = 0   # Position of the next text to wrap (chunk index, offset in the chunk)
+        self.offset = 0
+
+    def append(self, text: str) -> None:
+        """
+        Wrap the text following the wrapped text
+        """
+        # Reopen the last line (and drop the spacer of the last paragraph)
+        del self.lines[self.start:]
+
+        for i, part in enumerate(text.split('\n')):
+            if i > 0:
+                # New paragraph
+                self.first = self.start = len(self.lines)
+                self.tail = ""
+
+            self.tail += part
+            if self.start == self.first and not self.tail.strip():
+                lines = ['']
+            else:
+                lines, self.tail = self.wrap(self.tail)
+
+            self.lines.extend(lines)
+            self.start = len(self.lines) - 1
+
+            # Add extra line break after wrapped paragraphs
+            if self.start > self.first:
+                self.lines.append('')
+
+    def wrap(self, text: str) -> Tuple[List[str], str]:
+        """
+        Wrap a line of text on spaces, returns the lines and the raw text the last line was wrapped from
+        """
+        lines = []
+        line = text
+        while True:
+            raw = line
+            if len(line) > self.width - 1:
+                wrap_point = line[:self.width-1].rfind(' ')
+                if wrap_point == -1:  # No space found, force wrap at width
+                    wrap_point = self.width - 1
+
+                lines.append(line[:wrap_point])
+                line = line[wrap_point:].lstrip()
+                if not line:
+                    break
+            else:
+                lines.append(line)
+                break
+
+        return lines, raw
+
+class WrappedText:
+    """
+    Text wrapped to the terminal width, with an extra line break after wrapped paragraphs
+
+    The text is kept as an append-only list of chunks and only wrapped as far as it's displayed, with the line breaks
+    cached per width. Appending only re-wraps the last line: the lines before it already overflowed, so their breaks can't change.
+    """
+
+    # Number of widths whose line breaks are kept (e.g. when resizing back and forth)
+    MAX_LAYOUTS = 4
+
+    def __init__(self, width: int, text: str = ""):
+        """
+        Initialize the WrappedText
+        """
+        self.width = max(2, width)
+        self.set(text)
+
+    @property
+    def text(self) -> str:
+        """
+        Get the full text (it's kept as an append-only list of chunks, so streaming doesn't copy it)
+        """
+        return "".join(self.chunks)
+
+    @property
+    def lines(self) -> List[str]:
+        """
+        Get the lines wrapped so far
+        """
+        return self.layout.lines
+
+    def set(self, text: str) -> None:
+        """
+        Replace the text, the line breaks are recomputed lazily
+        """
+        self.chunks: List[str] = [text] if text else []
+        self.layouts: Dict[int, Layout] = {}
+        self.rewrap(self.width)
+
+    def rewrap(self, width: int) -> None:
+        """
+        Switch to a new terminal width, reusing its line breaks if it was used before
+        """
+        self.width = max(2, width)
+        if self.width not in self.layouts:
+            if len(self.layouts) >= self.MAX_LAYOUTS:
+                del self.layouts[next(iter(self.layouts))]
+            self.layouts[self.width] = Layout(self.width)
+        self.layout = self.layouts[self.width]
+
+    def append(self, text: str) -> int:
+        """
+        Append text, returns the index of the first line that can change
+        """
+        self.chunks.append(text)
+        return self.layout.start
+
+    def ensure(self, count: int) -> None:
+        """
+        Wrap until the first count lines are final (or all the text is wrapped)
+        """
+        layout = self.layout
+        while layout.start < count and layout.chunk < len(self.chunks):
+            # Wrap up to the next paragraph break, so long texts are only wrapped as far as needed
+            chunk = self.chunks[layout.chunk]
+            end = chunk.find('\n', layout.offset)
+            end = len(chunk) if end == -1 else end + 1
+
+            layout.append(chunk[layout.offset:end])
+            layout.offset = end
+            if layout.offset == len(chunk):
+                layout.chunk += 1
+                layout.offset = 0
+
+    def get_lines(self, start: int, end: int) -> List[str]:
+        """
+        Get the wrapped lines in the given range
+        """
+        self.ensure(end)
+        return self.layout.lines[start:end]
+
+    def line_count(self) -> int:
+        """
+        Get the number of lines of the whole text (wraps all of it)
+        """
+        self.ensure(float("inf"))
+        return len(self.layout.lines)
+
+    def find(self, query: str, start: int = 0) -> int:
+        """
+        Find the first line from the given line containing the query (case-insensitive), or -1
+        """
+        query = query.lower()
+        line = start
+        while True:
+            self.ensure(line + 1)
+            if line >= len(self.layout.lines):
+                return -1
+            if query in self.layout.lines[line].lower():
+                return line
+            line += 1
+
+class Screen:
+    """
+    Curses rendering layer for the CLI, with separate windows for the header, status, content, preview and input
+
+    Only the dirty windows are redrawn (noutrefresh), then the terminal is updated once (doupdate).
+    """
+
+    def __init__(self, stdscr, title: str):
+        """
+        Initialize the Screen
+        """
+        self.stdscr = stdscr
+        self.title = title
+        self.file_name = ""
+        self.status = ""
+        self.input = ""
+        self.scroll = 0
+        self.query = None
+        self.highlight = None
+
+        height, width = stdscr.getmaxyx()
+        self.content = WrappedText(width)
+        self.preview = WrappedText(width)
+
+        # Dirty windows, the preview is only redrawn from its first changed line
+        self.dirty = set()
+        self.preview_from = 0
+        self.resize()
+
+    # Layout
+    def resize(self) -> None:
+        """
+        Create the windows for the current terminal size
+        """
+        self.height, self.width = self.stdscr.getmaxyx()
+        self.content.rewrap(self.width)
+        self.preview.rewrap(self.width)
+
+        self.header_window = self._window(2, 0)
+        self.status_window = self._window(1, 2)
+        self.input_window = self._window(1, self.height - 2)
+        self.layout()
+
+    def layout(self) -> None:
+        """
+        Place the content and preview windows, the content takes the lines it needs and the preview gets the rest
+        """
+        self.content_height = max(0, min(self.content.line_count(), self.height - 6))
+        self.content_window = self._window(self.content_height + 1, 3)
+
+        preview_y = 3 + self.content_height + 2
+        self.preview_height = max(0, self.height - 2 - preview_y)
+        self.preview_window = self._window(self.preview_height, preview_y)
+        self.scroll = self.clamp_scroll(self.scroll)
+
+        # The gaps between the windows are cleared once, then everything is redrawn
+        self.stdscr.erase()
+        self.stdscr.noutrefresh()
+        self.dirty.update(["header", "status", "content", "input"])
+        self.invalidate_preview(0)
+
+    def _window(self, height: int, y: int):
+        """
+        Create a full-width window, or None if it doesn't fit the terminal
+        """
+        if height <= 0 or y + height > self.height:
+            return None
+        return curses.newwin(height, self.width, y, 0)
+
+    # State
+    def set_file_name(self, file_name: str) -> None:
+        """
+        Set the file shown in the header
+        """
+        if file_name != self.file_name:
+            self.file_name = file_name
+            self.dirty.add("header")
+
+    def set_status(self, text: str) -> None:
+        """
+        Set the status line (e.g. the background jobs)
+        """
+        if text != self.status:
+            self.status = text
+            self.dirty.add("status")
+
+    def set_input(self, text: str) -> None:
+        """
+        Set the input line
+        """
+        if text != self.input:
+            self.input = text
+            self.dirty.add("input")
+
+    def set_content(self, text: str) -> None:
+        """
+        Set the content text (unchanged text isn't re-wrapped)
+        """
+        if text == self.content.text:
+            return
+
+        lines = self.content.line_count()
+        self.content.set(text)
+        self.dirty.add("content")
+
+        if min(self.content.line_count(), self.height - 6) != min(lines, self.height - 6):
+            self.layout()
+
+    def set_preview(self, text: str) -> None:
+        """
+        Replace the preview text and scroll back to the top
+        """
+        self.preview.set(text)
+        self.scroll = 0
+        self.highlight = None
+        self.invalidate_preview(0)
+
+    def append_preview(self, text: str) -> None:
+        """
+        Append streamed text to the preview, only the lines that changed are redrawn
+        """
+        changed = self.preview.append(text)
+
+        # Text streamed below the visible lines doesn't need a redraw
+        if changed < self.scroll + self.preview_height:
+            self.invalidate_preview(changed)
+
+    def invalidate_preview(self, line: int) -> None:
+        """
+        Mark the preview dirty from the given line onwards
+        """
+        self.preview_from = min(self.preview_from, line) if "preview" in self.dirty else line
+        self.dirty.add("preview")
+
+    def clamp_scroll(self, scroll: int) -> int:
+        """
+        Clamp a preview scroll position, the preview is only wrapped as far as the scroll position
+        """
+        self.preview.ensure(scroll + self.preview_height)
+        return max(0, min(scroll, len(self.preview.lines) - self.preview_height))
+
+    def scroll_preview(self, lines: int) -> None:
+        """
+        Scroll the preview by the given number of lines
+        """
+        scroll = self.clamp_scroll(self.scroll + lines)
+        if scroll != self.scroll:
+            self.scroll = scroll
+            self.invalidate_preview(0)
+
+    def page_preview(self, pages: int) -> None:
+        """
+        Scroll the preview by the given number of pages (keeping one line of context)
+        """
+        self.scroll_preview(pages * max(1, self.preview_height - 1))
+
+    def search_preview(self, query: str = None) -> bool:
+        """
+        Scroll to the next preview line containing the query (the last query if none is given), returns whether it was found
+        """
+        if query is None:
+            query = self.query
+        if not query:
+            return False
+
+        # Continue after the last match of the same query, wrapping around to the top
+        start = self.highlight + 1 if query == self.query and self.highlight is not None else self.scroll
+        line = self.preview.find(query, start)
+        if line == -1 and start > 0:
+            line = self.preview.find(query, 0)
+
+        self.query = query
+        self.highlight = line if line != -1 else None
+        self.scroll = self.clamp_scroll(line if line != -1 else self.scroll)
+        self.invalidate_preview(0)
+        return line != -1
+
+    # Rendering
+    def render(self) -> None:
+        """
+        Redraw the dirty windows and update the terminal once
+        """
+        if "header" in self.dirty:
+            self._draw_header()
+        if "status" in self.dirty:
+            self._draw_status()
+        if "content" in self.dirty:
+            self._draw_content()
+        if "preview" in self.dirty:
+            self._draw_preview(self.preview_from)
+        if "input" in self.dirty:
+            self._draw_input()
+
+        self.dirty.clear()
+        curses.doupdate()
+
+    def _draw_header(self) -> None:
+        window = self.header_window
+        if window is None:
+            return
+
+        window.erase()
+        header_text = "Currently editing file: "
+        self._addstr(window, 0, 0, self.title[:self.width-1])
+        self._addstr(window, 1, 0, header_text)
+        self._addstr(window, 1, len(header_text), self.file_name[:self.width-len(header_text)-1], curses.A_REVERSE)
+        window.noutrefresh()
+
+    def _draw_status(self) -> None:
+        window = self.status_window
+        if window is None:
+            return
+
+        window.erase()
+        self._addstr(window, 0, 0, self.status[:self.width-1], curses.A_DIM)
+        window.noutrefresh()
+
+    def _draw_content(self) -> None:
+        window = self.content_window
+        if window is None:
+            return
+
+        window.erase()
+        for y, line in enumerate(self.content.lines[:self.content_height]):
+            self._addstr(window, y, 0, line)
+
+        # Divider
+        self._addstr(window, self.content_height, 0, "-" * (self.width - 1))
+        window.noutrefresh()
+
+    def _draw_preview(self, first_line: int) -> None:
+        """
+        Redraw the visible preview lines from the given line onwards
+        """
+        window = self.preview_window
+        if window is None:
+            return
+
+        y = max(0, first_line - self.scroll)
+        window.move(y, 0)
+        window.clrtobot()
+        for line in self.preview.get_lines(self.scroll + y, self.scroll + self.preview_height):
+            self._addstr(window, y, 0, line, curses.A_REVERSE if self.scroll + y == self.highlight else 0)
+            y += 1
+        window.noutrefresh()
+
+    def _draw_input(self) -> None:
+        window = self.input_window
+        if window is None:
+            return
+
+        window.erase()
+        self._addstr(window, 0, 0, "> " + self.input[:self.width-3])  # Leave room for "> "
+        window.noutrefresh()
+
+    def _addstr(self, window, y: int, x: int, text: str, attr: int = 0) -> None:
+        """
+        Write text to a window, ignoring writes past its edges
+        """
+        try:
+            window.addstr(y, x, text, attr)
+        except curses.error:
+            pass
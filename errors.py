@@ -4,3 +4,17 @@ class GuestNotFoundError(Exception):
     Exception raised when the guest/blog_name is not found in the Zoom folder
     """
     pass
+
+
+class JobConflictError(Exception):
+    """
+    Exception raised when a background job is started for a blog that already has a job running
+    """
+    pass
+
+
+class PublishError(Exception):
+    """
+    Exception raised when a blog could not be published to some of its targets
+    """
+    pass
@@ -1,5 +1,5 @@
 from math import exp
-from time import sleep
+from time import sleep, time
 from typing import List
 from collections import defaultdict
 from schemas.file import File
@@ -34,10 +34,11 @@ class Evals:
         Evaluate a provided model + prompt configuration for a given attribute against the dataset
         """
         # Run all evals
+        start = time()
         evals = []
         for i in range(iterations):
             for file in self.dataset:
-                candidate = self.llm_service.prompt(model=model, prompt=self.prompts.get_prompt(file, attr).text)
+                candidate = self.llm_service.prompt(model=model, prompt=self.prompts.get_prompt(file, attr).text, attr=attr)
                 reference = self._get_attribute(file, attr)
                 evals.append(self.eval_all(candidate, reference, file))
 
@@ -56,8 +57,21 @@ class Evals:
         for key, value in results.items():
             results[key] /= (iterations * len(self.dataset))
 
+        # Latency and throughput of the model during the eval
+        for row in self.llm_service.metrics.summary("model", self.llm_service.metrics.since(start)):
+            for key in ["latency_p50", "latency_p95", "tokens_per_sec"]:
+                results[key] = row[key]
+
         return results
 
+    def performance_report(self, models: List[str] = None) -> List[dict]:
+        """
+        Report the p50/p95 latency, TTFT and throughput of every model alias of models.yaml (or the given ones) that was called
+        """
+        models = models or list(self.llm_service.models)
+        rows = {row["model"]: row for row in self.llm_service.metrics.summary("model")}
+        return [rows[model] for model in models if model in rows]
+
     def eval_all(self, candidate: str, reference: str, file: File=None):
         """
         Evaluate a generated text agaisnt the entire dataset
@@ -53,10 +53,62 @@ class FileHelper:
         Save the blog to the Zoom directory
         """
         # Save each section using its specific handler, only if the section has changed
+        old_blog = self.get(blog.name)
         for section, handler in self.handlers.items():
-            if handler.has_changed(blog, self.get(blog.name)):
+            if getattr(blog, section) != getattr(old_blog, section):
                 handler.save(blog.name, getattr(blog, section))
 
+    # Streamed transcription
+    def get_partial_utterances(self, blog_name: str):
+        """
+        Get the utterances committed so far by a streamed transcription, and the offset (ms) they cover
+        """
+        return self.handlers['metadata'].get_partial_utterances(blog_name)
+
+    def append_utterances(self, blog_name: str, utterances, offset: int) -> None:
+        """
+        Commit streamed utterances up to the given offset (ms)
+        """
+        self.handlers['metadata'].append_utterances(blog_name, utterances, offset)
+
+    def clear_partial_utterances(self, blog_name: str) -> None:
+        """
+        Remove the streamed transcription log
+        """
+        self.handlers['metadata'].clear_partial_utterances(blog_name)
+
+    # Utterance index
+    def get_utterance_index(self, blog_name: str):
+        """
+        Get the saved utterance index of the blog (as a dict), if any
+        """
+        return self.handlers['metadata'].get_utterance_index(blog_name)
+
+    def save_utterance_index(self, blog_name: str, index: dict) -> None:
+        """
+        Save the utterance index of the blog
+        """
+        self.handlers['metadata'].save_utterance_index(blog_name, index)
+
+    # Publish state
+    def get_thumbnail_variant(self, blog_name: str, name: str) -> bytes:
+        """
+        Get the image of an extra thumbnail variant (e.g. youtube), the variants aren't loaded with the blog
+        """
+        return self.handlers['thumbnails'].get_variant(blog_name, name)
+
+    def get_publish_state(self, blog_name: str, target: str):
+        """
+        Get what was last published to the given target, if anything
+        """
+        return self.handlers['blog'].get_publish_state(blog_name, target)
+
+    def save_publish_state(self, blog_name: str, target: str, state: dict) -> None:
+        """
+        Save what was published to the given target
+        """
+        self.handlers['blog'].save_publish_state(blog_name, target, state)
+
     def reset(self, blog_name: str):
         """
         Reset the blog by deleting all its files
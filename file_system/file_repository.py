@@ -2,6 +2,7 @@ import os
 import json
 
 from schemas.file import Blog
+from tracing import tracer, traced
 
 class FileRepository:
     """
@@ -39,16 +40,20 @@ class FileRepository:
             return f"{self.directory}/{file_path}/{files[0]}"
 
     # Handle JSON files
+    @traced("file.read", path="file_path")
     def get_json(self, file_path: str):
         """
         Get the JSON data from the given file path
         """
         try:
             with open(f"{self.directory}/{file_path}", "r") as f:
-                return json.load(f)
+                data = json.load(f)
+                tracer.annotate(bytes_read=f.tell())
+                return data
         except FileNotFoundError:
             return None
 
+    @traced("file.write", path="file_path")
     def save_json(self, file_path: str, data: dict):
         """
         Save the JSON data to the given file path
@@ -56,18 +61,65 @@ class FileRepository:
         self._ensure_directory_exists(file_path)
         with open(f"{self.directory}/{file_path}", "w") as f:
             json.dump(data, f)
+            tracer.annotate(bytes_written=f.tell())
+
+    # Handle JSONL (append-only log) files
+    @traced("file.read", path="file_path")
+    def get_jsonl(self, file_path: str):
+        """
+        Get the records of the JSONL file at the given file path (a truncated last record is ignored)
+        """
+        records = []
+        try:
+            with open(f"{self.directory}/{file_path}", "r") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Interrupted while writing the last record
+                        break
+                tracer.annotate(bytes_read=os.fstat(f.fileno()).st_size)
+        except FileNotFoundError:
+            return None
+        return records
+
+    @traced("file.write", path="file_path")
+    def append_jsonl(self, file_path: str, record: dict):
+        """
+        Append a record to the JSONL file at the given file path, flushed to disk before returning
+        """
+        self._ensure_directory_exists(file_path)
+        with open(f"{self.directory}/{file_path}", "a") as f:
+            line = json.dumps(record) + "\n"
+            f.write(line)
+            f.flush()
+            tracer.annotate(bytes_written=len(line))
+            os.fsync(f.fileno())
+
+    def delete(self, file_path: str):
+        """
+        Delete the file at the given file path (if it exists)
+        """
+        try:
+            os.remove(f"{self.directory}/{file_path}")
+        except FileNotFoundError:
+            pass
 
     # Handle image files
+    @traced("file.read", path="file_path")
     def get_image(self, file_path: str):
         """
         Returns the bytes of the image
         """
         try:
             with open(f"{self.directory}/{file_path}", "rb") as f:
-                return f.read()
+                data = f.read()
+                tracer.annotate(bytes_read=len(data))
+                return data
         except FileNotFoundError:
             return None
 
+    @traced("file.write", path="file_path")
     def save_image(self, file_path: str, data: bytes):
         """
         Save the image data to the given file path
@@ -75,18 +127,23 @@ class FileRepository:
         self._ensure_directory_exists(file_path)
         with open(f"{self.directory}/{file_path}", "wb") as f:
             f.write(data)
+        tracer.annotate(bytes_written=len(data))
 
     # Handle markdown files
+    @traced("file.read", path="file_path")
     def get_text(self, file_path: str):
         """
         Get the text from the given file path
         """
         try:
             with open(f"{self.directory}/{file_path}", "r") as f:
-                return f.read()
+                data = f.read()
+                tracer.annotate(bytes_read=f.tell())
+                return data
         except FileNotFoundError:
             return None
     
+    @traced("file.write", path="file_path")
     def save_text(self, file_path: str, data: str): 
         """
         Save the text to the given file path
@@ -94,6 +151,7 @@ class FileRepository:
         self._ensure_directory_exists(file_path)
         with open(f"{self.directory}/{file_path}", "w") as f:
             f.write(data)
+            tracer.annotate(bytes_written=f.tell())
 
     def _ensure_directory_exists(self, file_path: str):
         """
@@ -44,4 +44,17 @@ class BlogHandler(HandlerInterface):
 
                 # Rewrite the latest version in the root directory
                 # TODO: Currently just writing text (and not json))
-                self.file_repository.save_text(f"{file_name}/content/{field}.txt", content)
\ No newline at end of file
+                self.file_repository.save_text(f"{file_name}/content/{field}.txt", content)
+
+    # Publish state
+    def get_publish_state(self, file_name: str, target: str):
+        """
+        Get what was last published to the given target (e.g. the Notion page and block ids), if anything
+        """
+        return self.file_repository.get_json(f"{file_name}/published/{target}.json")
+
+    def save_publish_state(self, file_name: str, target: str, state: dict) -> None:
+        """
+        Save what was published to the given target
+        """
+        self.file_repository.save_json(f"{file_name}/published/{target}.json", state)
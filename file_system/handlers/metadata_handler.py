@@ -1,5 +1,6 @@
 from .interface import HandlerInterface
-from schemas.file import Metadata
+from helpers.fingerprint import hash_json
+from schemas.file import Metadata, Utterances
 
 class MetadataHandler(HandlerInterface):
     """
@@ -31,4 +32,50 @@ class MetadataHandler(HandlerInterface):
                 if attr == "transcript":
                     self.file_repository.save_text(f"{file_name}/metadata/transcript.txt", attr_data.text)
                     self.file_repository.save_text(f"{file_name}/metadata/transcript.md", attr_data.text)
-                    # self.file_repository.save_text(f"{file_name}/content/questions.txt", attr_data.questions)
\ No newline at end of file
+                    if attr_data.questions:
+                        self.file_repository.save_text(f"{file_name}/content/questions.txt", attr_data.questions)
+
+    # Streamed transcription log, one record per committed chunk of utterances
+    def get_partial_utterances(self, file_name: str):
+        """
+        Get the utterances committed so far by a (possibly interrupted) transcription, and the offset (ms) they cover
+        """
+        records = self.file_repository.get_jsonl(f"{file_name}/metadata/utterances.jsonl")
+        if not records:
+            return None, 0
+
+        utterances = [utterance for record in records for utterance in record["utterances"]]
+        return Utterances.model_validate({"utterances": utterances}), records[-1]["offset"]
+
+    def append_utterances(self, file_name: str, utterances: Utterances, offset: int) -> None:
+        """
+        Commit the utterances transcribed up to the given offset (ms)
+        """
+        self.file_repository.append_jsonl(f"{file_name}/metadata/utterances.jsonl", {"offset": offset, **utterances.model_dump()})
+
+    def clear_partial_utterances(self, file_name: str) -> None:
+        """
+        Remove the transcription log once the full utterances are saved
+        """
+        self.file_repository.delete(f"{file_name}/metadata/utterances.jsonl")
+
+    # Utterance index, saved next to the utterances
+    def get_utterance_index(self, file_name: str):
+        """
+        Get the saved utterance index (as a dict), if any and built from the current utterances
+        """
+        index = self.file_repository.get_json(f"{file_name}/metadata/utterances_index.json")
+        if not index:
+            return None
+
+        # The utterances changed since the index was built (e.g. re-transcribed or edited), it's stale
+        utterances = self.file_repository.get_json(f"{file_name}/metadata/utterances.json")
+        if index.get("utterances_hash") != hash_json(utterances):
+            return None
+        return index
+
+    def save_utterance_index(self, file_name: str, index: dict) -> None:
+        """
+        Save the utterance index
+        """
+        self.file_repository.save_json(f"{file_name}/metadata/utterances_index.json", index)
@@ -7,6 +7,9 @@ class ThumbnailsHandler(HandlerInterface):
     Handler class to handle the thumbnails section of the blog schema
     """
 
+    # Previews are lossy copies of the thumbnails, in whichever format the encoder was configured with
+    PREVIEW_EXTENSIONS = ["webp", "jpeg"]
+
     def get(self, file_name: str) -> Thumbnails:
         data = {}
 
@@ -15,6 +18,21 @@ class ThumbnailsHandler(HandlerInterface):
                 data[attr] = self.file_repository.get_image(f"{file_name}/thumbnails/{attr}.png")
             elif attr == "landscape" or attr == "square":
                 data[attr] = self.file_repository.get_image(f"{file_name}/content/{attr}.png")
+            elif attr == "landscape_preview" or attr == "square_preview":
+                data[attr] = None
+                for extension in self.PREVIEW_EXTENSIONS:
+                    data[attr] = self.file_repository.get_image(f"{file_name}/content/{attr}.{extension}")
+                    if data[attr]:
+                        break
+            elif attr == "variants":
+                # Extra template variants are listed by their parameters (variant_params), their images are only read with get_variant()
+                data[attr] = None
+            elif attr == "photo_hash":
+                photo_hash = self.file_repository.get_json(f"{file_name}/thumbnails/photo_hash.json")
+                data[attr] = photo_hash.get("photo_hash") if photo_hash else None
+            elif attr == "fingerprint":
+                fingerprint = self.file_repository.get_json(f"{file_name}/thumbnails/fingerprint.json")
+                data[attr] = fingerprint.get("fingerprint") if fingerprint else None
             else:
                 data[attr] = self.file_repository.get_json(f"{file_name}/thumbnails/{attr}.json")
 
@@ -24,14 +42,58 @@ class ThumbnailsHandler(HandlerInterface):
         # Only save changes
         old_data = self.get(file_name)
         if self.attr_has_changed("photo_no_bg", data, old_data):    
-            # Save parameters and no_bg to generated folder
+            # Save no_bg to generated folder
             self.file_repository.save_image(f"{file_name}/thumbnails/photo_no_bg.png", data.photo_no_bg)
-            self.file_repository.save_json(f"{file_name}/thumbnails/landscape_params.json", data.landscape_params.model_dump())
-            self.file_repository.save_json(f"{file_name}/thumbnails/square_params.json", data.square_params.model_dump())
+
+        # Save the parameters of the rendered variants (a render of only some variants leaves the others unset)
+        for attr in ["landscape_params", "square_params"]:
+            params = getattr(data, attr)
+            if params and self.attr_has_changed(attr, data, old_data):
+                self.file_repository.save_json(f"{file_name}/thumbnails/{attr}.json", params.model_dump())
         
         # Save final images to main directory
         if self.attr_has_changed("landscape", data, old_data):
             self.file_repository.save_image(f"{file_name}/content/landscape.png", data.landscape)
         
         if self.attr_has_changed("square", data, old_data):
-            self.file_repository.save_image(f"{file_name}/content/square.png", data.square)
\ No newline at end of file
+            self.file_repository.save_image(f"{file_name}/content/square.png", data.square)
+
+        # Save the rendered extra template variants
+        for name, image in (data.variants or {}).items():
+            if image != self.get_variant(file_name, name):
+                self.file_repository.save_image(f"{file_name}/content/{name}.png", image)
+
+        if self.attr_has_changed("variant_params", data, old_data):
+            self.file_repository.save_json(f"{file_name}/thumbnails/variant_params.json", {name: params.model_dump() for name, params in data.variant_params.items()})
+
+        # Save the hash of the photo the background was removed from
+        if data.photo_hash and self.attr_has_changed("photo_hash", data, old_data):
+            self.file_repository.save_json(f"{file_name}/thumbnails/photo_hash.json", {"photo_hash": data.photo_hash})
+
+        # Save the render fingerprint next to the thumbnails
+        if data.fingerprint and self.attr_has_changed("fingerprint", data, old_data):
+            self.file_repository.save_json(f"{file_name}/thumbnails/fingerprint.json", {"fingerprint": data.fingerprint})
+
+        # Save the previews (if the encoder produced any)
+        for attr in ["landscape_preview", "square_preview"]:
+            preview = getattr(data, attr)
+            if preview and self.attr_has_changed(attr, data, old_data):
+                extension = self._preview_extension(preview)
+                self.file_repository.save_image(f"{file_name}/content/{attr}.{extension}", preview)
+
+                # Remove the preview in the previous format, get() would otherwise keep returning it
+                for old_extension in self.PREVIEW_EXTENSIONS:
+                    if old_extension != extension:
+                        self.file_repository.delete(f"{file_name}/content/{attr}.{old_extension}")
+
+    def get_variant(self, file_name: str, name: str) -> bytes:
+        """
+        Get the image of an extra template variant (e.g. youtube), if rendered
+        """
+        return self.file_repository.get_image(f"{file_name}/content/{name}.png")
+
+    def _preview_extension(self, data: bytes) -> str:
+        """
+        Get the file extension of the preview from its magic bytes
+        """
+        return "webp" if data[8:12] == b"WEBP" else "jpeg"
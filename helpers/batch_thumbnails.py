@@ -0,0 +1,111 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List
+from file_system.file_helper import FileHelper
+from helpers.thumbnail_generator import ThumbnailGenerator
+from helpers.thumbnail_templates import ThumbnailTemplates
+from schemas.file import File, ThumbnailEncoder
+
+# Each worker process keeps a warm generator (fonts, templates and assets loaded once)
+_generator: ThumbnailGenerator = None
+
+def _init_worker(encoder: ThumbnailEncoder, variants: List[str] = None):
+    """
+    Initialize a worker process with a preloaded thumbnail generator (rendering the extra variants along the default ones)
+    """
+    global _generator
+    _generator = ThumbnailGenerator(encoder, ThumbnailTemplates(extra=variants))
+    _generator.preload()
+
+def _render(file: File):
+    """
+    Render all the thumbnails of a blog in a worker process
+    """
+    return file.name, _generator.generate_thumbnails(file)
+
+class BatchThumbnailRenderer:
+    """
+    Class to regenerate the thumbnails of many blogs at once, fanned out over a process pool (the compositing is CPU-bound)
+    """
+
+    def __init__(self, file_helper: FileHelper, encoder: ThumbnailEncoder = None, max_workers: int = None, variants: List[str] = None):
+        """
+        Initialize the BatchThumbnailRenderer (variants are the extra templates rendered along landscape and square)
+        """
+        self.file_helper = file_helper
+        self.encoder = encoder or ThumbnailEncoder()
+        self.max_workers = max_workers
+        self.variants = variants
+
+    def render(self, blog_names: List[str] = None, force: bool = False, callback=None) -> dict:
+        """
+        Render the thumbnails of the given blogs (all blogs by default) and save them as they complete
+
+        Blogs whose render inputs are unchanged are skipped, unless forced. Blogs that fail to render are
+        reported in the summary with their error, the others are still saved.
+        """
+        generator = ThumbnailGenerator(self.encoder, ThumbnailTemplates(extra=self.variants))
+        files = []
+        skipped = 0
+        for blog_name in blog_names or self.file_helper.list_files():
+            file = self.file_helper.get(blog_name)
+            if not file.files.photo or not file.metadata.guest:
+                print(f"Photo or guest not found for {blog_name}, skipping!")
+                continue
+            if not force and file.thumbnails.landscape and file.thumbnails.fingerprint == generator.fingerprint(file):
+                skipped += 1
+                continue
+            files.append(self._strip_images(file))
+
+        start = time.perf_counter()
+        images = 0
+        failed = {}
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker, initargs=(self.encoder, self.variants)) as executor:
+            futures = {executor.submit(_render, file): file.name for file in files}
+
+            # Save each blog as soon as its worker is done, a failed blog doesn't stop the others
+            for done, future in enumerate(as_completed(futures), start=1):
+                blog_name = futures[future]
+                try:
+                    _, thumbnails = future.result()
+                except Exception as e:
+                    failed[blog_name] = str(e) or type(e).__name__
+                    if callback:
+                        callback(f"Failed to render thumbnails for {blog_name} ({done}/{len(files)}): {failed[blog_name]}")
+                    continue
+
+                file = self.file_helper.get(blog_name)
+                file.thumbnails = thumbnails
+                self.file_helper.save(file)
+
+                images += 2 + len(thumbnails.variants or {})
+                images_per_sec = images / (time.perf_counter() - start)
+                if callback:
+                    callback(f"Rendered thumbnails for {blog_name} ({done}/{len(files)}, {images_per_sec:.1f} images/sec)")
+
+        elapsed = time.perf_counter() - start
+        return {
+            "blogs": len(files) - len(failed),
+            "skipped": skipped,
+            "failed": failed,
+            "images": images,
+            "seconds": elapsed,
+            "images_per_sec": images / elapsed if elapsed else 0.0,
+        }
+
+    def _strip_images(self, file: File) -> File:
+        """
+        Drop the previously rendered images before sending the blog to a worker (they're re-rendered anyway)
+        """
+        if not file.thumbnails:
+            return file
+
+        thumbnails = file.thumbnails.model_copy(update={
+            "landscape": None,
+            "landscape_preview": None,
+            "square": None,
+            "square_preview": None,
+            "variants": None,
+        })
+        return file.model_copy(update={"thumbnails": thumbnails})
@@ -0,0 +1,35 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+CHUNK_SIZE = 1024 * 1024
+
+def hash_bytes(data: bytes) -> str:
+    """
+    Get the SHA-256 hash of the given bytes
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def hash_json(data) -> str:
+    """
+    Get the SHA-256 hash of JSON-serialisable data (independent of key order)
+    """
+    return hash_bytes(json.dumps(data, sort_keys=True).encode())
+
+def hash_file(path: str) -> str:
+    """
+    Get the SHA-256 hash of a file, streamed in chunks so large files aren't loaded into memory
+
+    Hashes are cached per process, and invalidated when the file's size or modification time changes.
+    """
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=1024)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,250 @@
+import re
+from typing import Iterable, Iterator, List, Optional
+from pydantic import BaseModel
+
+# Notion limits: 2000 characters (UTF-16 code units) per rich text item, 100 rich text items per block, 100 blocks per request
+MAX_TEXT = 2000
+MAX_RICH_TEXT = 100
+MAX_BLOCKS = 100
+
+# Code languages Notion accepts (the others are shown as plain text)
+NOTION_LANGUAGES = {
+    "bash", "c", "c++", "c#", "css", "diff", "docker", "go", "html", "java", "javascript", "json", "kotlin",
+    "markdown", "php", "plain text", "python", "ruby", "rust", "shell", "sql", "swift", "typescript", "yaml",
+}
+
+# Common fence aliases, mapped to Notion's language names
+LANGUAGE_ALIASES = {
+    "py": "python", "js": "javascript", "ts": "typescript", "sh": "shell", "zsh": "shell", "console": "shell",
+    "yml": "yaml", "md": "markdown", "rb": "ruby", "rs": "rust", "cpp": "c++", "cs": "c#", "csharp": "c#",
+    "dockerfile": "docker", "golang": "go", "kt": "kotlin", "text": "plain text", "txt": "plain text",
+}
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+BULLET = re.compile(r"^\s*[-*+]\s+(.*)$")
+NUMBERED = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+QUOTE = re.compile(r"^\s*>\s?(.*)$")
+FENCE = re.compile(r"^\s*```\s*([\w+#-]*)")
+DIVIDER = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+# Inline code, links, then the emphasis markers (underscores only outside of words, e.g. not in snake_case)
+INLINE = re.compile(r"`([^`]+)`|\[([^\]]+)\]\(([^)\s]+)\)|(\*\*|__|~~|\*|(?<!\w)_|_(?!\w))")
+STYLES = {"**": "bold", "__": "bold", "*": "italic", "_": "italic", "~~": "strikethrough"}
+
+class Span(BaseModel):
+    """
+    Schema for a run of text with the same formatting
+    """
+    text: str
+    bold: bool = False
+    italic: bool = False
+    strikethrough: bool = False
+    code: bool = False
+    link: Optional[str] = None
+
+class MarkdownBlock(BaseModel):
+    """
+    Schema for a block of a markdown document (types are named after the Notion block types)
+    """
+    type: str
+    spans: List[Span] = []
+    language: Optional[str] = None
+
+# Markdown -> AST
+def parse_markdown(markdown: str) -> Iterator[MarkdownBlock]:
+    """
+    Parse markdown into blocks in a single pass over its lines
+    """
+    paragraph: List[str] = []
+    quote: List[str] = []
+    code: List[str] = None
+    language = None
+
+    def flush():
+        # Consecutive lines of a paragraph or quote are joined into one block
+        for lines, block_type in ((paragraph, "paragraph"), (quote, "quote")):
+            if lines:
+                yield MarkdownBlock(type=block_type, spans=parse_inline(" ".join(lines)))
+                lines.clear()
+
+    for line in (markdown or "").splitlines():
+        # Code blocks are kept verbatim until the closing fence
+        if code is not None:
+            if FENCE.match(line):
+                yield MarkdownBlock(type="code", spans=[Span(text="\n".join(code))], language=language)
+                code = None
+            else:
+                code.append(line)
+            continue
+
+        fence = FENCE.match(line)
+        if fence:
+            yield from flush()
+            code, language = [], fence.group(1).lower() or None
+            continue
+
+        if not line.strip():
+            yield from flush()
+            continue
+
+        quoted = QUOTE.match(line)
+        if quoted:
+            if paragraph:
+                yield from flush()
+            quote.append(quoted.group(1).strip())
+            continue
+
+        if DIVIDER.match(line):
+            yield from flush()
+            yield MarkdownBlock(type="divider")
+            continue
+
+        heading = HEADING.match(line)
+        bullet = BULLET.match(line)
+        numbered = NUMBERED.match(line)
+        if heading:
+            yield from flush()
+            # Notion only has 3 heading levels
+            level = min(len(heading.group(1)), 3)
+            yield MarkdownBlock(type=f"heading_{level}", spans=parse_inline(heading.group(2).strip()))
+        elif bullet:
+            yield from flush()
+            yield MarkdownBlock(type="bulleted_list_item", spans=parse_inline(bullet.group(1).strip()))
+        elif numbered:
+            yield from flush()
+            yield MarkdownBlock(type="numbered_list_item", spans=parse_inline(numbered.group(1).strip()))
+        else:
+            if quote:
+                yield from flush()
+            paragraph.append(line.strip())
+
+    # Unclosed code blocks run until the end of the document
+    if code is not None:
+        yield MarkdownBlock(type="code", spans=[Span(text="\n".join(code))], language=language)
+    yield from flush()
+
+def parse_inline(text: str) -> List[Span]:
+    """
+    Parse the inline formatting (bold, italics, strikethrough, code and links) of a line into spans
+    """
+    tokens = list(INLINE.finditer(text))
+
+    # Emphasis markers are paired first, markers without a closing marker are kept as text (e.g. "5 * 3").
+    # A marker opens if it's followed by text, and closes if it's preceded by text.
+    opened = {}
+    paired = set()
+    for i, token in enumerate(tokens):
+        marker = token.group(4)
+        if marker:
+            style = STYLES[marker]
+            if style in opened and token.start() > 0 and not text[token.start() - 1].isspace():
+                paired.update((opened.pop(style), i))
+            elif token.end() < len(text) and not text[token.end()].isspace():
+                opened[style] = i
+
+    spans: List[Span] = []
+    styles = set()
+    position = 0
+
+    def add(text: str, **kwargs):
+        if not text:
+            return
+        span = Span(text=text, **{style: True for style in styles}, **kwargs)
+
+        # Merge with the previous span if the formatting is the same
+        if spans and spans[-1].model_dump(exclude={"text"}) == span.model_dump(exclude={"text"}):
+            spans[-1].text += text
+        else:
+            spans.append(span)
+
+    for i, token in enumerate(tokens):
+        add(text[position:token.start()])
+        position = token.end()
+
+        if token.group(1):
+            add(token.group(1), code=True)
+        elif token.group(2):
+            add(token.group(2), link=token.group(3))
+        elif i in paired:
+            styles.symmetric_difference_update([STYLES[token.group(4)]])
+        else:
+            add(token.group(4))
+
+    add(text[position:])
+    return spans
+
+# AST -> Notion blocks
+def split_text(text: str, limit: int = MAX_TEXT) -> Iterator[str]:
+    """
+    Split text into chunks of at most limit UTF-16 code units (what Notion counts), on word boundaries when possible
+
+    Python strings are indexed by code point, so a surrogate pair is never split.
+    """
+    start = 0
+    while start < len(text):
+        # Walk forward to the limit, counting astral characters as 2 code units
+        end = start
+        units = 0
+        while end < len(text):
+            size = 2 if ord(text[end]) > 0xFFFF else 1
+            if units + size > limit:
+                break
+            units += size
+            end += 1
+
+        if end < len(text):
+            # Break after the last whitespace in the chunk, if any
+            space = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+            if space > start:
+                end = space + 1
+
+        yield text[start:end]
+        start = end
+
+def rich_text(spans: Iterable[Span]) -> Iterator[dict]:
+    """
+    Convert spans to Notion rich text items (long spans are split into several items)
+    """
+    for span in spans:
+        annotations = {style: True for style in ("bold", "italic", "strikethrough", "code") if getattr(span, style)}
+        for text in split_text(span.text):
+            item = {"type": "text", "text": {"content": text, "link": {"url": span.link} if span.link else None}}
+            if annotations:
+                item["annotations"] = annotations
+            yield item
+
+def to_notion_blocks(block: MarkdownBlock) -> Iterator[dict]:
+    """
+    Convert a markdown block to Notion blocks (more than one if it has more than 100 rich text items)
+    """
+    if block.type == "divider":
+        yield {"object": "block", "type": "divider", "divider": {}}
+        return
+
+    items = list(rich_text(block.spans))
+    for i in range(0, max(len(items), 1), MAX_RICH_TEXT):
+        content = {"rich_text": items[i:i + MAX_RICH_TEXT]}
+        if block.type == "code":
+            language = LANGUAGE_ALIASES.get(block.language, block.language)
+            content["language"] = language if language in NOTION_LANGUAGES else "plain text"
+        yield {"object": "block", "type": block.type, block.type: content}
+
+def markdown_to_notion_blocks(markdown: str) -> Iterator[dict]:
+    """
+    Convert markdown to Notion blocks, lazily (each block is converted as it's parsed)
+    """
+    for block in parse_markdown(markdown):
+        yield from to_notion_blocks(block)
+
+def batches(items: Iterable, size: int = MAX_BLOCKS) -> Iterator[list]:
+    """
+    Group items into batches of the given size (e.g. Notion's 100 blocks per request)
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
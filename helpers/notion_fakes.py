@@ -0,0 +1,231 @@
+import os
+import shutil
+import time
+from collections import Counter, deque
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List
+from uuid import uuid4
+
+# Notion limits, enforced by the fake API so the batching and splitting are exercised
+MAX_BLOCKS = 100
+MAX_TEXT = 2000
+
+class NotionAPIError(Exception):
+    """
+    Error of the fake Notion API, shaped like notion_client's APIResponseError (status, code and headers)
+    """
+
+    def __init__(self, status: int, code: str, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.headers = {"retry-after": f"{retry_after:.3f}"} if retry_after else {}
+
+class LocalBlob:
+    """
+    Blob of the LocalBlobStore (same interface as the Firebase Storage blobs used by NotionService)
+    """
+
+    def __init__(self, store: "LocalBlobStore", name: str):
+        """
+        Initialize the LocalBlob
+        """
+        self.store = store
+        self.name = name
+        self.path = os.path.join(store.directory, name)
+
+    def upload_from_filename(self, filename: str, predefined_acl: str = None) -> None:
+        time.sleep(self.store.latency)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        shutil.copyfile(filename, self.path)
+        with self.store.lock:
+            self.store.uploads += 1
+
+    @property
+    def public_url(self) -> str:
+        return Path(self.path).resolve().as_uri()
+
+class LocalBlobStore:
+    """
+    Filesystem-backed stand-in for the Firebase Storage bucket, with a configurable latency per upload (seconds)
+    """
+
+    def __init__(self, directory: str, latency: float = 0.0):
+        """
+        Initialize the LocalBlobStore
+        """
+        self.directory = directory
+        self.latency = latency
+        self.uploads = 0
+        self.lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def blob(self, name: str) -> LocalBlob:
+        return LocalBlob(self, name)
+
+class FakeNotionClient:
+    """
+    In-memory stand-in for the Notion API client (the pages and blocks endpoints used by NotionService)
+
+    Every request waits the configured latency (seconds). Beyond rate_limit requests per second, requests fail
+    with a 429 and a Retry-After header, like the real API. The requests and rate-limited requests are counted.
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit: float = None):
+        """
+        Initialize the FakeNotionClient
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.pages = _Pages(self)
+        self.blocks = _Blocks(self)
+
+        self.objects: Dict[str, dict] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.parents: Dict[str, str] = {}
+
+        self.requests = Counter()
+        self.rate_limited = 0
+        self.lock = Lock()
+        self._recent = deque()
+
+    def request(self, endpoint: str) -> None:
+        """
+        Count a request, rate limit it and wait the latency
+        """
+        with self.lock:
+            self.requests[endpoint] += 1
+
+            if self.rate_limit:
+                # Sliding window of the requests of the last second
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 1:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.rate_limited += 1
+                    raise NotionAPIError(429, "rate_limited", "Rate limited", retry_after=1 - (now - self._recent[0]))
+                self._recent.append(now)
+
+        time.sleep(self.latency)
+
+    def get(self, object_id: str) -> dict:
+        """
+        Get a page or block, raising a 404 if it doesn't exist (or was archived/deleted)
+        """
+        obj = self.objects.get(object_id)
+        if obj is None or obj.get("archived"):
+            raise NotionAPIError(404, "object_not_found", f"Could not find block with ID: {object_id}")
+        return obj
+
+    def insert(self, parent_id: str, children: List[dict], after: str = None) -> List[dict]:
+        """
+        Insert blocks under a page or block, after the given block or at the end
+        """
+        if len(children) > MAX_BLOCKS:
+            raise NotionAPIError(400, "validation_error", f"body.children.length should be ≤ {MAX_BLOCKS}, instead was {len(children)}")
+        for child in children:
+            for item in child.get(child["type"], {}).get("rich_text", []):
+                if len(item["text"]["content"].encode("utf-16-le")) // 2 > MAX_TEXT:
+                    raise NotionAPIError(400, "validation_error", f"body.children.rich_text.text.content.length should be ≤ {MAX_TEXT}")
+
+        siblings = self.children.setdefault(parent_id, [])
+        if after is None:
+            position = len(siblings)
+        elif after in siblings:
+            position = siblings.index(after) + 1
+        else:
+            raise NotionAPIError(400, "validation_error", f"Block {after} is not a child of {parent_id}")
+
+        created = []
+        for child in children:
+            block = {**child, "object": "block", "id": str(uuid4()), "archived": False}
+            self.objects[block["id"]] = block
+            self.parents[block["id"]] = parent_id
+            created.append(block)
+
+        siblings[position:position] = [block["id"] for block in created]
+        return created
+
+    def page_blocks(self, page_id: str) -> List[dict]:
+        """
+        Get the blocks of a page, in order (e.g. to check what was published)
+        """
+        return [self.objects[block_id] for block_id in self.children.get(page_id, [])]
+
+class _Pages:
+    """
+    Fake pages endpoint
+    """
+
+    def __init__(self, client: FakeNotionClient):
+        self.client = client
+
+    def create(self, parent: dict, properties: dict, children: List[dict] = None, **kwargs) -> dict:
+        self.client.request("pages.create")
+        with self.client.lock:
+            page = {"object": "page", "id": str(uuid4()), "parent": parent, "properties": properties, "archived": False}
+            self.client.objects[page["id"]] = page
+            self.client.insert(page["id"], children or [])
+            return page
+
+    def update(self, page_id: str, **kwargs) -> dict:
+        self.client.request("pages.update")
+        with self.client.lock:
+            page = self.client.get(page_id)
+            page.update(kwargs)
+            return page
+
+class _BlockChildren:
+    """
+    Fake block children endpoint
+    """
+
+    def __init__(self, client: FakeNotionClient):
+        self.client = client
+
+    def append(self, block_id: str, children: List[dict], after: str = None, **kwargs) -> dict:
+        self.client.request("blocks.children.append")
+        with self.client.lock:
+            self.client.get(block_id)
+            return {"object": "list", "results": self.client.insert(block_id, children, after)}
+
+    def list(self, block_id: str, start_cursor: str = None, page_size: int = MAX_BLOCKS, **kwargs) -> dict:
+        self.client.request("blocks.children.list")
+        with self.client.lock:
+            self.client.get(block_id)
+            children = self.client.children.get(block_id, [])
+            start = children.index(start_cursor) if start_cursor in children else 0
+            end = start + page_size
+            return {
+                "object": "list",
+                "results": [self.client.objects[child_id] for child_id in children[start:end]],
+                "has_more": end < len(children),
+                "next_cursor": children[end] if end < len(children) else None,
+            }
+
+class _Blocks:
+    """
+    Fake blocks endpoint
+    """
+
+    def __init__(self, client: FakeNotionClient):
+        self.client = client
+        self.children = _BlockChildren(client)
+
+    def update(self, block_id: str, **kwargs) -> dict:
+        self.client.request("blocks.update")
+        with self.client.lock:
+            block = self.client.get(block_id)
+            if block["type"] not in kwargs:
+                raise NotionAPIError(400, "validation_error", f"Block type {block['type']} can't be changed")
+            block.update(kwargs)
+            return block
+
+    def delete(self, block_id: str) -> dict:
+        self.client.request("blocks.delete")
+        with self.client.lock:
+            block = self.client.get(block_id)
+            block["archived"] = True
+            self.client.children[self.client.parents[block_id]].remove(block_id)
+            return block
@@ -1,77 +1,132 @@
 from schemas.file import File
-from notion_client import Client
-import re
-import firebase_admin
-from firebase_admin import credentials, storage
-from uuid import uuid4
+from helpers.fingerprint import hash_file, hash_json
+from helpers.upload_cache import UploadCache
+from file_system.file_repository import FileRepository
+from helpers.markdown_blocks import MarkdownBlock, Span, batches, markdown_to_notion_blocks, to_notion_blocks
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from threading import Lock
 import os
-import requests
+import random
+import time
+
+# Rate-limited requests (429) are retried with exponential backoff
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 0.5
+
+# Upload manifest of the local backend (the Notion backend keeps the default .cache/uploads.json)
+LOCAL_UPLOADS = ".cache/uploads-local.json"
 
 class NotionService:
     """
     Service class to publish to Notion
     """
 
-    def __init__(self, config):
+    def __init__(self, config, upload_cache: UploadCache = None, client=None, bucket=None):
         """
         Initialize the Notion service
+
+        The Notion client and the storage bucket can be injected (e.g. the local fakes in helpers.notion_fakes),
+        otherwise Firebase is only initialized on the first upload.
         """
-        self.client = Client(auth=config["NOTION_TOKEN"])
+        self.config = config
+        if client is None:
+            # Imported here, so the local backend doesn't need the Notion SDK
+            from notion_client import Client
+            client = Client(auth=config["NOTION_TOKEN"])
+        self.client = client
         self.database = config["NOTION_DATABASE_ID"]
+        self.upload_cache = upload_cache
+        self._bucket = bucket
+        self._bucket_lock = Lock()
 
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(config["FIREBASE_CREDENTIALS_PATH"])
-            firebase_admin.initialize_app(cred, {
-                'storageBucket': config["FIREBASE_STORAGE_BUCKET"]
-            })
+    @property
+    def bucket(self):
+        """
+        Get the storage bucket, initializing Firebase if needed
+        """
+        with self._bucket_lock:
+            if self._bucket is None:
+                import firebase_admin
+                from firebase_admin import credentials, storage
+
+                if not firebase_admin._apps:
+                    cred = credentials.Certificate(self.config["FIREBASE_CREDENTIALS_PATH"])
+                    firebase_admin.initialize_app(cred, {
+                        'storageBucket': self.config["FIREBASE_STORAGE_BUCKET"]
+                    })
 
-        self.bucket = storage.bucket()
+                self._bucket = storage.bucket()
+        return self._bucket
 
     def upload_image(self, image_path):
         """
         Notion does not support uploading images directly, so we upload to Firebase Storage and return the public URL.
+        Images are addressed by their content hash, so unchanged images are only uploaded once.
         """
-        # Generate a unique filename
+        key = hash_file(image_path)
+        if self.upload_cache:
+            public_url = self.upload_cache.get(key)
+            if public_url:
+                return public_url
+
         file_extension = os.path.splitext(image_path)[1]
-        destination_blob_name = f"images/{uuid4()}{file_extension}"
+        destination_blob_name = f"images/{key}{file_extension}"
 
-        # Upload the file
+        # Upload the file, publicly accessible (in the same request)
         blob = self.bucket.blob(destination_blob_name)
-        blob.upload_from_filename(image_path)
+        blob.upload_from_filename(image_path, predefined_acl="publicRead")
 
-        # Make the blob publicly accessible
-        blob.make_public()
+        if self.upload_cache:
+            self.upload_cache.save(key, blob.public_url)
 
         # Return the public URL
         return blob.public_url
 
     #TODO: Add banner and photo to the page. Requires uploading file servce then adding
 
-    def create_page(self, blog: File):
+    def upload_images(self, blog: File) -> dict:
+        """
+        Upload the portrait and the banner (square thumbnail) concurrently, and return their public URLs
+        """
+        with ThreadPoolExecutor() as executor:
+            photo_future = executor.submit(self.upload_image, blog.files.portrait)
+            banner_future = executor.submit(self.upload_image, blog.files.portrait.rsplit('portrait.jpeg', 1)[0] + 'content/square.png')
+            return {"photo": photo_future.result(), "banner": banner_future.result()}
+
+    def publish(self, blog: File, state: dict = None, image_urls: dict = None) -> dict:
+        """
+        Publish the blog to Notion and return its publish state (page id, block ids and hashes)
+
+        The first publish creates the page, later ones only send the blocks that changed since the given state.
+        """
+        children = self.get_blocks(blog, image_urls)
+
+        if state:
+            try:
+                return self.sync_page(state, children)
+            except Exception as e:
+                # The page was deleted in Notion, or the changes can't be applied in place: start over on a new page
+                if getattr(e, "status", None) != 404 and not isinstance(e, LookupError):
+                    raise
+                self.archive_page(state["page_id"])
+
+        return self.create_page(blog, children)
+
+    def get_blocks(self, blog: File, image_urls: dict = None):
         """
-        Create a new page in Notion, in the specified database (at init)
+        Get the Notion blocks of the blog (the images are uploaded, unless their URLs are given)
         """
-        photo_url = self.upload_image(blog.files.portrait)
-        banner_url = self.upload_image(blog.files.portrait.rsplit('portrait.jpeg', 1)[0] + 'content/square.png')
+        image_urls = image_urls or self.upload_images(blog)
+        banner_url = image_urls["banner"]
 
-        # Split content by Markdown headers
-        parts = re.split(r'(^#{1,3}\s.*$)', blog.blog.content, flags=re.MULTILINE)
-        
         children = []
 
         # Add the title as a h1 heading
-        children.append({
-            "object": "block",
-            "type": "heading_1",
-            "heading_1": {"rich_text": [{"type": "text", "text": {"content": blog.blog.title}}]}
-        })
+        children.extend(to_notion_blocks(MarkdownBlock(type="heading_1", spans=[Span(text=blog.blog.title)])))
 
         # Add the description as a paragraph in grey italics
-        children.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {"rich_text": [{"type": "text", "text": {"content": blog.blog.description, "link": None}}]}
-        })
+        children.extend(to_notion_blocks(MarkdownBlock(type="paragraph", spans=[Span(text=blog.blog.description)])))
 
         # Add the banner
         children.append({
@@ -92,67 +147,122 @@ class NotionService:
         #     "image": {
         #         "type": "external",
         #         "external": {
-        #             "url": photo_url
+        #             "url": image_urls["photo"]
         #         }
         #     }
         # })
 
-        current_block = None
+        # Convert the markdown content (headings, lists, quotes, code and inline formatting)
+        children.extend(markdown_to_notion_blocks(blog.blog.content))
 
-        for part in parts:
-            part = part.strip()
-            if not part:
-                continue
-            
-            if part.startswith('# '):
-                block_type = "heading_1"
-                content = part[2:]
-            elif part.startswith('## '):
-                block_type = "heading_2"
-                content = part[3:]
-            elif part.startswith('### '):
-                block_type = "heading_3"
-                content = part[4:]
-            else:
-                block_type = "paragraph"
-                content = part
-
-            if current_block:
-                children.append(current_block)
-
-            current_block = {
-                "object": "block",
-                "type": block_type,
-                block_type: {
-                    "rich_text": []
-                }
-            }
+        return children
 
-            # Split content into chunks of 2000 characters or less
-            while content:
-                chunk = content[:2000]
-                content = content[2000:]
-                current_block[block_type]["rich_text"].append({"type": "text", "text": {"content": chunk}})
-                
-                if content:  # If there's more content, create a new block
-                    children.append(current_block)
-                    current_block = {
-                        "object": "block",
-                        "type": block_type,
-                        block_type: {
-                            "rich_text": []
-                        }
-                    }
-
-        if current_block:
-            children.append(current_block)
-
-        new_page = self.client.pages.create(
+    def create_page(self, blog: File, children: list) -> dict:
+        """
+        Create a new page in Notion, in the specified database (at init), and return its publish state
+        """
+        new_page = self.request(
+            self.client.pages.create,
             parent={"database_id": self.database},
             properties={
                 "Name": {"title": [{"text": {"content": blog.name}}]},
-            },
-            children=children
+            }
         )
 
-        return new_page
+        return {"page_id": new_page["id"], "blocks": self.append_blocks(new_page["id"], children)}
+
+    def sync_page(self, state: dict, children: list) -> dict:
+        """
+        Update a published page to the given blocks, sending only the updates, inserts and deletes of the block-level diff
+        """
+        published = state["blocks"]
+        hashes = [hash_json(block) for block in children]
+        synced = []
+
+        matcher = SequenceMatcher(a=[block["hash"] for block in published], b=hashes, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                synced.extend(published[i1:i2])
+                continue
+
+            # Changed blocks keep their id if their type is unchanged
+            updated = 0
+            if tag == "replace":
+                for block, child, child_hash in zip(published[i1:i2], children[j1:j2], hashes[j1:j2]):
+                    if block["type"] != child["type"]:
+                        break
+                    self.request(self.client.blocks.update, block_id=block["id"], **{child["type"]: child[child["type"]]})
+                    synced.append({**block, "hash": child_hash})
+                    updated += 1
+
+            for block in published[i1 + updated:i2]:
+                self.request(self.client.blocks.delete, block_id=block["id"])
+
+            if j1 + updated < j2:
+                # Blocks can only be inserted after an existing block
+                if not synced:
+                    raise LookupError("No block to insert the new blocks after")
+                synced.extend(self.append_blocks(state["page_id"], children[j1 + updated:j2], after=synced[-1]["id"]))
+
+        return {"page_id": state["page_id"], "blocks": synced}
+
+    def append_blocks(self, page_id: str, children: list, after: str = None) -> list:
+        """
+        Append blocks to a page (after the given block, or at the end) in batches, and return their publish state
+        """
+        blocks = []
+
+        # Notion accepts at most 100 blocks per request
+        for batch in batches(children):
+            kwargs = {"after": after} if after else {}
+            response = self.request(self.client.blocks.children.append, block_id=page_id, children=batch, **kwargs)
+
+            blocks.extend(
+                {"id": result["id"], "type": child["type"], "hash": hash_json(child)}
+                for result, child in zip(response["results"], batch)
+            )
+            after = blocks[-1]["id"]
+
+        return blocks
+
+    def archive_page(self, page_id: str) -> None:
+        """
+        Archive a page, if it still exists
+        """
+        try:
+            self.request(self.client.pages.update, page_id=page_id, archived=True)
+        except Exception as e:
+            print(f"Could not archive page {page_id}: {e}")
+
+    def request(self, method, **kwargs):
+        """
+        Call the Notion API, retrying rate-limited requests (429) with exponential backoff
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return method(**kwargs)
+            except Exception as e:
+                if getattr(e, "status", None) != 429 or attempt == MAX_RETRIES:
+                    raise
+
+                # Wait as long as Notion asks to, otherwise back off exponentially (with jitter)
+                retry_after = getattr(e, "headers", None) and e.headers.get("retry-after")
+                time.sleep(float(retry_after) if retry_after else BACKOFF_SECONDS * 2 ** attempt * (1 + random.random()))
+
+def create_notion_service(config, file_repository: FileRepository) -> NotionService:
+    """
+    Create the Notion service from the config (the Notion API by default, or local stand-ins to publish offline)
+
+    Each backend has its own upload manifest, so the file:// URLs of local uploads are never published to Notion.
+    """
+    backend = config.get("NOTION_BACKEND") or "notion"
+
+    if backend == "notion":
+        return NotionService(config, UploadCache(file_repository))
+    elif backend == "local":
+        # Pages are kept in memory and images are copied to the hidden .cache/ folder
+        from helpers.notion_fakes import FakeNotionClient, LocalBlobStore
+        bucket = LocalBlobStore(os.path.join(file_repository.directory, ".cache", "blobs"))
+        return NotionService(config, UploadCache(file_repository, LOCAL_UPLOADS), client=FakeNotionClient(), bucket=bucket)
+    else:
+        raise ValueError(f"Notion backend '{backend}' is not yet implemented")
@@ -3,7 +3,6 @@ from elevenlabs.client import ElevenLabs
 from llms.llm_service import LLMService
 import random
 import os
-from moviepy import AudioFileClip, ColorClip, CompositeVideoClip, TextClip
 
 class PodcastGenerator:
     """
@@ -113,7 +112,7 @@ class PodcastGenerator:
         # speaker_voice = voices.voices[0]
 
         prompt = self.prompts.podcast_intro_prompt(file)
-        intro_text = self.llm.prompt(prompt)
+        intro_text = self.llm.prompt(prompt, attr="podcast_intro")
 
         # Generate the intro audio
         audio = self.client.generate(text=intro_text, voice=speaker_voice)
@@ -131,7 +130,8 @@ class PodcastGenerator:
         with open(audio_path, "wb") as f:
             f.write(audio_bytes)
 
-        # Create video from audio using updated MoviePy syntax
+        # Create video from audio using updated MoviePy syntax (imported here, moviepy is slow to import)
+        from moviepy import AudioFileClip, ColorClip, CompositeVideoClip, TextClip
         audio_clip = AudioFileClip(audio_path)
         
         # Create a simple colored background with updated syntax
@@ -1,8 +1,6 @@
 import logging
 from schemas.file import Resume, Guest, File
 from schemas.prompt import SimpleResponse, ListResponse
-from prompts.prompts import Prompts
-import PyPDF2
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +21,7 @@ class ResumeExtractor:
         """
         Extract the resume data from the given PDF file
         """
+        import PyPDF2
         text = ""
         
         with open(file.files.resume_file, "rb") as file:
@@ -31,7 +30,7 @@ class ResumeExtractor:
                 text += page.extract_text()
 
         prompt = self.prompts.extract_resume_prompt(text)
-        return self.llm.prompt(prompt.text, model=prompt.model, schema=Resume)
+        return self.llm.prompt(prompt.text, model=prompt.model, schema=Resume, attr="resume")
 
     def enrich_guest(self, file: File):
         """
@@ -43,10 +42,10 @@ class ResumeExtractor:
         top_universities_prompt = self.prompts.top_universities_prompt(file)
         origin_prompt = self.prompts.origin_prompt(file)
 
-        first_name = self.llm.prompt(first_name_prompt.text, model=first_name_prompt.model, schema=SimpleResponse)
-        top_companies = self.llm.prompt(top_companies_prompt.text, model=top_companies_prompt.model, schema=ListResponse)
-        top_universities = self.llm.prompt(top_universities_prompt.text, model=top_universities_prompt.model, schema=ListResponse)
-        origin = self.llm.prompt(origin_prompt.text, model=origin_prompt.model, schema=SimpleResponse)
+        first_name = self.llm.prompt(first_name_prompt.text, model=first_name_prompt.model, schema=SimpleResponse, attr="first_name")
+        top_companies = self.llm.prompt(top_companies_prompt.text, model=top_companies_prompt.model, schema=ListResponse, attr="top_companies")
+        top_universities = self.llm.prompt(top_universities_prompt.text, model=top_universities_prompt.model, schema=ListResponse, attr="top_universities")
+        origin = self.llm.prompt(origin_prompt.text, model=origin_prompt.model, schema=SimpleResponse, attr="origin")
 
         return Guest(
             first_name=first_name.response,
@@ -0,0 +1,98 @@
+from threading import local
+from typing import Dict, List, Tuple
+from PIL import ImageFont
+
+# Fonts used by the thumbnail overlays, with the variation (for variable fonts) they're rendered with
+FONTS = {
+    "company": ("/Users/anirudhh/Library/Fonts/Inter-VariableFont_opsz,wght.ttf", "Bold"),
+    "university": ("/Users/anirudhh/Library/Fonts/JetBrainsMono-VariableFont_wght.ttf", "Regular"),
+    "name": ("/Users/anirudhh/Library/Fonts/LondrinaSolid-Regular.ttf", None),
+}
+
+# Line spacing used when drawing multiline text, relative to the font size
+LINE_SPACING = 0.21
+
+class TextMetrics:
+    """
+    Memoised text measurements shared by all the thumbnail overlay builders
+
+    Fonts and measurements are keyed on (font, size, variation, text), so batch renders across guests
+    with shared companies and universities reuse their measurements. FreeType faces aren't thread-safe,
+    so each thread loads its own fonts while the measurements are shared.
+    """
+
+    def __init__(self, fonts: Dict[str, Tuple[str, str]] = FONTS):
+        """
+        Initialize the TextMetrics
+        """
+        self.fonts = fonts
+        self._local = local()
+        self._bboxes = {}
+        self._sizes = {}
+
+    def _key(self, font_name: str, font_size: int):
+        """
+        Get the cache key of a font
+        """
+        path, variation = self.fonts[font_name]
+        return (path, font_size, variation)
+
+    def font(self, font_name: str, font_size: int) -> ImageFont.FreeTypeFont:
+        """
+        Get the font for the given font name and size, loaded once per thread with its variation
+        """
+        fonts = getattr(self._local, "fonts", None)
+        if fonts is None:
+            fonts = self._local.fonts = {}
+
+        key = self._key(font_name, font_size)
+        font = fonts.get(key)
+        if font is None:
+            path, variation = self.fonts[font_name]
+            font = ImageFont.truetype(path, font_size)
+            if variation:
+                font.set_variation_by_name(variation)
+            fonts[key] = font
+        return font
+
+    def bbox(self, font_name: str, font_size: int, text: str) -> Tuple[int, int, int, int]:
+        """
+        Get the bounding box of the text
+        """
+        key = self._key(font_name, font_size) + (text,)
+        bbox = self._bboxes.get(key)
+        if bbox is None:
+            bbox = self._bboxes[key] = self.font(font_name, font_size).getbbox(text)
+        return bbox
+
+    def width(self, font_name: str, font_size: int, texts: List[str]) -> int:
+        """
+        Get the width of the widest line of text
+        """
+        widths = []
+        for text in texts:
+            left, _, right, _ = self.bbox(font_name, font_size, text)
+            widths.append(right - left)
+        return max(widths)
+
+    def height(self, font_name: str, font_size: int, texts: List[str]) -> float:
+        """
+        Calculate the height of a block of text (to calculate positioning of overlays)
+        """
+        font = self.font(font_name, font_size)
+
+        key = self._key(font_name, font_size) + (texts[0],)
+        size = self._sizes.get(key)
+        if size is None:
+            size = self._sizes[key] = font.font.getsize(texts[0])
+        (width, baseline), (offset_x, offset_y) = size
+
+        ascent, descent = font.getmetrics()
+        line_height = ascent + descent - offset_y
+
+        # Total text height including line spacing
+        line_spacing = font.size * LINE_SPACING
+        return line_height * len(texts) + line_spacing * (len(texts) - 1)
+
+# Shared across all thumbnail generators of the process
+text_metrics = TextMetrics()
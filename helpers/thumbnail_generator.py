@@ -1,11 +1,20 @@
 import io
 import time
-from typing import List
-from schemas.file import File, Thumbnails, ThumbnailParams
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, List
+from schemas.file import File, Thumbnails, ThumbnailParams, ThumbnailEncoder
+from helpers.thumbnail_templates import ThumbnailTemplates, LayoutPlan
+from helpers.text_metrics import TextMetrics, text_metrics, LINE_SPACING
+from helpers.fingerprint import hash_file, hash_json
+from tracing import tracer, traced
 
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance
 from pydantic import BaseModel
-from gradio_client import Client, handle_file
+
+# Assets composited into every thumbnail
+ASSETS = ["assets/bg.png", "assets/white_gradient_mask.png", "assets/scanlines_mask.png", "assets/arrow_1.png"]
 
 # Class to generate the thumbnails
 class ThumbnailGenerator:
@@ -13,51 +22,105 @@ class ThumbnailGenerator:
     Class to generate the thumbnails
     """
 
-    def __init__(self):
+    def __init__(self, encoder: ThumbnailEncoder = None, templates: ThumbnailTemplates = None, metrics: TextMetrics = None):
         """
         Initialize the ThumbnailGenerator
         """
-        pass
-
-    def generate_thumbnails(self, file: File):
+        self.encoder = encoder or ThumbnailEncoder()
+        self.templates = templates or ThumbnailTemplates()
+        self.metrics = metrics or text_metrics
+        self._assets = {}
+        self._assets_lock = Lock()
+
+    @traced("thumbnails.generate", blog="file.name")
+    def generate_thumbnails(self, file: File, variants: List[str] = None):
         """
-        Generate the thumbnails for the given blog
+        Generate the thumbnails for the given blog, for every template variant (or only the given variants)
         """
         photo_no_bg = self.remove_bg(file)
-
-        universities_text_height = int(self.calculate_text_height(file.metadata.guest.top_universities, self.get_font("university", 74)))
-
-        if file.thumbnails and file.thumbnails.landscape_params:
-            landscape_params = file.thumbnails.landscape_params
-        else:
-            landscape_params = ThumbnailParams(
-                height=1200, width=1680, 
-                companies_font_size=145, companies_x_offset=64, companies_y_offset=53, 
-                universities_x_offset=64, universities_y_offset=1200 - universities_text_height - 60, 
-                portrait_ratio=0.9, portrait_align="right"
-            )
-        landscape = self.generate_thumbnail(file, photo_no_bg, landscape_params)
-
-        companies_text_height = int(self.calculate_text_height(file.metadata.guest.top_companies, self.get_font("company", 99)))
-        
-        if file.thumbnails and file.thumbnails.square_params:
-            square_params = file.thumbnails.square_params
-        else:
-            square_params = ThumbnailParams(
-                height=1080, width=1080,
-                companies_font_size=99, companies_x_offset=14, companies_y_offset=18,
-                universities_x_offset=14, universities_y_offset=companies_text_height + 60,
-                portrait_ratio=0.8, portrait_align="center"
-            )
-        square = self.generate_thumbnail(file, photo_no_bg, square_params)
-
-        return Thumbnails(
-            photo_no_bg=self.image_to_bytes(photo_no_bg),
-            landscape=self.image_to_bytes(landscape),
-            square=self.image_to_bytes(square),
-            landscape_params=landscape_params,
-            square_params=square_params
-        )
+        plans = self.templates.get(variants)
+        params = self.resolve_params(file, plans)
+
+        # Render + encode all variants concurrently (Pillow releases the GIL while resizing and encoding)
+        # Load the segmented photo up front so the threads don't race on Pillow's lazy loading
+        photo_no_bg.load()
+        with ThreadPoolExecutor(max_workers=len(plans)) as executor:
+            futures = {name: executor.submit(copy_context().run, self.render_variant, file, photo_no_bg, variant_params) for name, variant_params in params.items()}
+            photo_no_bg_bytes = self.image_to_bytes(photo_no_bg)
+            results = {name: future.result() for name, future in futures.items()}
+
+        # Landscape and square have dedicated fields, every other template is an extra variant
+        thumbnails = file.thumbnails.model_copy() if file.thumbnails else Thumbnails()
+        thumbnails.photo_no_bg = photo_no_bg_bytes
+        thumbnails.photo_hash = hash_file(file.files.photo)
+        thumbnails.fingerprint = self.fingerprint(file, params)
+        thumbnails.variants = dict(thumbnails.variants or {})
+        thumbnails.variant_params = dict(thumbnails.variant_params or {})
+
+        for name, (image, preview) in results.items():
+            if name in ["landscape", "square"]:
+                setattr(thumbnails, name, image)
+                setattr(thumbnails, f"{name}_params", params[name])
+                setattr(thumbnails, f"{name}_preview", preview)
+            else:
+                thumbnails.variants[name] = image
+                thumbnails.variant_params[name] = params[name]
+
+        return thumbnails
+
+    def resolve_params(self, file: File, plans: List[LayoutPlan]) -> Dict[str, ThumbnailParams]:
+        """
+        Resolve the thumbnail parameters of each layout plan for the given blog
+        """
+        # Measure each text block once, and share the measurements across all variants
+        text_heights = {}
+        for plan in plans:
+            for measurement in plan.measurements:
+                if measurement not in text_heights:
+                    font_name, font_size = measurement
+                    texts = self.templates.texts(file.metadata.guest, measurement)
+                    text_heights[measurement] = int(self.calculate_text_height(texts, font_name, font_size))
+
+        # Keep manually adjusted parameters, otherwise resolve the template
+        params = {}
+        for plan in plans:
+            params[plan.name] = self.get_saved_params(file, plan.name) or plan.resolve(text_heights)
+
+        return params
+
+    def fingerprint(self, file: File, params: Dict[str, ThumbnailParams] = None) -> str:
+        """
+        Fingerprint every input of a render (photo, guest, parameters, encoder, assets and fonts), so unchanged inputs can skip the regeneration
+        """
+        if params is None:
+            params = self.resolve_params(file, self.templates.get())
+
+        return hash_json({
+            "photo": hash_file(file.files.photo),
+            "guest": file.metadata.guest.model_dump(include={"first_name", "top_companies", "top_universities"}),
+            "params": {name: variant_params.model_dump() for name, variant_params in params.items()},
+            "encoder": self.encoder.model_dump(),
+            "assets": {path: hash_file(path) for path in ASSETS},
+            "fonts": {name: [hash_file(path), variation] for name, (path, variation) in self.metrics.fonts.items()},
+        })
+
+    def get_saved_params(self, file: File, name: str):
+        """
+        Get the previously saved (possibly manually adjusted) parameters of a variant
+        """
+        if not file.thumbnails:
+            return None
+        if name in ["landscape", "square"]:
+            return getattr(file.thumbnails, f"{name}_params")
+        return (file.thumbnails.variant_params or {}).get(name)
+
+    @traced("thumbnails.render")
+    def render_variant(self, file: File, guest_photo_no_bg: Image.Image, params: ThumbnailParams):
+        """
+        Render a thumbnail variant and encode it, returns the PNG bytes and the optional preview bytes
+        """
+        thumbnail = self.generate_thumbnail(file, guest_photo_no_bg, params)
+        return self.image_to_bytes(thumbnail), self.image_to_preview_bytes(thumbnail)
         
     def generate_thumbnail(self, file: File, guest_photo_no_bg: str, params: ThumbnailParams):
         """
@@ -77,8 +140,7 @@ class ThumbnailGenerator:
         # 4. Paste everything together and save
 
         # Companies and universities
-        thumbnail = Image.open("assets/bg.png")
-        thumbnail = thumbnail.resize((params.width, params.height), Image.LANCZOS)
+        thumbnail = self.get_asset("assets/bg.png", (params.width, params.height)).copy()
 
         thumbnail.paste(companies_mask, (params.companies_x_offset, params.companies_y_offset), companies_overlay)
         thumbnail.paste(universities_overlay, (params.universities_x_offset, params.universities_y_offset), universities_overlay)
@@ -108,9 +170,8 @@ class ThumbnailGenerator:
         Generates the companies text overlay for the thumbnail
         """
         # Load the white gradient mask (ensure it's RGBA or RGB)
-        gradient_mask = Image.open('assets/white_gradient_mask.png').convert('RGBA')
         # Resize gradient to match text overlay size
-        gradient_mask = gradient_mask.resize((params.width, params.height), Image.LANCZOS)
+        gradient_mask = self.get_asset('assets/white_gradient_mask.png', (params.width, params.height), mode='RGBA')
 
         # Create a new RGBA image for the text overlay
         text_overlay = Image.new('RGBA', (params.width, params.height), (0, 0, 0, 0))
@@ -123,7 +184,7 @@ class ThumbnailGenerator:
         text_draw = ImageDraw.Draw(text_mask)
         
         # Draw the text in white on the text_mask
-        spacing = font.size * 0.21
+        spacing = font.size * LINE_SPACING
         text_draw.text((0, 0), '\n'.join(file.metadata.guest.top_companies), font=font, fill=255, spacing=spacing)  # White text as a mask
 
         # Now, composite the gradient with the text mask
@@ -139,10 +200,10 @@ class ThumbnailGenerator:
         uni_text = '\n'.join(file.metadata.guest.top_universities)
 
         font = self.get_font("university", params.universities_font_size)
-        text_height = self.calculate_text_height(file.metadata.guest.top_universities, font)
+        text_height = self.calculate_text_height(file.metadata.guest.top_universities, "university", params.universities_font_size)
 
         # Calculate text width
-        text_width = max(font.getbbox(university)[2] - font.getbbox(university)[0] for university in file.metadata.guest.top_universities)
+        text_width = self.metrics.width("university", params.universities_font_size, file.metadata.guest.top_universities)
 
         overlay_width = int(text_width)
         overlay_height = int(text_height)
@@ -153,7 +214,7 @@ class ThumbnailGenerator:
 
         # Draw the text in hex(38, 38, 38) on the text_overlay
         draw = ImageDraw.Draw(text_overlay)
-        spacing = font.size * 0.21
+        spacing = font.size * LINE_SPACING
         draw.text((0, 0), uni_text, font=font, fill=(38, 38, 38, 255), spacing=spacing)
         
         # Create a mask for the text
@@ -186,9 +247,8 @@ class ThumbnailGenerator:
         # grayscale = brightness_enhancer.enhance(1.2)  # Slight increase in brightness
 
         # Paste the "scanlines_mask.png" onto grayscale
-        scanlines_mask = Image.open('assets/scanlines_mask.png')
         max_dimension = max(grayscale.width, grayscale.height)
-        scanlines_mask = scanlines_mask.resize((max_dimension, max_dimension), Image.LANCZOS)
+        scanlines_mask = self.get_asset('assets/scanlines_mask.png', (max_dimension, max_dimension))
         grayscale.paste(scanlines_mask, (0, 0), scanlines_mask)
 
         # Check for transparent areas
@@ -240,18 +300,18 @@ class ThumbnailGenerator:
         """
         font = self.get_font("name", params.name_font_size)
         
-        # Get the size of the text using getbbox()
-        bbox = font.getbbox(file.metadata.guest.first_name)
+        # Get the size of the text using the (cached) bounding box
+        bbox = self.metrics.bbox("name", params.name_font_size, file.metadata.guest.first_name)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         
         # Open and resize the arrow image
-        arrow = Image.open('assets/arrow_1.png')
+        arrow = self.get_asset('assets/arrow_1.png')
         arrow_width, arrow_height = arrow.size
         arrow_aspect_ratio = arrow_width / arrow_height
         new_arrow_height = 150
         new_arrow_width = int(new_arrow_height * arrow_aspect_ratio)
-        arrow = arrow.resize((new_arrow_width, new_arrow_height), Image.LANCZOS)
+        arrow = self.get_asset('assets/arrow_1.png', (new_arrow_width, new_arrow_height))
 
         # Create the frame based on the bounding box of the text and arrow
         gap = 40
@@ -277,6 +337,7 @@ class ThumbnailGenerator:
 
     # === Helper functions ===
     # Background removal    
+    @traced("thumbnails.remove_bg")
     def remove_bg(self, file: File, debug=False):
         """
         Remove the background from the given photo using a HuggingFace BG removal model.
@@ -285,10 +346,12 @@ class ThumbnailGenerator:
             return Image.open(file.files.photo).convert("RGBA")
 
         # If existing bg_removed photo, check if it matches the current photo otherwise remove background for the current photo
-        if file.thumbnails and file.thumbnails.photo_no_bg:
-            # TODO: Add support to auto-remove background if the photo has changed
+        if self.has_photo_no_bg(file):
+            tracer.annotate(cache_hits=1)
             return Image.open(io.BytesIO(file.thumbnails.photo_no_bg))
         
+        # Imported here, gradio_client is slow to import and only needed for new photos
+        from gradio_client import Client, handle_file
         client = Client("ZhengPeng7/BiRefNet_demo")
         result = client.predict(
             images=handle_file(file.files.photo),
@@ -299,45 +362,86 @@ class ThumbnailGenerator:
 
         return Image.open(result[0])
         
-    def calculate_text_height(self, texts: List[str], font: ImageFont.FreeTypeFont):
+    def has_photo_no_bg(self, file: File) -> bool:
+        """
+        Check if the blog has a background-removed photo of its current photo (older ones without a photo hash are redone)
+        """
+        if not file.thumbnails or not file.thumbnails.photo_no_bg:
+            return False
+        return file.thumbnails.photo_hash == hash_file(file.files.photo)
+
+    def calculate_text_height(self, texts: List[str], font_name: str, font_size: int):
         """
         Calculate the height of a block of text with the given font (to calculate positioning of overlays)
         """
-        # Calculate the height of the text
-        ascent, descent = font.getmetrics()
-        (width, baseline), (offset_x, offset_y) = font.font.getsize(texts[0])
-        
-        line_height = ascent + descent - offset_y
+        return self.metrics.height(font_name, font_size, texts)
 
-        # Calculate total text height including line spacing
-        line_spacing = font.size * 0.21  # You can adjust this value
-        text_height = line_height * len(texts) + line_spacing * (len(texts) - 1)
+    def get_asset(self, path: str, size: tuple = None, mode: str = None) -> Image.Image:
+        """
+        Get an asset image (converted to the mode and resized to the size), loaded once per generator
 
-        return text_height
+        The cached images are shared, so copy them before drawing onto them.
+        """
+        key = (path, size, mode)
+        asset = self._assets.get(key)
+        if asset is None:
+            with self._assets_lock:
+                asset = self._assets.get(key)
+                if asset is None:
+                    asset = Image.open(path)
+                    if mode:
+                        asset = asset.convert(mode)
+                    if size:
+                        asset = asset.resize(size, Image.LANCZOS)
+                    asset.load()
+                    self._assets[key] = asset
+        return asset
+
+    def preload(self):
+        """
+        Preload the fonts and assets of every template (e.g. to warm up batch workers)
+        """
+        for plan in self.templates.get():
+            template = plan.template
+            self.get_font("company", template.companies_font_size)
+            self.get_font("university", template.universities_font_size)
+            self.get_font("name", template.name_font_size)
+            self.get_asset("assets/bg.png", (template.width, template.height))
+            self.get_asset("assets/white_gradient_mask.png", (template.width, template.height), mode="RGBA")
+        self.get_asset("assets/arrow_1.png")
 
     def get_font(self, font_name: str, font_size: int):
         """
         Gets the font for the given font name and size with the specified style.
         """
-        fonts = {
-            "company": ImageFont.truetype("/Users/anirudhh/Library/Fonts/Inter-VariableFont_opsz,wght.ttf", font_size),
-            "university": ImageFont.truetype("/Users/anirudhh/Library/Fonts/JetBrainsMono-VariableFont_wght.ttf", font_size),
-            "name": ImageFont.truetype("/Users/anirudhh/Library/Fonts/LondrinaSolid-Regular.ttf", font_size)
-        }
-
-        selected_font = fonts[font_name]
-
-        if font_name == "company":
-            selected_font.set_variation_by_name("Bold")
-        elif font_name == "university":
-            selected_font.set_variation_by_name("Regular")
-
-        return selected_font
+        return self.metrics.font(font_name, font_size)
 
+    @traced("thumbnails.encode", format="format")
     def image_to_bytes(self, img: Image.Image, format: str = 'PNG') -> bytes:
         """
-        Convert an image to bytes
+        Convert an image to bytes, using the encoder settings for PNGs
+        """
+        img_byte_arr = io.BytesIO()
+        if format == 'PNG':
+            img.save(img_byte_arr, format=format, compress_level=self.encoder.compress_level, optimize=self.encoder.optimize)
+        else:
+            img.save(img_byte_arr, format=format)
+        tracer.annotate(bytes_written=img_byte_arr.tell())
+        return img_byte_arr.getvalue()
+
+    @traced("thumbnails.encode_preview")
+    def image_to_preview_bytes(self, img: Image.Image):
+        """
+        Convert an image to the (lossy) preview format, if one is configured
         """
+        if not self.encoder.preview_format:
+            return None
+
         img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format=format)
+        preview_format = self.encoder.preview_format.upper()
+        if preview_format == 'JPEG':
+            # JPEG has no alpha channel
+            img = img.convert('RGB')
+        img.save(img_byte_arr, format=preview_format, quality=self.encoder.preview_quality)
+        tracer.annotate(bytes_written=img_byte_arr.tell())
         return img_byte_arr.getvalue()
\ No newline at end of file
@@ -0,0 +1,89 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import yaml
+from schemas.file import Guest, ThumbnailParams, ThumbnailTemplate
+
+# Variants rendered by default (the ones published), the other templates are opt-in
+DEFAULT_VARIANTS = ["landscape", "square"]
+
+# A text measurement is identified by the font and its size, e.g. ("company", 145)
+Measurement = Tuple[str, int]
+
+class LayoutPlan:
+    """
+    A thumbnail template compiled into a layout plan
+
+    The plan knows which text blocks it needs measured, so the measurements can be shared across all variants of a run.
+    """
+
+    def __init__(self, name: str, template: ThumbnailTemplate):
+        """
+        Initialize the LayoutPlan
+        """
+        self.name = name
+        self.template = template
+
+        if template.universities_anchor == "bottom":
+            self.measurements: List[Measurement] = [("university", template.universities_font_size)]
+        elif template.universities_anchor == "below_companies":
+            self.measurements: List[Measurement] = [("company", template.companies_font_size)]
+        else:
+            raise ValueError(f"Universities anchor '{template.universities_anchor}' is not supported for template '{name}'")
+
+    def resolve(self, text_heights: Dict[Measurement, int]) -> ThumbnailParams:
+        """
+        Resolve the plan into the thumbnail parameters, given the measured text heights
+        """
+        template = self.template
+
+        if template.universities_anchor == "bottom":
+            universities_y_offset = template.height - text_heights[self.measurements[0]] - template.universities_margin
+        else:
+            universities_y_offset = text_heights[self.measurements[0]] + template.universities_margin
+
+        params = template.model_dump(exclude={"universities_anchor", "universities_margin"})
+        return ThumbnailParams(universities_y_offset=universities_y_offset, **params)
+
+@lru_cache
+def load_layout_plans(path: str) -> Dict[str, LayoutPlan]:
+    """
+    Load and compile the thumbnail templates (once per process)
+    """
+    with open(path, "r") as f:
+        templates = yaml.safe_load(f)
+
+    return {name: LayoutPlan(name, ThumbnailTemplate.model_validate(template)) for name, template in templates.items()}
+
+class ThumbnailTemplates:
+    """
+    Class to access the compiled thumbnail templates
+    """
+
+    def __init__(self, path: str = "llms/thumbnail_templates.yaml", extra: List[str] = None):
+        """
+        Initialize the ThumbnailTemplates, with the extra variants (e.g. youtube) rendered along the default ones
+        """
+        self.plans = load_layout_plans(path)
+        self.extra = [name for name in extra or [] if name not in DEFAULT_VARIANTS]
+        self.defaults = DEFAULT_VARIANTS + self.extra
+        self.get(self.defaults)
+
+    def get(self, names: List[str] = None) -> List[LayoutPlan]:
+        """
+        Get the layout plans for the given variant names (the default variants by default)
+        """
+        if names is None:
+            names = self.defaults
+
+        for name in names:
+            if name not in self.plans:
+                raise ValueError(f"Thumbnail template '{name}' not found")
+
+        return [self.plans[name] for name in names]
+
+    def texts(self, guest: Guest, measurement: Measurement) -> List[str]:
+        """
+        Get the guest text block that the measurement refers to
+        """
+        font_name, _ = measurement
+        return guest.top_companies if font_name == "company" else guest.top_universities
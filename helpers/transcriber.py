@@ -1,82 +1,148 @@
-import assemblyai as aai
+import io
 from schemas.file import Utterances, Utterance, Transcript, Word
 from schemas.prompt import SimpleResponse
+from transcription.backend import TranscriptionBackend, create_backend
+from transcription.chunked import ChunkedTranscriber
+from transcription.cache import TranscriptionCache
+
+# Chunk length of local transcriptions, unless set with TRANSCRIPTION_CHUNK_SECONDS
+DEFAULT_CHUNK_SECONDS = 600
 
 class Transcriber:
     """
     Service class to transcribe audio files
     """
 
-    def __init__(self, config, llm, prompts):
+    def __init__(self, config, llm, prompts, cache: TranscriptionCache = None):
         """
         Initialize the Transcriber
         """
-        aai.settings.api_key = config["ASSEMBLYAI_API_KEY"]
+        self.backend = self.get_backend(config)
+        self.cache = cache
+        self.chunked = self.get_chunked_transcriber(config)
         self.llm = llm
         self.prompts = prompts
 
-    def transcribe(self, audio_file_path: str):
-        """
-        Transcribe the given audio file (hardcoded to use AssemblyAI with 2 speakers for now)
-        """
-        config = aai.TranscriptionConfig(speaker_labels=True, speakers_expected=2)
-        transcriber = aai.Transcriber()
-
-        transcript = transcriber.transcribe(
-            audio_file_path,
-            config=config
-        )
-        
-        print(transcript.utterances[0])
-        # Map AssemblyAI transcript to our Transcript schema
-        utterances = [
-            Utterance(
-                confidence=utterance.confidence,
-                end=utterance.end,
-                speaker=utterance.speaker,
-                start=utterance.start,
-                text=utterance.text,
-                words=[Word(
-                    text=word.text,
-                    start=word.start,
-                    end=word.end,
-                    confidence=word.confidence,
-                    speaker=word.speaker
-                ) for word in utterance.words]
-            )
-            for utterance in transcript.utterances
-        ]
-        
-        return Utterances(utterances=utterances)
+    def get_backend(self, config) -> TranscriptionBackend:
+        """
+        Get the transcription backend from the config (AssemblyAI by default, or local Whisper)
+        """
+        return create_backend(config)
+
+    def get_chunked_transcriber(self, config):
+        """
+        Get the chunked transcriber for long recordings (disabled if TRANSCRIPTION_CHUNK_SECONDS is 0)
+
+        By default only local backends are chunked (to use every core), remote ones transcribe and diarize the whole recording.
+        """
+        chunk_seconds = config.get("TRANSCRIPTION_CHUNK_SECONDS")
+        if chunk_seconds in (None, ""):
+            chunk_seconds = DEFAULT_CHUNK_SECONDS if self.backend.runs_locally else 0
+        chunk_seconds = int(chunk_seconds)
+        if chunk_seconds <= 0:
+            return None
+        return ChunkedTranscriber(self.backend, config, chunk_seconds=chunk_seconds)
+
+    def transcribe(self, audio_file_path: str, speakers_expected: int = 2, committed: Utterances = None, offset: int = 0, on_commit=None):
+        """
+        Transcribe the given audio file (2 speakers by default, the interviewer and the guest)
+
+        Long recordings are split into chunks that are transcribed concurrently. Utterances are committed progressively
+        through on_commit(utterances, offset), and an interrupted transcription resumes from its committed utterances + offset.
+        Transcriptions are cached on the audio content, so the same recording is never transcribed twice.
+        """
+        if self.cache:
+            key = self.cache.key(audio_file_path, {"speakers_expected": speakers_expected, **self.backend.cache_config()})
+            utterances = self.cache.get(key)
+            if utterances:
+                print(f"Transcription cache hit for {audio_file_path}")
+                return utterances
+
+        utterances = None
+        if self.chunked:
+            try:
+                utterances = self.chunked.transcribe(audio_file_path, speakers_expected=speakers_expected, committed=committed, offset=offset, on_commit=on_commit)
+            except FileNotFoundError:
+                print("ffmpeg not found, transcribing the recording in one piece")
+
+        if utterances is None:
+            utterances = self.backend.transcribe(audio_file_path, speakers_expected=speakers_expected)
+
+            # The recording is transcribed again from the start, so the result isn't appended after already committed
+            # utterances (it would duplicate them), the caller saves it in full and replaces the log
+            if on_commit and utterances.utterances and not committed:
+                on_commit(utterances, utterances.utterances[-1].end)
+
+        if self.cache:
+            self.cache.save(key, utterances)
+        return utterances
 
     def generate_transcript(self, utterances: Utterances) -> Transcript:
         """
         Generate a transcript from the given utterances, by identifying the interviewer (h2) and guest (p).
         """
-        # Merge the utterances into a single transcript
-        transcript = " ".join([f"Speaker {utterance.speaker}: {utterance.text}" for utterance in utterances.utterances])
+        builder = TranscriptBuilder(utterances)
 
         # Analyze the transcript using LLM 'haiku'
         # Use CoT reasoning in the prompt even and then Pydantic validation for a more sophisticated prompt?
-        prompt = self.prompts.identify_speaker_prompt(transcript)
+        prompt = self.prompts.identify_speaker_prompt(builder.context())
 
         # Identify the guest speaker
-        guest = self.llm.prompt(prompt.text, model=prompt.model, schema=SimpleResponse)
+        guest = self.llm.prompt(prompt.text, model=prompt.model, schema=SimpleResponse, attr="speaker")
 
         if guest.response not in ['A', 'B']:
             guest.response = 'B' #Fallback to B
 
-        guest_speaker = guest.response
+        # Label the transcript using the guest speaker
+        return builder.build(guest.response)
 
-        # Parse the transcript by labelling using the guest speaker
-        annotated_transcript = ""
-        questions = ""
+class TranscriptBuilder:
+    """
+    Builds the prompt context, the speaker-labelled markdown and the questions of a transcript
+
+    The utterances are walked once: the prompt context is written while collecting the (speaker, text) references,
+    and the markdown + questions are written in a single pass once the guest speaker is known.
+    """
+
+    def __init__(self, utterances: Utterances):
+        """
+        Initialize the TranscriptBuilder
+        """
+        self.turns = []
+        context = io.StringIO()
 
         for utterance in utterances.utterances:
-            if utterance.speaker == guest_speaker:
-                annotated_transcript += f"{utterance.text} \n"
+            if self.turns:
+                context.write(" ")
+            context.write(f"Speaker {utterance.speaker}: ")
+            context.write(utterance.text)
+            self.turns.append((utterance.speaker, utterance.text))
+
+        self._context = context.getvalue()
+
+    def context(self) -> str:
+        """
+        The transcript with speaker labels, used as the prompt context to identify the guest
+        """
+        return self._context
+
+    def build(self, guest_speaker: str) -> Transcript:
+        """
+        Build the markdown transcript (interviewer questions as h2) and the list of questions
+        """
+        text = io.StringIO()
+        questions = io.StringIO()
+
+        for speaker, utterance in self.turns:
+            if speaker == guest_speaker:
+                text.write(utterance)
+                text.write(" \n")
             else:
-                annotated_transcript += f"## {utterance.text} \n"
-                questions += f"## {utterance.text} \n \n"
+                text.write("## ")
+                text.write(utterance)
+                text.write(" \n")
+                questions.write("## ")
+                questions.write(utterance)
+                questions.write(" \n \n")
 
-        return Transcript(text=annotated_transcript)
+        return Transcript(text=text.getvalue(), questions=questions.getvalue())
@@ -0,0 +1,40 @@
+from threading import Lock
+from file_system.file_repository import FileRepository
+
+class UploadCache:
+    """
+    Manifest of the published images, mapping their content hash to their public URL
+
+    Images are uploaded to content-addressed paths, so an image already in the manifest is never uploaded again.
+    Stored in the hidden .cache folder of the Zoom directory, so it isn't listed as a blog.
+    """
+
+    def __init__(self, file_repository: FileRepository, path: str = ".cache/uploads.json"):
+        """
+        Initialize the UploadCache
+        """
+        self.file_repository = file_repository
+        self.path = path
+        self.urls = None
+        self.lock = Lock()
+
+    def get(self, key: str):
+        """
+        Get the public URL of the uploaded image with the given content hash, if any
+        """
+        with self.lock:
+            return self._load().get(key)
+
+    def save(self, key: str, url: str) -> None:
+        """
+        Save the public URL of an uploaded image
+        """
+        with self.lock:
+            self._load()[key] = url
+            self.file_repository.save_json(self.path, self.urls)
+
+    def _load(self) -> dict:
+        # The manifest is read once, then kept in memory
+        if self.urls is None:
+            self.urls = self.file_repository.get_json(self.path) or {}
+        return self.urls
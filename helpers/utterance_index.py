@@ -0,0 +1,139 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Set, Tuple
+from helpers.fingerprint import hash_json
+from schemas.file import Utterances
+
+# A posting is the position of a word in the transcript: (utterance index, word offset in the utterance)
+Posting = Tuple[int, int]
+
+def normalize(word: str) -> str:
+    """
+    Normalize a word for lookups (lowercase, without punctuation)
+    """
+    return re.sub(r"[^\w']", "", word.lower())
+
+class UtteranceIndex:
+    """
+    Time and keyword index over the utterances of a transcript, built once and saved next to the utterances
+
+    Start times are kept sorted for bisect lookups, and every word maps to its postings (inverted index).
+    The hash of the utterances it was built from is saved with it, so a stale index is rebuilt.
+    """
+
+    def __init__(self, starts: List[int], ends: List[int], words: Dict[str, List[Posting]], word_times: List[List[Tuple[int, int]]], utterances_hash: str = None):
+        """
+        Initialize the UtteranceIndex
+        """
+        self.starts = starts
+        self.ends = ends
+        self.words = words
+        self.word_times = word_times
+        self.utterances_hash = utterances_hash
+        self._sets: Dict[str, Set[Posting]] = {}
+
+    @classmethod
+    def build(cls, utterances: Utterances) -> "UtteranceIndex":
+        """
+        Build the index from the utterances (sorted by start time)
+        """
+        starts, ends, word_times = [], [], []
+        words: Dict[str, List[Posting]] = {}
+
+        for i, utterance in enumerate(utterances.utterances):
+            starts.append(utterance.start)
+            ends.append(utterance.end)
+
+            if utterance.words:
+                tokens = [(word.text, word.start, word.end) for word in utterance.words]
+            else:
+                # No word timestamps, fall back to the utterance times
+                tokens = [(text, utterance.start, utterance.end) for text in utterance.text.split()]
+
+            word_times.append([(start, end) for _, start, end in tokens])
+            for offset, (text, _, _) in enumerate(tokens):
+                token = normalize(text)
+                if token:
+                    words.setdefault(token, []).append((i, offset))
+
+        return cls(starts, ends, words, word_times, hash_json(utterances.model_dump()))
+
+    # Time lookups
+    def at(self, time: int) -> int:
+        """
+        Get the index of the utterance spoken at the given time (ms), or -1 if nobody was speaking
+        """
+        i = bisect_right(self.starts, time) - 1
+        if i >= 0 and self.ends[i] >= time:
+            return i
+        return -1
+
+    def between(self, start: int, end: int) -> List[int]:
+        """
+        Get the indices of the utterances overlapping the given time range (ms)
+        """
+        first = max(0, bisect_right(self.starts, start) - 1)
+        last = bisect_left(self.starts, end)
+        return [i for i in range(first, last) if self.ends[i] > start]
+
+    # Keyword lookups
+    def find(self, phrase: str) -> List[Posting]:
+        """
+        Get the postings where the given phrase starts (the words must be consecutive within an utterance)
+        """
+        tokens = [token for token in (normalize(word) for word in phrase.split()) if token]
+        if not tokens:
+            return []
+
+        # Anchor on the rarest word of the phrase, then check the other words at their relative offsets
+        anchor = min(range(len(tokens)), key=lambda k: len(self.words.get(tokens[k], [])))
+        matches = [(i, offset - anchor) for i, offset in self.words.get(tokens[anchor], []) if offset >= anchor]
+
+        for k, token in enumerate(tokens):
+            if k != anchor:
+                postings = self._postings(token)
+                matches = [(i, offset) for i, offset in matches if (i, offset + k) in postings]
+
+        return matches
+
+    def _postings(self, token: str) -> Set[Posting]:
+        """
+        Get the postings of a token as a set (memoised, so repeated queries are constant-time lookups)
+        """
+        postings = self._sets.get(token)
+        if postings is None:
+            postings = self._sets[token] = set(self.words.get(token, []))
+        return postings
+
+    def find_times(self, phrase: str) -> List[Tuple[int, int]]:
+        """
+        Get the time ranges (ms) where the given phrase was said
+        """
+        length = len([word for word in phrase.split() if normalize(word)])
+        return [(self.word_times[i][offset][0], self.word_times[i][offset + length - 1][1]) for i, offset in self.find(phrase)]
+
+    # Serialization
+    def to_dict(self) -> dict:
+        """
+        Convert the index to a JSON-serializable dict
+        """
+        return {
+            "starts": self.starts,
+            "ends": self.ends,
+            "words": self.words,
+            "word_times": self.word_times,
+            "utterances_hash": self.utterances_hash,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UtteranceIndex":
+        """
+        Load the index from a dict
+        """
+        return cls(
+            data["starts"],
+            data["ends"],
+            {word: [tuple(posting) for posting in postings] for word, postings in data["words"].items()},
+            [[tuple(times) for times in utterance] for utterance in data["word_times"]],
+            data.get("utterances_hash")
+        )
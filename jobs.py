@@ -0,0 +1,128 @@
+import itertools
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from errors import JobConflictError
+
+def progress_header(status: str) -> str:
+    """
+    Header of a job's output, restarted on each progress update
+    """
+    return f"Generating...\nCurrent status: {status}\n\n"
+
+class Job:
+    """
+    A CLI command running in the background
+    """
+
+    def __init__(self, job_id: int, name: str, key: str = None, on_done: Callable = None):
+        """
+        Initialize the Job
+        """
+        self.id = job_id
+        self.name = name
+        self.key = key
+        self.on_done = on_done
+        self.status = "queued"
+        self.progress = ""
+        self.output: List[str] = []
+        self.error: Exception = None
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def __str__(self):
+        text = f"[{self.id}] {self.name}: {self.status}"
+        if self.error:
+            text += f" ({self.error})"
+        elif self.progress and self.running:
+            text += f" - {self.progress}"
+        return text
+
+class JobRunner:
+    """
+    Class to run CLI commands on a worker thread pool, so the UI stays responsive while they run
+
+    Workers never touch curses: their progress and streamed output are posted to a thread-safe event queue,
+    which the UI thread drains between keypresses.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Initialize the JobRunner
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.events = queue.Queue()
+        self.jobs: Dict[int, Job] = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, name: str, fn: Callable, key: str = None, on_done: Callable = None) -> Job:
+        """
+        Run fn(llm_stream, callback) in the background, with key the blog it works on (one job per blog at a time)
+
+        on_done(result) is called from the UI thread once the job has finished.
+        """
+        if key and any(job.key == key and job.running for job in self.jobs.values()):
+            raise JobConflictError(f"A job is already running for '{key}'")
+
+        job = Job(next(self._ids), name, key, on_done)
+        self.jobs[job.id] = job
+        self.executor.submit(self._run, job.id, fn)
+        return job
+
+    def _run(self, job_id: int, fn: Callable) -> None:
+        """
+        Run a job in a worker thread, posting its events to the queue
+        """
+        self.events.put(("started", job_id, None))
+        try:
+            result = fn(
+                lambda text: self.events.put(("output", job_id, text)),
+                lambda text: self.events.put(("progress", job_id, text))
+            )
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            self.events.put(("failed", job_id, e))
+        else:
+            self.events.put(("done", job_id, result))
+
+    def poll(self) -> List[Tuple[str, Job, object]]:
+        """
+        Drain the pending events without blocking and apply them to the jobs (called from the UI thread)
+        """
+        events = []
+        while True:
+            try:
+                kind, job_id, payload = self.events.get_nowait()
+            except queue.Empty:
+                return events
+
+            job = self.jobs[job_id]
+            if kind == "started":
+                job.status = "running"
+            elif kind == "progress":
+                job.progress = payload
+                job.output = [progress_header(payload)]
+            elif kind == "output":
+                job.output.append(payload)
+            elif kind == "done":
+                job.status = "done"
+            elif kind == "failed":
+                job.status = "failed"
+                job.error = payload
+
+            events.append((kind, job, payload))
+
+    def running(self) -> List[Job]:
+        """
+        Get the jobs that are queued or running
+        """
+        return [job for job in self.jobs.values() if job.running]
+
+    def shutdown(self) -> None:
+        """
+        Cancel the queued jobs (running jobs finish before the process exits)
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -3,6 +3,8 @@ import instructor
 from anthropic import Anthropic
 from pydantic import BaseModel
 from llms.llm import LLM
+from llms.stream_sink import StreamSink
+from tracing import tracer
 
 import re
 import json
@@ -17,8 +19,9 @@ class AnthropicClient(LLM):
         Initialize the LLM service
         """
         super().__init__(provider="anthropic", config=config, models=models)
-        self.client = Anthropic(api_key=config["ANTHROPIC_API_KEY"])
-        self.llm_instructor = instructor.from_anthropic(Anthropic())
+        # Transient errors are retried (and counted) by LLMService, not by the SDK
+        self.client = Anthropic(api_key=config["ANTHROPIC_API_KEY"], max_retries=0)
+        self.llm_instructor = instructor.from_anthropic(Anthropic(max_retries=0))
 
     def prompt(self, prompt: str, model: str = "sonnet", schema:BaseModel=None):
         """
@@ -28,7 +31,7 @@ class AnthropicClient(LLM):
             return f"DEBUG LLM: {prompt[:50]}"
 
         if schema:
-            return self.llm_instructor.messages.create(
+            response, completion = self.llm_instructor.messages.create_with_completion(
                 model=self.get_model(model),
                 messages=[
                     {"role": "user", "content": prompt}
@@ -36,6 +39,8 @@ class AnthropicClient(LLM):
                 response_model=schema,
                 max_tokens=4096
             )
+            self.record_usage(completion.usage)
+            return response
 
         response = self.client.messages.create(
             model=self.get_model(model),
@@ -44,6 +49,7 @@ class AnthropicClient(LLM):
             ],
             max_tokens=4096
         )
+        self.record_usage(response.usage)
 
         return response.content[0].text
 
@@ -54,15 +60,26 @@ class AnthropicClient(LLM):
         if model == "debug":
             return f"DEBUG LLM: {prompt[:50]}"
 
-        response = ""
-        with self.client.messages.stream(
+        with StreamSink(llm_stream) as sink, self.client.messages.stream(
             model=self.get_model(model),
             messages=[{"role": "user", "content": prompt}],
             max_tokens=4096
         ) as stream:
             for text in stream.text_stream:
-                response += text
-                llm_stream(text)
+                sink.write(text)
+
+            self.record_usage(stream.get_final_message().usage)
 
         # TODO: Maybe I do 'post-processing' on the response to parse the JSON? I can't simultaneously stream and parse the JSON
-        return self.parse_response(response)
\ No newline at end of file
+        return self.parse_response(sink.text())
+
+    def record_usage(self, usage):
+        """
+        Add the token usage of a response (including the prompt cache reads and writes) to the current trace span
+        """
+        tracer.annotate(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", None),
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", None),
+        )
\ No newline at end of file
@@ -1,46 +1,128 @@
-from llms.anthropic_client import AnthropicClient
-from llms.openai_client import OpenAIClient
-from llms.ollama_client import OllamaClient
+import importlib
+import random
+import time
+from threading import Lock
 
 import yaml
 from pydantic import BaseModel
+from llms.metrics import LLMCall, LLMMetrics
+from tracing import tracer
+
+# Client class of each provider, imported (with its SDK) on first use of one of its models
+PROVIDERS = {
+    "anthropic": "llms.anthropic_client.AnthropicClient",
+    "openai": "llms.openai_client.OpenAIClient",
+    "ollama": "llms.ollama_client.OllamaClient",
+}
+
+# Transient errors (rate limited, overloaded or unavailable provider) are retried with exponential backoff
+# (the SDK clients are created with max_retries=0, so this is the only retry loop)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 529}
 
 class LLMService:
     """
     LLM class for the file object
     """
     
-    def __init__(self, config):
+    def __init__(self, config, metrics: LLMMetrics = None):
         # Load in the models config
+        self.config = config
+        self.metrics = metrics or LLMMetrics()
         self.models = {}
         with open("llms/models.yaml", "r") as f:
             self.models = yaml.safe_load(f)
 
-        self.anthropic = AnthropicClient(config, self.models)
-        self.openai = OpenAIClient(config, self.models)
-        self.ollama = OllamaClient(config, self.models)
-
-        # Create a model router from the yaml file
-        model_mapping ={
-            "anthropic": self.anthropic,
-            "openai": self.openai,
-            "ollama" : self.ollama
-        }
-
+        # Create a model router from the yaml file (the clients are created on first use)
         self.model_router = {}
         for model, value in self.models.items():
-            if value["provider"] in model_mapping:
-                self.model_router[model] = model_mapping[value["provider"]]
+            if value["provider"] in PROVIDERS:
+                self.model_router[model] = value["provider"]
             else:
                 raise ValueError(f"Provider '{value["provider"]}' is not yet implemented")
 
+        self.clients = {}
+        self.clients_lock = Lock()
+
     def _get(self, model: str):
-        return self.model_router[model]
+        provider = self.model_router[model]
+        with self.clients_lock:
+            if provider not in self.clients:
+                module, name = PROVIDERS[provider].rsplit(".", 1)
+                self.clients[provider] = getattr(importlib.import_module(module), name)(self.config, self.models)
+            return self.clients[provider]
 
-    def prompt(self, prompt: str, model: str = "sonnet", schema:BaseModel=None):
+    def prompt(self, prompt: str, model: str = "sonnet", schema:BaseModel=None, attr: str = None):
         client = self._get(model)
-        return client.prompt(model=model, prompt=prompt, schema=schema)
+        return self._call(
+            "llm.prompt", model, attr,
+            lambda on_stream: client.prompt(model=model, prompt=prompt, schema=schema),
+            schema=schema.__name__ if schema else None, prompt_chars=len(prompt)
+        )
 
-    def stream_prompt(self, prompt: str, model: str = "sonnet", llm_stream=None):
+    def stream_prompt(self, prompt: str, model: str = "sonnet", llm_stream=None, attr: str = None):
         client = self._get(model)
-        return client.stream_prompt(model=model, prompt=prompt, llm_stream=llm_stream)
\ No newline at end of file
+        return self._call(
+            "llm.stream", model, attr,
+            lambda on_stream: client.stream_prompt(model=model, prompt=prompt, llm_stream=on_stream),
+            llm_stream=llm_stream, prompt_chars=len(prompt)
+        )
+
+    def _call(self, name: str, model: str, attr: str, call, llm_stream=None, **attributes):
+        """
+        Call the LLM in a trace span, retrying transient errors, and record the metrics of the call
+
+        The clients add the token and prompt cache usage to the span, the time to first token is when the stream
+        first reaches llm_stream (StreamSink sends the first token right away).
+        """
+        start = time.perf_counter()
+        first_token = None
+        retries = 0
+        error = None
+
+        def on_stream(text: str):
+            nonlocal first_token
+            if first_token is None:
+                first_token = time.perf_counter()
+            if llm_stream:
+                llm_stream(text)
+
+        with tracer.span(name, provider=self.model_router[model], model=model, model_id=self.models[model]["model"], attr=attr, **attributes) as span:
+            try:
+                while True:
+                    try:
+                        response = call(on_stream)
+                        break
+                    except Exception as e:
+                        # Streams are only retried if nothing was streamed yet
+                        status = getattr(e, "status_code", getattr(e, "status", None))
+                        if status not in RETRY_STATUSES or retries == MAX_RETRIES or first_token is not None:
+                            raise
+                        retries += 1
+                        time.sleep(BACKOFF_SECONDS * 2 ** (retries - 1) * (1 + random.random()))
+
+                if isinstance(response, str):
+                    span.set(response_chars=len(response))
+                return response
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                latency = time.perf_counter() - start
+                span.set(ttft=first_token - start if first_token else None, retries=retries)
+                self.metrics.record(LLMCall(
+                    timestamp=time.time(),
+                    model=model,
+                    provider=self.model_router[model],
+                    attr=attr,
+                    streamed=name == "llm.stream",
+                    input_tokens=span.attributes.get("input_tokens"),
+                    output_tokens=span.attributes.get("output_tokens"),
+                    cache_read_tokens=span.attributes.get("cache_read_tokens"),
+                    cache_write_tokens=span.attributes.get("cache_write_tokens"),
+                    ttft=span.attributes.get("ttft"),
+                    latency=latency,
+                    retries=retries,
+                    error=error,
+                ))
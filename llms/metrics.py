@@ -0,0 +1,148 @@
+import math
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+class LLMCall(BaseModel):
+    """
+    Schema for the metrics of an LLM call (times in seconds)
+    """
+    timestamp: float
+    model: str
+    provider: str
+    attr: Optional[str] = None
+    streamed: bool = False
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    ttft: Optional[float] = None
+    latency: float
+    retries: int = 0
+    error: Optional[str] = None
+
+    @property
+    def cache(self) -> Optional[str]:
+        """
+        Prompt cache status: hit, write or miss (None if the provider doesn't report it)
+        """
+        if self.cache_read_tokens:
+            return "hit"
+        if self.cache_write_tokens:
+            return "write"
+        if self.cache_read_tokens is None and self.cache_write_tokens is None:
+            return None
+        return "miss"
+
+    @property
+    def tokens_per_sec(self) -> Optional[float]:
+        """
+        Output tokens per second of generation (after the first token, for streams)
+        """
+        duration = self.latency - (self.ttft or 0)
+        if not self.output_tokens or duration <= 0:
+            return None
+        return self.output_tokens / duration
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """
+    Get the p-th percentile of the values (nearest rank)
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+class LLMMetrics:
+    """
+    Store of the LLM call metrics, appended to a JSONL file in the hidden .cache/ folder (in memory only without a repository)
+    """
+
+    def __init__(self, file_repository=None, path: str = ".cache/llm_metrics.jsonl"):
+        """
+        Initialize the LLMMetrics
+        """
+        self.file_repository = file_repository
+        self.path = path
+        self._calls: List[LLMCall] = None
+        self._lock = Lock()
+
+    def calls(self) -> List[LLMCall]:
+        """
+        Get all the recorded calls (loaded from the file on first use)
+        """
+        with self._lock:
+            if self._calls is None:
+                records = self.file_repository.get_jsonl(self.path) if self.file_repository else None
+                self._calls = [LLMCall.model_validate(record) for record in records or []]
+            return list(self._calls)
+
+    def record(self, call: LLMCall) -> None:
+        """
+        Record a call
+        """
+        self.calls()
+        with self._lock:
+            self._calls.append(call)
+            if self.file_repository:
+                self.file_repository.append_jsonl(self.path, call.model_dump(exclude_none=True))
+
+    def summary(self, by: str = "model", calls: List[LLMCall] = None) -> List[dict]:
+        """
+        Aggregate the calls per model alias (or per attr, or provider): p50/p95 latency and TTFT, throughput, tokens, retries and cache hits
+        """
+        groups: Dict[str, List[LLMCall]] = defaultdict(list)
+        for call in self.calls() if calls is None else calls:
+            groups[getattr(call, by) or "-"].append(call)
+
+        rows = []
+        for key, group in groups.items():
+            succeeded = [call for call in group if not call.error]
+            latencies = [call.latency for call in succeeded]
+            ttfts = [call.ttft for call in succeeded if call.ttft is not None]
+            throughputs = [call.tokens_per_sec for call in succeeded if call.tokens_per_sec]
+            cached = [call.cache for call in succeeded if call.cache]
+
+            rows.append({
+                by: key,
+                "calls": len(group),
+                "errors": len(group) - len(succeeded),
+                "retries": sum(call.retries for call in group),
+                "latency_p50": percentile(latencies, 50),
+                "latency_p95": percentile(latencies, 95),
+                "ttft_p50": percentile(ttfts, 50),
+                "ttft_p95": percentile(ttfts, 95),
+                "tokens_per_sec": percentile(throughputs, 50),
+                "input_tokens": sum(call.input_tokens or 0 for call in group),
+                "output_tokens": sum(call.output_tokens or 0 for call in group),
+                "cache_hit_rate": cached.count("hit") / len(cached) if cached else None,
+            })
+
+        return sorted(rows, key=lambda row: -row["calls"])
+
+    def since(self, timestamp: float) -> List[LLMCall]:
+        """
+        Get the calls recorded since the given time (e.g. during an eval run)
+        """
+        return [call for call in self.calls() if call.timestamp >= timestamp]
+
+def format_stats(rows: List[dict], by: str = "model") -> str:
+    """
+    Format the summary of the calls as a table
+    """
+    if not rows:
+        return "No LLM calls recorded yet!"
+
+    def value(number, unit="s", digits=2):
+        return "-" if number is None else f"{number:.{digits}f}{unit}"
+
+    lines = [f"{by:<16} {'calls':>6} {'errors':>6} {'retries':>7} {'p50':>8} {'p95':>8} {'ttft p50':>9} {'ttft p95':>9} {'tok/s':>7} {'tokens in':>10} {'tokens out':>10} {'cache hits':>10}"]
+    for row in rows:
+        lines.append(
+            f"{str(row[by])[:16]:<16} {row['calls']:>6} {row['errors']:>6} {row['retries']:>7} "
+            f"{value(row['latency_p50']):>8} {value(row['latency_p95']):>8} {value(row['ttft_p50']):>9} {value(row['ttft_p95']):>9} "
+            f"{value(row['tokens_per_sec'], '', 1):>7} {row['input_tokens']:>10,} {row['output_tokens']:>10,} "
+            f"{value(row['cache_hit_rate'] and row['cache_hit_rate'] * 100, '%', 0):>10}"
+        )
+    return "\n".join(lines)
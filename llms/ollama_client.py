@@ -1,4 +1,6 @@
 from llms.llm import LLM
+from llms.stream_sink import StreamSink
+from tracing import tracer
 from pydantic import BaseModel
 from ollama import Client
 
@@ -29,6 +31,7 @@ class OllamaClient(LLM):
                 "content": prompt
             }
         ])
+        tracer.annotate(input_tokens=response.get('prompt_eval_count'), output_tokens=response.get('eval_count'))
 
         return response['message']['content']
 
@@ -39,15 +42,15 @@ class OllamaClient(LLM):
         if model == "debug":
             return f"DEBUG LLM: {prompt[:50]}"
 
-        response = ""
-        for chunk in self.client.chat(
-            model=self.get_model(model),
-            messages=[{"role": "user", "content": prompt}],
-            stream=True
-        ):
-            text = chunk['message']['content']
-            response += text
-            if llm_stream:
-                llm_stream(text)
-
-        return self.parse_response(response)
\ No newline at end of file
+        with StreamSink(llm_stream) as sink:
+            for chunk in self.client.chat(
+                model=self.get_model(model),
+                messages=[{"role": "user", "content": prompt}],
+                stream=True
+            ):
+                sink.write(chunk['message']['content'])
+                # The last chunk has the token counts
+                if chunk.get('done'):
+                    tracer.annotate(input_tokens=chunk.get('prompt_eval_count'), output_tokens=chunk.get('eval_count'))
+
+        return self.parse_response(sink.text())
\ No newline at end of file
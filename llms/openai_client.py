@@ -1,4 +1,6 @@
 from llms.llm import LLM
+from llms.stream_sink import StreamSink
+from tracing import tracer
 from pydantic import BaseModel
 from openai import OpenAI
 import instructor
@@ -12,7 +14,8 @@ class OpenAIClient(LLM):
     def __init__(self, config, models):
         super().__init__(provider="openai", config=config, models=models)
         
-        self.client = OpenAI(api_key=config["OPENAI_API_KEY"])
+        # Transient errors are retried (and counted) by LLMService, not by the SDK
+        self.client = OpenAI(api_key=config["OPENAI_API_KEY"], max_retries=0)
         self.llm_instructor = instructor.patch(self.client)
 
     def prompt(self, prompt: str, model: str = "gpt-4o", schema:BaseModel=None):
@@ -23,16 +26,19 @@ class OpenAIClient(LLM):
             return f"DEBUG LLM: {prompt[:50]}"
 
         if schema:
-            return self.llm_instructor.chat.completions.create(
+            response, completion = self.llm_instructor.chat.completions.create_with_completion(
                 model=self.get_model(model),
                 messages=[{"role": "user", "content": prompt}],
                 response_model=schema
             )
+            self.record_usage(completion.usage)
+            return response
 
         response = self.client.chat.completions.create(
             model=self.get_model(model),
             messages=[{"role": "user", "content": prompt}]
         )
+        self.record_usage(response.usage)
         return response.choices[0].message.content
 
     def stream_prompt(self, prompt: str, model: str = "gpt-4", llm_stream=None):
@@ -42,18 +48,30 @@ class OpenAIClient(LLM):
             if model == "debug":
                 return f"DEBUG LLM: {prompt[:50]}"
 
-            response = ""
             stream = self.client.chat.completions.create(
                 model=self.get_model(model),
                 messages=[{"role": "user", "content": prompt}],
-                stream=True
+                stream=True,
+                stream_options={"include_usage": True}
             )
             
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    text = chunk.choices[0].delta.content
-                    response += text
-                    if llm_stream:
-                        llm_stream(text)
-
-            return self.parse_response(response)
\ No newline at end of file
+            with StreamSink(llm_stream) as sink:
+                for chunk in stream:
+                    # The usage comes in a last chunk, without choices
+                    if chunk.usage:
+                        self.record_usage(chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content is not None:
+                        sink.write(chunk.choices[0].delta.content)
+
+            return self.parse_response(sink.text())
+
+    def record_usage(self, usage):
+        """
+        Add the token usage of a response (including the cached prompt tokens) to the current trace span
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        tracer.annotate(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cache_read_tokens=getattr(details, "cached_tokens", None),
+        )
\ No newline at end of file
@@ -0,0 +1,70 @@
+import time
+from threading import Lock, Timer
+from typing import List
+
+class StreamSink:
+    """
+    Buffered sink for streamed LLM output, used by every LLM.stream_prompt implementation
+
+    Tokens are kept as an append-only list of chunks and coalesced, so llm_stream is called at most
+    once per frame (e.g. 30 times per second) instead of once per token. Tokens still buffered when the
+    stream pauses are flushed by a timer at the end of the frame.
+    """
+
+    def __init__(self, llm_stream=None, fps: int = 30):
+        """
+        Initialize the StreamSink
+        """
+        self.llm_stream = llm_stream
+        self.interval = 1 / fps
+        self.chunks: List[str] = []
+        self._flushed = 0
+        self._last_flush = 0.0
+        self._timer: Timer = None
+        self._lock = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Send the last tokens, even if the stream failed halfway
+        self.flush()
+
+    def write(self, text: str) -> None:
+        """
+        Buffer a streamed token, flushing if a frame has passed since the last flush (or at the end of the frame)
+        """
+        with self._lock:
+            self.chunks.append(text)
+            wait = self.interval - (time.monotonic() - self._last_flush)
+            if wait > 0:
+                # Deadline flush, in case no other token arrives before the end of the frame
+                if self._timer is None:
+                    self._timer = Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Send the buffered tokens to llm_stream as a single chunk
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._flushed == len(self.chunks):
+                return
+
+            text = "".join(self.chunks[self._flushed:])
+            self._flushed = len(self.chunks)
+            self._last_flush = time.monotonic()
+            if self.llm_stream:
+                self.llm_stream(text)
+
+    def text(self) -> str:
+        """
+        Get the full streamed response
+        """
+        return "".join(self.chunks)
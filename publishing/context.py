@@ -0,0 +1,85 @@
+import io
+import re
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Dict, List
+from PIL import Image
+from helpers.markdown_blocks import MarkdownBlock, parse_markdown
+from publishing.render import render_html
+from schemas.file import File
+
+# Width of the banner in the exported pages and feeds
+BANNER_WIDTH = 1200
+
+class PublishContext:
+    """
+    Artefacts of a blog shared by its exporters (parsed markdown, rendered HTML, resized images, upload URLs)
+
+    Exporters run concurrently, each artefact is computed once by the first exporter that needs it.
+    """
+
+    def __init__(self, file: File, notion_service=None):
+        """
+        Initialize the PublishContext
+        """
+        self.file = file
+        self.notion_service = notion_service
+        self.published_at = datetime.now(timezone.utc)
+        self._values = {}
+        self._locks: Dict[str, Lock] = {}
+        self._lock = Lock()
+
+    def _once(self, key: str, compute: Callable):
+        """
+        Compute an artefact once, exporters asking for it in the meantime wait for the first computation
+        """
+        with self._lock:
+            lock = self._locks.setdefault(key, Lock())
+        with lock:
+            if key not in self._values:
+                self._values[key] = compute()
+            return self._values[key]
+
+    @property
+    def slug(self) -> str:
+        """
+        Get the URL-safe name of the blog
+        """
+        return re.sub(r"[^a-z0-9]+", "-", self.file.name.lower()).strip("-")
+
+    @property
+    def blocks(self) -> List[MarkdownBlock]:
+        """
+        Get the parsed markdown of the blog content
+        """
+        return self._once("blocks", lambda: list(parse_markdown(self.file.blog.content)))
+
+    @property
+    def html(self) -> str:
+        """
+        Get the blog content rendered as HTML
+        """
+        return self._once("html", lambda: render_html(self.blocks))
+
+    @property
+    def banner(self) -> bytes:
+        """
+        Get the banner (landscape thumbnail) resized for the web, as JPEG
+        """
+        return self._once("banner", self._resize_banner)
+
+    def _resize_banner(self) -> bytes:
+        image = Image.open(io.BytesIO(self.file.thumbnails.landscape)).convert("RGB")
+        if image.width > BANNER_WIDTH:
+            image = image.resize((BANNER_WIDTH, round(image.height * BANNER_WIDTH / image.width)), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85, optimize=True)
+        return buffer.getvalue()
+
+    @property
+    def image_urls(self) -> dict:
+        """
+        Get the public URLs of the uploaded images (photo and banner)
+        """
+        return self._once("image_urls", lambda: self.notion_service.upload_images(self.file))
@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from publishing.context import PublishContext
+
+class Exporter(ABC):
+    """
+    Interface for a publishing target (e.g. Notion, a markdown bundle, a static site)
+    """
+
+    # Name of the target, used to select it when publishing
+    name: str = None
+
+    @abstractmethod
+    def export(self, context: PublishContext) -> str:
+        """
+        Publish the blog of the context and return where it was published (URL or path)
+        """
+        raise NotImplementedError("export() must be implemented by subclass")
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+from email.utils import format_datetime
+from typing import List
+from xml.sax.saxutils import escape
+from file_system.file_repository import FileRepository
+from publishing.context import PublishContext
+from publishing.exporter import Exporter
+from publishing.site_exporter import SiteManifest, post_entry
+
+class FeedExporter(Exporter):
+    """
+    Exporter adding the blog to the RSS and JSON feeds of the static site
+    """
+    name = "feed"
+
+    def __init__(self, file_repository: FileRepository, site_url: str = "", directory: str = ".site"):
+        """
+        Initialize the FeedExporter
+        """
+        self.file_repository = file_repository
+        self.site_url = (site_url or "").rstrip("/")
+        self.directory = directory
+        self.manifest = SiteManifest(file_repository, f"{directory}/posts.json")
+
+    def export(self, context: PublishContext) -> str:
+        posts = self.manifest.upsert(post_entry(context, self.site_url))
+
+        self.file_repository.save_text(f"{self.directory}/feed.xml", self.render_rss(posts))
+        self.file_repository.save_text(f"{self.directory}/feed.json", self.render_json(posts))
+
+        return f"{self.file_repository.directory}/{self.directory}/feed.xml"
+
+    def render_rss(self, posts: List[dict]) -> str:
+        """
+        Render the posts as an RSS 2.0 feed
+        """
+        items = "\n".join(
+            f"""<item>
+<title>{escape(post["title"])}</title>
+<link>{escape(post["url"])}</link>
+<guid>{escape(post["url"])}</guid>
+<description>{escape(post["description"])}</description>
+<pubDate>{format_datetime(datetime.fromisoformat(post["published"]))}</pubDate>
+<enclosure url="{escape(post["image"])}" type="image/jpeg" length="0"/>
+</item>"""
+            for post in posts
+        )
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+<channel>
+<title>Blog</title>
+<link>{escape(self.site_url or "/")}</link>
+<description>All posts</description>
+{items}
+</channel>
+</rss>
+"""
+
+    def render_json(self, posts: List[dict]) -> str:
+        """
+        Render the posts as a JSON feed (version 1.1)
+        """
+        return json.dumps({
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": "Blog",
+            "home_page_url": self.site_url or "/",
+            "items": [
+                {
+                    "id": post["url"],
+                    "url": post["url"],
+                    "title": post["title"],
+                    "summary": post["description"],
+                    "image": post["image"],
+                    "date_published": post["published"],
+                    "date_modified": post["updated"],
+                }
+                for post in posts
+            ],
+        }, indent=2)
@@ -0,0 +1,54 @@
+from file_system.file_repository import FileRepository
+from publishing.context import PublishContext
+from publishing.exporter import Exporter
+from publishing.render import render_page
+
+class MarkdownExporter(Exporter):
+    """
+    Exporter writing the blog as a local markdown + HTML bundle (with its banner), in the blog folder
+    """
+    name = "markdown"
+
+    def __init__(self, file_repository: FileRepository):
+        """
+        Initialize the MarkdownExporter
+        """
+        self.file_repository = file_repository
+
+    def export(self, context: PublishContext) -> str:
+        blog = context.file.blog
+        directory = f"{context.file.name}/published/markdown"
+
+        self.file_repository.save_image(f"{directory}/banner.jpg", context.banner)
+        self.file_repository.save_text(f"{directory}/{context.slug}.md", self.render_markdown(context))
+        self.file_repository.save_text(f"{directory}/index.html", render_page(blog.title, blog.description, context.html, "banner.jpg"))
+
+        return f"{self.file_repository.directory}/{directory}"
+
+    def render_markdown(self, context: PublishContext) -> str:
+        """
+        Render the markdown draft (title, description, overview, blog and LinkedIn post)
+        """
+        file = context.file
+        return f"""# {file.blog.title}
+
+{file.blog.description}
+
+![{file.blog.title}](banner.jpg)
+
+---
+
+## Overview
+
+{file.metadata.resume}
+
+---
+
+{file.blog.content}
+
+---
+
+## LinkedIn
+
+{file.blog.linkedin}
+"""
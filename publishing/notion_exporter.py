@@ -0,0 +1,24 @@
+from file_system.file_helper import FileHelper
+from helpers.notion_service import NotionService
+from publishing.context import PublishContext
+from publishing.exporter import Exporter
+
+class NotionExporter(Exporter):
+    """
+    Exporter publishing the blog as a Notion page (re-publishing only syncs the changed blocks)
+    """
+    name = "notion"
+
+    def __init__(self, notion_service: NotionService, file_helper: FileHelper):
+        """
+        Initialize the NotionExporter
+        """
+        self.notion_service = notion_service
+        self.file_helper = file_helper
+
+    def export(self, context: PublishContext) -> str:
+        blog_name = context.file.name
+        state = self.notion_service.publish(context.file, self.file_helper.get_publish_state(blog_name, self.name), context.image_urls)
+        self.file_helper.save_publish_state(blog_name, self.name, state)
+
+        return f"https://www.notion.so/{state['page_id'].replace('-', '')}"
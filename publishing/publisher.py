@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+from errors import PublishError
+from publishing.context import PublishContext
+from publishing.exporter import Exporter
+from schemas.file import File
+
+class Publisher:
+    """
+    Class to publish a blog to several targets at once
+
+    The exporters run concurrently and share a PublishContext (parsed markdown, HTML, resized images, upload URLs),
+    so a publish takes as long as the slowest target rather than the sum of all of them.
+    """
+
+    def __init__(self, exporters: List[Exporter], notion_service=None):
+        """
+        Initialize the Publisher
+        """
+        self.exporters = {exporter.name: exporter for exporter in exporters}
+        self.notion_service = notion_service
+
+    def publish(self, file: File, targets: List[str] = None, callback=None) -> Dict[str, str]:
+        """
+        Publish the blog to the given targets (all by default), returns where it was published per target
+
+        A failing target doesn't stop the others, the failures are raised together once all targets are done.
+        """
+        targets = targets or list(self.exporters)
+        unknown = [target for target in targets if target not in self.exporters]
+        if unknown:
+            raise ValueError(f"Unknown publishing targets {unknown}, available targets are {list(self.exporters)}")
+
+        context = PublishContext(file, self.notion_service)
+        results = {}
+        errors = {}
+
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = {executor.submit(self.exporters[target].export, context): target for target in targets}
+
+            for future in as_completed(futures):
+                target = futures[future]
+                try:
+                    results[target] = future.result()
+                    if callback:
+                        callback(f"Published {file.name} to {target}: {results[target]}")
+                except Exception as e:
+                    errors[target] = e
+                    if callback:
+                        callback(f"Publishing {file.name} to {target} failed: {e}")
+
+        if errors:
+            raise PublishError(f"Publishing {file.name} failed for {', '.join(f'{target} ({error})' for target, error in errors.items())}")
+
+        return results
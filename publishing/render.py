@@ -0,0 +1,89 @@
+from html import escape
+from typing import Iterable, List
+from helpers.markdown_blocks import MarkdownBlock, Span
+
+# HTML tags of the block types (list items are grouped into their list)
+TAGS = {
+    "heading_1": "h1",
+    "heading_2": "h2",
+    "heading_3": "h3",
+    "paragraph": "p",
+    "quote": "blockquote",
+}
+LISTS = {"bulleted_list_item": "ul", "numbered_list_item": "ol"}
+
+def render_spans(spans: Iterable[Span]) -> str:
+    """
+    Render spans as inline HTML
+    """
+    parts = []
+    for span in spans:
+        text = escape(span.text)
+        if span.code:
+            text = f"<code>{text}</code>"
+        if span.bold:
+            text = f"<strong>{text}</strong>"
+        if span.italic:
+            text = f"<em>{text}</em>"
+        if span.strikethrough:
+            text = f"<del>{text}</del>"
+        if span.link:
+            text = f'<a href="{escape(span.link)}">{text}</a>'
+        parts.append(text)
+    return "".join(parts)
+
+def render_html(blocks: Iterable[MarkdownBlock]) -> str:
+    """
+    Render parsed markdown blocks as HTML
+    """
+    lines: List[str] = []
+    open_list = None
+
+    for block in blocks:
+        # Consecutive list items share their list
+        list_tag = LISTS.get(block.type)
+        if open_list and list_tag != open_list:
+            lines.append(f"</{open_list}>")
+            open_list = None
+        if list_tag and not open_list:
+            lines.append(f"<{list_tag}>")
+            open_list = list_tag
+
+        if list_tag:
+            lines.append(f"<li>{render_spans(block.spans)}</li>")
+        elif block.type == "code":
+            language = f' class="language-{escape(block.language)}"' if block.language else ""
+            lines.append(f"<pre><code{language}>{escape(block.spans[0].text if block.spans else '')}</code></pre>")
+        elif block.type == "divider":
+            lines.append("<hr>")
+        else:
+            tag = TAGS.get(block.type, "p")
+            lines.append(f"<{tag}>{render_spans(block.spans)}</{tag}>")
+
+    if open_list:
+        lines.append(f"</{open_list}>")
+
+    return "\n".join(lines)
+
+def render_page(title: str, description: str, body: str, banner: str = None) -> str:
+    """
+    Render a standalone HTML page
+    """
+    banner_html = f'<img src="{escape(banner)}" alt="{escape(title)}">\n' if banner else ""
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(title)}</title>
+<meta name="description" content="{escape(description)}">
+</head>
+<body>
+<article>
+<h1>{escape(title)}</h1>
+<p><em>{escape(description)}</em></p>
+{banner_html}{body}
+</article>
+</body>
+</html>
+"""
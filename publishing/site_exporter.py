@@ -0,0 +1,90 @@
+from html import escape
+from threading import Lock
+from typing import Dict, List
+from file_system.file_repository import FileRepository
+from publishing.context import PublishContext
+from publishing.exporter import Exporter
+from publishing.render import render_page
+
+class SiteManifest:
+    """
+    Manifest of the posts of the static site, shared by the site and feed exporters
+    """
+
+    # Exporters of different blogs can update the same manifest concurrently
+    _locks: Dict[str, Lock] = {}
+    _locks_lock = Lock()
+
+    def __init__(self, file_repository: FileRepository, path: str):
+        """
+        Initialize the SiteManifest
+        """
+        self.file_repository = file_repository
+        self.path = path
+        with self._locks_lock:
+            self.lock = self._locks.setdefault(f"{file_repository.directory}/{path}", Lock())
+
+    def upsert(self, post: dict) -> List[dict]:
+        """
+        Add or update a post (keeping its first publish date), and return all the posts, newest first
+        """
+        with self.lock:
+            posts = {existing["slug"]: existing for existing in self.file_repository.get_json(self.path) or []}
+            previous = posts.get(post["slug"], {})
+            posts[post["slug"]] = {**post, "published": previous.get("published", post["published"])}
+
+            posts = sorted(posts.values(), key=lambda existing: existing["published"], reverse=True)
+            self.file_repository.save_json(self.path, posts)
+            return posts
+
+def post_entry(context: PublishContext, site_url: str) -> dict:
+    """
+    Get the manifest entry of the blog
+    """
+    url = f"{site_url.rstrip('/')}/posts/{context.slug}/"
+    return {
+        "slug": context.slug,
+        "title": context.file.blog.title,
+        "description": context.file.blog.description,
+        "url": url,
+        "image": f"{url}banner.jpg",
+        "published": context.published_at.isoformat(),
+        "updated": context.published_at.isoformat(),
+    }
+
+class SiteExporter(Exporter):
+    """
+    Exporter writing the blog as a page of a static site (in the hidden .site folder of the Zoom directory), with an index of all posts
+    """
+    name = "site"
+
+    def __init__(self, file_repository: FileRepository, site_url: str = "", directory: str = ".site"):
+        """
+        Initialize the SiteExporter
+        """
+        self.file_repository = file_repository
+        self.site_url = site_url or ""
+        self.directory = directory
+        self.manifest = SiteManifest(file_repository, f"{directory}/posts.json")
+
+    def export(self, context: PublishContext) -> str:
+        blog = context.file.blog
+        directory = f"{self.directory}/posts/{context.slug}"
+
+        self.file_repository.save_image(f"{directory}/banner.jpg", context.banner)
+        self.file_repository.save_text(f"{directory}/index.html", render_page(blog.title, blog.description, context.html, "banner.jpg"))
+
+        posts = self.manifest.upsert(post_entry(context, self.site_url))
+        self.file_repository.save_text(f"{self.directory}/index.html", self.render_index(posts))
+
+        return f"{self.file_repository.directory}/{directory}/index.html"
+
+    def render_index(self, posts: List[dict]) -> str:
+        """
+        Render the index page listing the posts
+        """
+        items = "\n".join(
+            f'<li><a href="posts/{escape(post["slug"])}/">{escape(post["title"])}</a><p>{escape(post["description"])}</p></li>'
+            for post in posts
+        )
+        return render_page("Blog", "All posts", f"<ul>\n{items}\n</ul>")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 class Files(BaseModel):
     """
@@ -64,9 +64,10 @@ class Utterances(BaseModel):
 class Transcript(BaseModel):
     """
     Schema for the transcript (generated from the AssemblyAI transcription)
-    text is the transcript in markdown format
+    text is the transcript in markdown format, questions are the interviewer questions (h2)
     """
     text: str
+    questions: Optional[str] = None
 
     def __str__(self):
         return self.text
@@ -114,15 +115,58 @@ class ThumbnailParams(BaseModel):
     portrait_x_offset: int = 0
     portrait_y_offset: int = 0
 
+class ThumbnailTemplate(BaseModel):
+    """
+    Schema for a thumbnail template (see llms/thumbnail_templates.yaml)
+    Same as the thumbnail parameters, but the universities are anchored instead of positioned
+    """
+    height: int
+    width: int
+
+    companies_font_size: int
+    companies_x_offset: int
+    companies_y_offset: int
+
+    universities_font_size: int = 74
+    universities_x_offset: int
+    universities_anchor: str = "bottom" # "bottom" or "below_companies"
+    universities_margin: int = 60
+
+    name_font_size: int = 74
+    name_x_offset: int = 0
+    name_y_offset: int = 0
+
+    portrait_ratio: float
+    portrait_align: str
+    portrait_x_offset: int = 0
+    portrait_y_offset: int = 0
+
+class ThumbnailEncoder(BaseModel):
+    """
+    Schema for the thumbnail encoder settings
+    PNG compression is the slowest part of encoding, so default to a low compress level without optimize.
+    preview_format optionally also encodes a lighter WEBP/JPEG preview of each thumbnail.
+    """
+    compress_level: int = 1
+    optimize: bool = False
+    preview_format: Optional[str] = None
+    preview_quality: int = 80
+
 class Thumbnails(BaseModel):
     """
     Thumbnails generated from the metadata & files
     """
     photo_no_bg: Optional[bytes] = None
+    photo_hash: Optional[str] = None
     landscape: Optional[bytes] = None
     landscape_params: Optional[ThumbnailParams] = None
+    landscape_preview: Optional[bytes] = None
     square: Optional[bytes] = None
     square_params: Optional[ThumbnailParams] = None
+    square_preview: Optional[bytes] = None
+    variants: Optional[Dict[str, bytes]] = None
+    variant_params: Optional[Dict[str, ThumbnailParams]] = None
+    fingerprint: Optional[str] = None
 
 class Blog(BaseModel):
     """
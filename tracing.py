@@ -0,0 +1,259 @@
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List
+from uuid import uuid4
+
+# Finished spans kept in memory (for the summary when there's no trace file)
+MAX_SPANS = 10000
+
+# Buffered spans are written to the trace file every FLUSH_SPANS spans or FLUSH_SECONDS
+FLUSH_SPANS = 100
+FLUSH_SECONDS = 1.0
+
+# Numeric attributes summed per span name in the summary
+TOTALS = ["input_tokens", "output_tokens", "cache_read_tokens", "bytes_read", "bytes_written", "cache_hits"]
+
+class Span:
+    """
+    A timed operation (e.g. a pipeline stage, an LLM call or a file read) with attributes, nested in its parent span
+    """
+
+    def __init__(self, name: str, run: str, parent: "Span" = None, attributes: dict = None):
+        """
+        Initialize the Span (started now)
+        """
+        self.name = name
+        self.id = uuid4().hex[:16]
+        self.parent_id = parent.id if parent else None
+        self.run = run
+        self.thread = threading.current_thread().name
+        self.attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+        self.error = None
+        self.start = time.time()
+        self.duration = None
+        self._start = time.perf_counter()
+
+    def set(self, **attributes) -> None:
+        """
+        Set attributes of the span (e.g. the token usage once the response is received)
+        """
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "run": self.run,
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "thread": self.thread,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+class Tracer:
+    """
+    Class to trace where the time goes: spans are nested per thread and exported to a local JSONL trace file
+
+    Every process is a run, the summary of a run gives the time, errors and totals (tokens, bytes, cache hits) per span name.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Initialize the Tracer (spans are only kept in memory until a trace file is configured)
+        """
+        self.path = path
+        self.run = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid4().hex[:6]
+        self.spans = deque(maxlen=MAX_SPANS)
+        self._buffer: List[dict] = []
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._current: ContextVar[Span] = ContextVar("span", default=None)
+
+    def configure(self, path: str) -> None:
+        """
+        Export the spans to the given JSONL trace file (appended to, across runs)
+        """
+        self.flush()
+        self.path = path
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Trace the enclosed block as a span, child of the current span of this thread
+        """
+        span = Span(name, self.run, self._current.get(), attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+            self._record(span)
+
+    def current(self) -> Span:
+        """
+        Get the current span of this thread, if any
+        """
+        return self._current.get()
+
+    def annotate(self, **attributes) -> None:
+        """
+        Set attributes of the current span (ignored outside of a span)
+        """
+        span = self._current.get()
+        if span:
+            span.set(**attributes)
+
+    def _record(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            self.spans.append(record)
+            self._buffer.append(record)
+            due = len(self._buffer) >= FLUSH_SPANS or time.monotonic() - self._flushed >= FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered spans to the trace file
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._flushed = time.monotonic()
+            if not self.path or not records:
+                return
+
+            # Not written through the FileRepository, which is itself traced
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+
+    def load(self, run: str = None) -> List[dict]:
+        """
+        Get the spans of the given run (this one by default), from the trace file if there is one
+        """
+        run = run or self.run
+        if not self.path:
+            return [record for record in self.spans if record["run"] == run]
+
+        self.flush()
+        spans = []
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record["run"] == run:
+                        spans.append(record)
+        except FileNotFoundError:
+            pass
+        return spans
+
+    def runs(self) -> List[str]:
+        """
+        Get the runs in the trace file, oldest first
+        """
+        self.flush()
+        runs = {}
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        runs[json.loads(line)["run"]] = True
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+        except (FileNotFoundError, TypeError):
+            return [self.run]
+        return list(runs)
+
+def traced(name: str, **arguments):
+    """
+    Decorator tracing each call of the function as a span
+
+    The keyword arguments map span attributes to the function's parameters (or their attributes),
+    e.g. traced("transcribe", blog="file_name") or traced("thumbnails.generate", blog="file.name").
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def resolve(bound: dict, path: str):
+            parameter, *attrs = path.split(".")
+            value = bound.get(parameter)
+            for attr in attrs:
+                value = getattr(value, attr, None)
+            return value
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind_partial(*args, **kwargs).arguments
+            attributes = {attribute: resolve(bound, path) for attribute, path in arguments.items()}
+            with tracer.span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def summarize(spans: List[dict]) -> List[dict]:
+    """
+    Summarize spans per name: calls, errors, total/self/max time and the totals of the TOTALS attributes
+
+    Self time excludes the time spent in child spans (of the same thread), so it shows where the time actually went.
+    """
+    children = defaultdict(float)
+    for span in spans:
+        if span["parent_id"]:
+            children[span["parent_id"]] += span["duration"] or 0
+
+    rows: Dict[str, dict] = {}
+    for span in spans:
+        row = rows.setdefault(span["name"], {"name": span["name"], "calls": 0, "errors": 0, "total": 0.0, "self": 0.0, "max": 0.0, **{key: 0 for key in TOTALS}})
+        duration = span["duration"] or 0
+        row["calls"] += 1
+        row["errors"] += 1 if span["error"] else 0
+        row["total"] += duration
+        row["self"] += max(duration - children[span["id"]], 0)
+        row["max"] = max(row["max"], duration)
+        for key in TOTALS:
+            value = span["attributes"].get(key)
+            if isinstance(value, (int, float)):
+                row[key] += value
+
+    return sorted(rows.values(), key=lambda row: -row["self"])
+
+def format_summary(spans: List[dict]) -> str:
+    """
+    Format the summary of the spans as a table
+    """
+    if not spans:
+        return "No spans traced yet!"
+
+    rows = summarize(spans)
+    totals = [key for key in TOTALS if any(row[key] for row in rows)]
+    lines = [f"{'span':<28} {'calls':>6} {'errors':>6} {'total':>9} {'self':>9} {'max':>9}" + "".join(f" {key:>13}" for key in totals)]
+    for row in rows:
+        lines.append(
+            f"{row['name'][:28]:<28} {row['calls']:>6} {row['errors']:>6} {row['total']:>8.2f}s {row['self']:>8.2f}s {row['max']:>8.2f}s"
+            + "".join(f" {row[key]:>13,}" for key in totals)
+        )
+    return "\n".join(lines)
+
+# Tracer of this process
+tracer = Tracer()
+atexit.register(tracer.flush)
@@ -0,0 +1,48 @@
+import assemblyai as aai
+from schemas.file import Utterances, Utterance, Word
+from transcription.backend import TranscriptionBackend
+
+class AssemblyAIBackend(TranscriptionBackend):
+    """
+    Transcription backend using AssemblyAI (remote, with speaker diarization)
+    """
+
+    def __init__(self, config):
+        """
+        Initialize the AssemblyAI backend
+        """
+        super().__init__(name="assemblyai", config=config)
+        aai.settings.api_key = config["ASSEMBLYAI_API_KEY"]
+
+    def transcribe(self, audio_file_path: str, speakers_expected: int = 2) -> Utterances:
+        """
+        Upload and transcribe the given audio file with AssemblyAI
+        """
+        config = aai.TranscriptionConfig(speaker_labels=True, speakers_expected=speakers_expected)
+        transcriber = aai.Transcriber()
+
+        transcript = transcriber.transcribe(
+            audio_file_path,
+            config=config
+        )
+
+        # Map AssemblyAI transcript to our Transcript schema
+        utterances = [
+            Utterance(
+                confidence=utterance.confidence,
+                end=utterance.end,
+                speaker=utterance.speaker,
+                start=utterance.start,
+                text=utterance.text,
+                words=[Word(
+                    text=word.text,
+                    start=word.start,
+                    end=word.end,
+                    confidence=word.confidence,
+                    speaker=word.speaker
+                ) for word in utterance.words]
+            )
+            for utterance in transcript.utterances
+        ]
+
+        return Utterances(utterances=utterances)
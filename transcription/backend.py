@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from schemas.file import Utterances, Utterance, Word
+
+class TranscriptionBackend(ABC):
+    """
+    Interface class for the transcription backends
+    """
+
+    # Local backends are CPU-bound (chunks run on a process pool), remote ones are I/O-bound (chunks run on threads)
+    runs_locally = False
+
+    @abstractmethod
+    def __init__(self, name: str, config):
+        self.name = name
+
+    def cache_config(self) -> dict:
+        """
+        The backend settings that affect the transcription, part of the transcription cache key
+        """
+        return {"backend": self.name}
+
+    @abstractmethod
+    def transcribe(self, audio_file_path: str, speakers_expected: int = 2) -> Utterances:
+        """
+        Transcribe the given audio file, with speaker labels
+        """
+        raise NotImplementedError("transcribe() must be implemented by subclass")
+
+    def transcribe_chunk(self, audio_file_path: str, speakers_expected: int = 2) -> Utterances:
+        """
+        Transcribe one chunk of a longer recording (a full transcription by default)
+        """
+        return self.transcribe(audio_file_path, speakers_expected=speakers_expected)
+
+    def label_speakers(self, audio_file_path: str, words: List[Word], speakers_expected: int = 2) -> Optional[Utterances]:
+        """
+        Label the speakers of the stitched words of the whole recording
+
+        Returns None if the backend labels speakers per chunk, in which case the chunk labels are reconciled instead.
+        """
+        return None
+
+    def group_words(self, words: List[Word]) -> Utterances:
+        """
+        Group consecutive words of the same speaker into utterances
+        """
+        utterances = []
+        current = []
+
+        for word in words:
+            if current and word.speaker != current[-1].speaker:
+                utterances.append(self._to_utterance(current))
+                current = []
+            current.append(word)
+
+        if current:
+            utterances.append(self._to_utterance(current))
+
+        return Utterances(utterances=utterances)
+
+    def _to_utterance(self, words: List[Word]) -> Utterance:
+        """
+        Build an utterance from the words of a single speaker turn
+        """
+        return Utterance(
+            confidence=sum(word.confidence for word in words) / len(words),
+            end=words[-1].end,
+            speaker=words[0].speaker,
+            start=words[0].start,
+            text=" ".join(word.text for word in words),
+            words=words
+        )
+
+def create_backend(config) -> TranscriptionBackend:
+    """
+    Create the transcription backend from the config (AssemblyAI by default, or local Whisper)
+    """
+    backend = config.get("TRANSCRIPTION_BACKEND") or "assemblyai"
+
+    if backend == "assemblyai":
+        from transcription.assemblyai_backend import AssemblyAIBackend
+        return AssemblyAIBackend(config)
+    elif backend == "whisper":
+        from transcription.whisper_backend import WhisperBackend
+        return WhisperBackend(config)
+    else:
+        raise ValueError(f"Transcription backend '{backend}' is not yet implemented")
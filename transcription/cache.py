@@ -0,0 +1,37 @@
+from file_system.file_repository import FileRepository
+from helpers.fingerprint import hash_file, hash_json
+from schemas.file import Utterances
+
+class TranscriptionCache:
+    """
+    Transcription cache shared by all blogs, keyed on the audio content hash + the backend config
+
+    Re-imported, renamed or duplicated recordings are only transcribed once.
+    Stored in the hidden .cache folder of the Zoom directory, so it isn't listed as a blog.
+    """
+
+    def __init__(self, file_repository: FileRepository, directory: str = ".cache/transcripts"):
+        """
+        Initialize the TranscriptionCache
+        """
+        self.file_repository = file_repository
+        self.directory = directory
+
+    def key(self, audio_file_path: str, config: dict) -> str:
+        """
+        Get the cache key of a transcription (the audio is hashed in chunks, never loaded into memory at once)
+        """
+        return hash_json({"audio": hash_file(audio_file_path), "config": config})
+
+    def get(self, key: str):
+        """
+        Get the cached utterances for the key, if any
+        """
+        data = self.file_repository.get_json(f"{self.directory}/{key}.json")
+        return Utterances.model_validate(data) if data else None
+
+    def save(self, key: str, utterances: Utterances) -> None:
+        """
+        Save the utterances for the key
+        """
+        self.file_repository.save_json(f"{self.directory}/{key}.json", utterances.model_dump())
@@ -0,0 +1,294 @@
+import os
+import string
+import subprocess
+import tempfile
+import wave
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List
+from pydantic import BaseModel
+from schemas.file import Utterances, Word
+from transcription.backend import TranscriptionBackend, create_backend
+
+# numpy is only imported to split long recordings, not on the one-piece path
+if TYPE_CHECKING:
+    import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+# Words in the overlap of two chunks are matched if they start within this tolerance (ms)
+MATCH_TOLERANCE = 250
+
+class AudioChunk(BaseModel):
+    """
+    Schema for a chunk of a longer recording (all times in ms)
+    start/end include the overlap with the neighbouring chunks, core_start/core_end is the part the chunk owns
+    """
+    index: int
+    start: int
+    end: int
+    core_start: int
+    core_end: int
+    path: str = None
+
+# Each worker process keeps its own backend (e.g. the Whisper model is loaded once per worker)
+_backend: TranscriptionBackend = None
+
+def _init_worker(config):
+    """
+    Initialize a worker process with its own transcription backend
+    """
+    global _backend
+    _backend = create_backend(config)
+
+def _transcribe_chunk(chunk: AudioChunk, speakers_expected: int):
+    """
+    Transcribe a chunk in a worker process
+    """
+    return _backend.transcribe_chunk(chunk.path, speakers_expected)
+
+class ChunkedTranscriber:
+    """
+    Class to transcribe long recordings by splitting them on silence into overlapping chunks, transcribed concurrently
+    """
+
+    def __init__(self, backend: TranscriptionBackend, config, chunk_seconds: int = 600, overlap_seconds: int = 5, search_seconds: int = 15, max_workers: int = None):
+        """
+        Initialize the ChunkedTranscriber
+        """
+        self.backend = backend
+        self.config = config
+        self.chunk_ms = chunk_seconds * 1000
+        self.overlap_ms = overlap_seconds * 1000
+        self.search_ms = search_seconds * 1000
+        self.max_workers = max_workers
+
+    def transcribe(self, audio_file_path: str, speakers_expected: int = 2, committed: Utterances = None, offset: int = 0, on_commit=None) -> Utterances:
+        """
+        Transcribe the given audio file chunk by chunk, then stitch the chunks back together
+
+        Chunks run concurrently but are committed in order through on_commit(utterances, offset), with offset the end (ms) of
+        the audio covered so far. An interrupted transcription resumes from the committed utterances and their offset.
+        """
+        # Recordings that fit in one chunk go to the backend in one piece, without decoding them
+        duration = self.probe(audio_file_path)
+        if duration is not None and duration <= self.chunk_ms + self.search_ms and not committed:
+            return self.transcribe_whole(audio_file_path, speakers_expected, duration, on_commit)
+
+        audio = self.decode(audio_file_path)
+        duration = len(audio) * 1000 // SAMPLE_RATE
+        chunks = self.split(audio)
+
+        if len(chunks) == 1 and not committed:
+            return self.transcribe_whole(audio_file_path, speakers_expected, duration, on_commit)
+
+        # Resume after the committed chunks
+        words = [word for utterance in committed.utterances for word in utterance.words or []] if committed else []
+        pending = [chunk for chunk in chunks if chunk.core_end > offset]
+
+        # Every chunk may already be committed (e.g. interrupted while labelling the speakers), then only the labelling is left
+        if pending:
+            self.transcribe_chunks(audio, pending, speakers_expected, words, offset, on_commit)
+
+        # Backends that can diarize the whole recording relabel the stitched words, otherwise keep the reconciled chunk labels
+        utterances = self.backend.label_speakers(audio_file_path, words, speakers_expected)
+        return utterances or self.backend.group_words(words)
+
+    def transcribe_whole(self, audio_file_path: str, speakers_expected: int, duration: int, on_commit=None) -> Utterances:
+        """
+        Transcribe the recording in one piece, committed at once
+        """
+        utterances = self.backend.transcribe(audio_file_path, speakers_expected=speakers_expected)
+        if on_commit:
+            on_commit(utterances, duration)
+        return utterances
+
+    def transcribe_chunks(self, audio: "np.ndarray", pending: List[AudioChunk], speakers_expected: int, words: List[Word], offset: int, on_commit=None) -> None:
+        """
+        Transcribe the pending chunks concurrently, stitching and committing them in order (their words are appended to words)
+        """
+        previous = words
+        with tempfile.TemporaryDirectory() as directory:
+            for chunk in pending:
+                chunk.path = os.path.join(directory, f"chunk_{chunk.index}.wav")
+                self.write_chunk(audio, chunk)
+
+            with self.create_executor(len(pending)) as executor:
+                futures = [self.submit_chunk(executor, chunk, speakers_expected) for chunk in pending]
+
+                # Later chunks keep running while the earliest one is stitched and committed
+                for chunk, future in zip(pending, futures):
+                    chunk_words = self.stitch_chunk(chunk, future.result(), previous)
+                    core_words = [word for word in chunk_words if max(chunk.core_start, offset) <= (word.start + word.end) // 2 < chunk.core_end]
+
+                    words.extend(core_words)
+                    if on_commit:
+                        on_commit(self.backend.group_words(core_words), chunk.core_end)
+                    previous = chunk_words
+
+    def create_executor(self, chunks: int):
+        """
+        Create the executor for the chunks, a process pool for local backends or threads for concurrent remote jobs
+        """
+        if self.backend.runs_locally:
+            max_workers = self.max_workers or min(chunks, os.cpu_count() or 1)
+
+            # Split the cores between the workers
+            config = dict(self.config)
+            config["WHISPER_THREADS"] = str(max(1, (os.cpu_count() or 1) // max_workers))
+
+            return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(config,))
+
+        return ThreadPoolExecutor(max_workers=self.max_workers or chunks)
+
+    def submit_chunk(self, executor, chunk: AudioChunk, speakers_expected: int) -> Future:
+        """
+        Submit the transcription of a chunk to the executor
+        """
+        if self.backend.runs_locally:
+            return executor.submit(_transcribe_chunk, chunk, speakers_expected)
+        return executor.submit(self.backend.transcribe_chunk, chunk.path, speakers_expected)
+
+    # Splitting
+    def probe(self, audio_file_path: str) -> int:
+        """
+        Get the duration (ms) of the audio file from its container (requires ffprobe), None if it doesn't say
+        """
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", audio_file_path],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        try:
+            return int(float(result.stdout.strip()) * 1000)
+        except ValueError:
+            return None
+
+    def decode(self, audio_file_path: str) -> "np.ndarray":
+        """
+        Decode the audio file into 16kHz mono 16-bit PCM (requires ffmpeg)
+        """
+        import numpy as np
+
+        result = subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_file_path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+            capture_output=True,
+            check=True
+        )
+        return np.frombuffer(result.stdout, dtype=np.int16)
+
+    def split(self, audio: "np.ndarray") -> List[AudioChunk]:
+        """
+        Split the audio into overlapping chunks, cutting at the quietest point near each chunk boundary
+        """
+        duration = len(audio) * 1000 // SAMPLE_RATE
+
+        boundaries = [0]
+        while duration - boundaries[-1] > self.chunk_ms + self.search_ms:
+            boundaries.append(self.find_silence(audio, boundaries[-1] + self.chunk_ms))
+        boundaries.append(duration)
+
+        return [
+            AudioChunk(
+                index=i,
+                start=max(0, core_start - self.overlap_ms),
+                end=min(duration, core_end + self.overlap_ms),
+                core_start=core_start,
+                core_end=core_end
+            )
+            for i, (core_start, core_end) in enumerate(zip(boundaries, boundaries[1:]))
+        ]
+
+    def find_silence(self, audio: "np.ndarray", target: int) -> int:
+        """
+        Find the quietest frame (lowest RMS energy) within the search window around the target time (ms)
+        """
+        import numpy as np
+
+        frame = SAMPLE_RATE * FRAME_MS // 1000
+        start = max(0, (target - self.search_ms) * SAMPLE_RATE // 1000)
+        end = min(len(audio), (target + self.search_ms) * SAMPLE_RATE // 1000)
+
+        # Only the search window is converted, so memory stays flat for long recordings
+        window = audio[start:end]
+        frames = window[:len(window) // frame * frame].reshape(-1, frame).astype(np.float32)
+        if len(frames) == 0:
+            return target
+
+        energy = np.sqrt(np.mean(frames ** 2, axis=1))
+        quietest = int(np.argmin(energy))
+        return (start + quietest * frame + frame // 2) * 1000 // SAMPLE_RATE
+
+    def write_chunk(self, audio: "np.ndarray", chunk: AudioChunk) -> None:
+        """
+        Write the chunk as a 16kHz mono WAV file
+        """
+        samples = audio[chunk.start * SAMPLE_RATE // 1000:chunk.end * SAMPLE_RATE // 1000]
+        with wave.open(chunk.path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(samples.tobytes())
+
+    # Stitching
+    def stitch_chunk(self, chunk: AudioChunk, utterances: Utterances, previous: List[Word]) -> List[Word]:
+        """
+        Stitch a chunk transcription onto the words before it
+
+        Timestamps are offset by the chunk start and speaker labels are reconciled with the previous words.
+        """
+        words = [
+            word.model_copy(update={"start": word.start + chunk.start, "end": word.end + chunk.start})
+            for utterance in utterances.utterances
+            for word in utterance.words or []
+        ]
+
+        if previous:
+            mapping = self.speaker_mapping(previous, words, chunk.start)
+            words = [word.model_copy(update={"speaker": mapping[word.speaker]}) for word in words]
+
+        return words
+
+    def speaker_mapping(self, previous: List[Word], words: List[Word], overlap_start: int) -> Dict[str, str]:
+        """
+        Map the speaker labels of a chunk onto the labels of the previous chunk, by matching the words they share in the overlap
+        """
+        overlap_end = previous[-1].end if previous else overlap_start
+        shared = [word for word in previous if word.start >= overlap_start]
+
+        counts = Counter()
+        j = 0
+        for word in words:
+            if word.start > overlap_end:
+                break
+
+            # Both word lists are sorted, so the matching is a single pass
+            while j < len(shared) and shared[j].start < word.start - MATCH_TOLERANCE:
+                j += 1
+            k = j
+            while k < len(shared) and shared[k].start <= word.start + MATCH_TOLERANCE:
+                if shared[k].text.lower() == word.text.lower():
+                    counts[(word.speaker, shared[k].speaker)] += 1
+                    break
+                k += 1
+
+        # Greedily map the most co-occurring labels
+        mapping = {}
+        used = set()
+        for (label, previous_label), _ in counts.most_common():
+            if label not in mapping and previous_label not in used:
+                mapping[label] = previous_label
+                used.add(previous_label)
+
+        # Unmatched labels keep their own label if it's free, otherwise take the next free one
+        for label in sorted({word.speaker for word in words} - set(mapping)):
+            if label in used:
+                label_free = next(letter for letter in string.ascii_uppercase if letter not in used)
+                mapping[label] = label_free
+            else:
+                mapping[label] = label
+            used.add(mapping[label])
+
+        return mapping
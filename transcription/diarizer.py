@@ -0,0 +1,71 @@
+import string
+from typing import List, Tuple
+from schemas.file import Word
+
+# A speaker turn: (start ms, end ms, speaker label)
+Turn = Tuple[int, int, str]
+
+class Diarizer:
+    """
+    Local speaker diarization (pyannote.audio, on CPU), labelling speakers A, B, ... like AssemblyAI
+    """
+
+    def __init__(self, config):
+        """
+        Initialize the Diarizer
+        """
+        # Optional dependency, only needed for local transcription
+        from pyannote.audio import Pipeline
+
+        self.pipeline = Pipeline.from_pretrained(
+            config.get("DIARIZATION_MODEL") or "pyannote/speaker-diarization-3.1",
+            use_auth_token=config.get("HUGGINGFACE_TOKEN")
+        )
+
+    def diarize(self, audio, sample_rate: int, speakers_expected: int = 2) -> List[Turn]:
+        """
+        Diarize the given (mono, float32) audio into speaker turns
+        """
+        import torch
+
+        diarization = self.pipeline(
+            {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": sample_rate},
+            num_speakers=speakers_expected
+        )
+
+        # Relabel the speakers in order of appearance
+        labels = {}
+        turns = []
+        for segment, _, speaker in diarization.itertracks(yield_label=True):
+            if speaker not in labels:
+                labels[speaker] = string.ascii_uppercase[len(labels) % 26]
+            turns.append((int(segment.start * 1000), int(segment.end * 1000), labels[speaker]))
+
+        return sorted(turns)
+
+    def assign_speakers(self, words: List[Word], turns: List[Turn]) -> List[Word]:
+        """
+        Label each word with the speaker turn it overlaps the most (words and turns are both sorted, so this is a single pass)
+        """
+        if not turns:
+            return [word.model_copy(update={"speaker": "A"}) for word in words]
+
+        labelled = []
+        first = 0
+
+        for word in words:
+            # Skip the turns that ended before this word
+            while first < len(turns) - 1 and turns[first][1] <= word.start:
+                first += 1
+
+            speaker, best_overlap = turns[first][2], 0
+            i = first
+            while i < len(turns) and turns[i][0] < word.end:
+                overlap = min(word.end, turns[i][1]) - max(word.start, turns[i][0])
+                if overlap > best_overlap:
+                    speaker, best_overlap = turns[i][2], overlap
+                i += 1
+
+            labelled.append(word.model_copy(update={"speaker": speaker}))
+
+        return labelled
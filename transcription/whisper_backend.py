@@ -0,0 +1,113 @@
+import os
+from typing import List
+from schemas.file import Utterances, Word
+from transcription.backend import TranscriptionBackend
+from transcription.diarizer import Diarizer
+
+SAMPLE_RATE = 16000
+
+class WhisperBackend(TranscriptionBackend):
+    """
+    Local transcription backend using faster-whisper (CTranslate2, int8 quantised on CPU) and local diarization
+    """
+
+    runs_locally = True
+
+    def __init__(self, config):
+        """
+        Initialize the Whisper backend
+        """
+        super().__init__(name="whisper", config=config)
+
+        self.model_name = config.get("WHISPER_MODEL") or "small"
+        self.config = config
+        self._model = None
+        self._diarizer = None
+
+    def cache_config(self) -> dict:
+        """
+        The Whisper and diarization models affect the transcription
+        """
+        return {
+            "backend": self.name,
+            "model": self.model_name,
+            "diarization_model": self.config.get("DIARIZATION_MODEL") or "pyannote/speaker-diarization-3.1",
+        }
+
+    @property
+    def model(self):
+        """
+        The Whisper model is only loaded when first transcribing (the parent of the chunk workers never does)
+        """
+        if self._model is None:
+            # Optional dependency, only needed for local transcription
+            from faster_whisper import WhisperModel
+
+            self._model = WhisperModel(
+                self.model_name,
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=int(self.config.get("WHISPER_THREADS") or os.cpu_count() or 4)
+            )
+        return self._model
+
+    @property
+    def diarizer(self) -> Diarizer:
+        """
+        The diarizer is only loaded when first needed (chunk workers never diarize)
+        """
+        if self._diarizer is None:
+            self._diarizer = Diarizer(self.config)
+        return self._diarizer
+
+    def transcribe(self, audio_file_path: str, speakers_expected: int = 2) -> Utterances:
+        """
+        Transcribe the given audio file locally, then label the words with the diarized speakers
+        """
+        from faster_whisper import decode_audio
+
+        # Decode once, shared by the transcription and the diarization
+        audio = decode_audio(audio_file_path, sampling_rate=SAMPLE_RATE)
+
+        words = self.transcribe_words(audio)
+        turns = self.diarizer.diarize(audio, SAMPLE_RATE, speakers_expected)
+
+        return self.group_words(self.diarizer.assign_speakers(words, turns))
+
+    def transcribe_chunk(self, audio_file_path: str, speakers_expected: int = 2) -> Utterances:
+        """
+        Transcribe one chunk without diarization, the speakers are labelled once for the whole recording
+        """
+        from faster_whisper import decode_audio
+
+        audio = decode_audio(audio_file_path, sampling_rate=SAMPLE_RATE)
+        return self.group_words(self.transcribe_words(audio))
+
+    def label_speakers(self, audio_file_path: str, words: List[Word], speakers_expected: int = 2) -> Utterances:
+        """
+        Diarize the whole recording once, so the speaker labels are consistent across chunks
+        """
+        from faster_whisper import decode_audio
+
+        audio = decode_audio(audio_file_path, sampling_rate=SAMPLE_RATE)
+        turns = self.diarizer.diarize(audio, SAMPLE_RATE, speakers_expected)
+        return self.group_words(self.diarizer.assign_speakers(words, turns))
+
+    def transcribe_words(self, audio):
+        """
+        Transcribe the (16kHz mono) audio into words with timestamps in ms
+        """
+        segments, _ = self.model.transcribe(audio, word_timestamps=True, vad_filter=True)
+
+        words = []
+        for segment in segments:
+            for word in segment.words:
+                words.append(Word(
+                    text=word.word.strip(),
+                    start=int(word.start * 1000),
+                    end=int(word.end * 1000),
+                    confidence=word.probability,
+                    speaker=""
+                ))
+
+        return words